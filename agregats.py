@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module agregats - niveaux d'agrégation (1 minute, 1 heure, 1 jour).
+
+Chaque niveau est un petit CSV à côté de l'historique brut
+(syswatch_history.1m.csv, .1h.csv, .1d.csv) contenant, par tranche de temps
+et par hôte, le nombre d'échantillons et les moyenne/min/max/m2 du CPU et de
+la mémoire. Les agrégats sont tenus à jour pendant la collecte et purgés
+selon la rétention propre à chaque niveau.
+
+Une même tranche peut apparaître sur plusieurs lignes (collecte interrompue
+puis reprise) : les lignes d'une tranche se fusionnent à la lecture.
+
+Chaque niveau a aussi ses esquisses de quantiles (syswatch_history.1m.kll,
+une ligne JSON par tranche et par hôte) : les percentiles d'une période
+quelconque s'obtiennent en fusionnant les esquisses de ses tranches.
+"""
+
+import csv
+import json
+import math
+import os
+import time
+from typing import Dict, Any, Iterator, Optional
+
+import historique
+import statistiques
+import stockage_binaire
+
+# (nom, durée d'une tranche en secondes)
+NIVEAUX = [("1m", 60), ("1h", 3600), ("1d", 86400)]
+
+# Rétention par niveau en secondes (None = conservation illimitée).
+RETENTION_DEFAUT = {
+    "1m": 7 * 86400,
+    "1h": 400 * 86400,
+    "1d": None,
+}
+
+# Nombre minimal de tranches d'un niveau dans la période demandée pour que
+# ce niveau soit assez précis (erreur de bord <= 2 tranches sur 100).
+TRANCHES_MIN = 100
+
+CHAMPS_AGREGATS = [
+    "debut",
+    "hostname",
+    "nombre",
+    "cpu_moyenne",
+    "cpu_min",
+    "cpu_max",
+    "cpu_m2",
+    "mem_moyenne",
+    "mem_min",
+    "mem_max",
+    "mem_m2",
+]
+
+
+def prefixe_historique(fichier: str) -> str:
+    """
+    Préfixe commun des fichiers dérivés d'un historique (CSV ou binaire).
+
+    Ex: "syswatch_history.csv" et "syswatch_history.col" -> "syswatch_history"
+    """
+    return os.path.splitext(fichier.rstrip(os.sep))[0]
+
+
+def chemin_niveau(fichier: str, niveau: str) -> str:
+    """
+    Retourne le chemin du CSV d'un niveau d'agrégation.
+    """
+    return f"{prefixe_historique(fichier)}.{niveau}.csv"
+
+
+def chemin_esquisses(fichier: str, niveau: str) -> str:
+    """
+    Retourne le chemin des esquisses de quantiles d'un niveau d'agrégation.
+    """
+    return f"{prefixe_historique(fichier)}.{niveau}.kll"
+
+
+def _chemin_meta(fichier: str) -> str:
+    return f"{prefixe_historique(fichier)}.agregats.json"
+
+
+def lire_meta(fichier: str) -> Dict[str, Any]:
+    """
+    Retourne les métadonnées des agrégats ({} si absentes).
+
+    'couverture_debut' est l'instant à partir duquel les agrégats couvrent
+    tout l'historique brut (0 après une reconstruction complète).
+    """
+    try:
+        with open(_chemin_meta(fichier), mode="r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _ecrire_meta(fichier: str, meta: Dict[str, Any]):
+    chemin = _chemin_meta(fichier)
+    temporaire = chemin + ".tmp"
+    with open(temporaire, mode="w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temporaire, chemin)
+
+
+def _ligne_agregat(
+    debut: int,
+    hostname: str,
+    cpu: statistiques.StatistiqueFlux,
+    mem: statistiques.StatistiqueFlux,
+) -> Dict[str, Any]:
+    return {
+        "debut": debut,
+        "hostname": hostname,
+        "nombre": cpu.nombre,
+        "cpu_moyenne": cpu.moyenne,
+        "cpu_min": cpu.min,
+        "cpu_max": cpu.max,
+        "cpu_m2": cpu.m2,
+        "mem_moyenne": mem.moyenne,
+        "mem_min": mem.min,
+        "mem_max": mem.max,
+        "mem_m2": mem.m2,
+    }
+
+
+def stats_ligne(row: Dict[str, str]):
+    """
+    Décode une ligne d'agrégat.
+
+    Retourne:
+        tuple: (StatistiqueFlux cpu, StatistiqueFlux mémoire)
+    """
+    nombre = int(row["nombre"])
+    cpu = statistiques.StatistiqueFlux.depuis_resume(
+        nombre,
+        float(row["cpu_moyenne"]),
+        float(row["cpu_min"]),
+        float(row["cpu_max"]),
+        float(row["cpu_m2"]),
+    )
+    mem = statistiques.StatistiqueFlux.depuis_resume(
+        nombre,
+        float(row["mem_moyenne"]),
+        float(row["mem_min"]),
+        float(row["mem_max"]),
+        float(row["mem_m2"]),
+    )
+    return cpu, mem
+
+
+class GestionnaireAgregats:
+    """
+    Maintient les niveaux d'agrégation au fil de la collecte.
+
+    Pour chaque niveau et chaque hôte, la tranche en cours est accumulée en
+    mémoire puis écrite quand un échantillon tombe dans la tranche suivante.
+    À la fermeture, les tranches en cours sont écrites telles quelles (elles
+    seront fusionnées avec la suite lors d'une reprise).
+
+    Utilisation:
+        with GestionnaireAgregats("syswatch_history.csv") as agregats:
+            agregats.ajouter(metriques)
+    """
+
+    def __init__(self, fichier: str, retention: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            fichier (str): chemin de l'historique brut (CSV ou binaire).
+            retention (dict | None): rétention par niveau, en secondes
+                (None = RETENTION_DEFAUT).
+        """
+        self.fichier = fichier
+        self.retention = dict(RETENTION_DEFAUT)
+        if retention:
+            self.retention.update(retention)
+
+        # niveau -> hôte -> [début de tranche, stats cpu, stats mémoire,
+        #                    esquisse cpu, esquisse mémoire]
+        self._en_cours = {nom: {} for nom, _ in NIVEAUX}
+        self._derniere_purge = {nom: None for nom, _ in NIVEAUX}
+        self._fichiers = {}
+        self._meta = lire_meta(fichier)
+
+    def _ecrivain(self, niveau: str):
+        ecrivain = self._fichiers.get(niveau)
+        if ecrivain is None:
+            chemin = chemin_niveau(self.fichier, niveau)
+            f = open(chemin, mode="a", encoding="utf-8", newline="")
+            writer = csv.DictWriter(f, fieldnames=CHAMPS_AGREGATS)
+            if f.tell() == 0:
+                writer.writeheader()
+            esquisses = open(
+                chemin_esquisses(self.fichier, niveau), mode="a", encoding="utf-8"
+            )
+            ecrivain = (f, writer, esquisses)
+            self._fichiers[niveau] = ecrivain
+        return ecrivain
+
+    def ajouter(self, metriques):
+        """
+        Intègre un échantillon.
+
+        Args:
+            metriques (models.Snapshot | dict): instantané retourné par
+                collecter_instantane(), ou dictionnaire de collecter_tout()
+        """
+        ligne = historique.metriques_vers_ligne(metriques)
+        try:
+            epoch = historique.horodatage_vers_epoch(ligne["timestamp"])
+        except ValueError:
+            return
+        self.ajouter_valeurs(
+            epoch,
+            ligne["hostname"],
+            float(ligne["cpu_percent"]),
+            float(ligne["mem_percent"]),
+        )
+
+    def ajouter_valeurs(self, epoch: float, hostname: str, cpu: float, mem: float):
+        """
+        Intègre un échantillon déjà décodé.
+
+        Args:
+            epoch (float): secondes depuis l'epoch.
+            hostname (str): nom d'hôte.
+            cpu (float): utilisation CPU (%).
+            mem (float): utilisation mémoire (%).
+        """
+        if math.isnan(epoch) or math.isnan(cpu) or math.isnan(mem):
+            return
+
+        if "couverture_debut" not in self._meta:
+            # Premiers agrégats : ils ne couvrent l'historique qu'à partir
+            # d'ici (voir reconstruire_agregats pour les données plus anciennes).
+            self._meta["couverture_debut"] = epoch
+            _ecrire_meta(self.fichier, self._meta)
+
+        for niveau, duree in NIVEAUX:
+            debut = int(epoch // duree) * duree
+            hotes = self._en_cours[niveau]
+            seau = hotes.get(hostname)
+
+            if seau is None or seau[0] != debut:
+                if seau is not None:
+                    self._ecrire(niveau, hostname, seau)
+                    self._purger_si_besoin(niveau)
+                seau = [
+                    debut,
+                    statistiques.StatistiqueFlux(),
+                    statistiques.StatistiqueFlux(),
+                    statistiques.EsquisseQuantiles(),
+                    statistiques.EsquisseQuantiles(),
+                ]
+                hotes[hostname] = seau
+
+            seau[1].ajouter(cpu)
+            seau[2].ajouter(mem)
+            seau[3].ajouter(cpu)
+            seau[4].ajouter(mem)
+
+    def _ecrire(self, niveau: str, hostname: str, seau: list):
+        f, writer, esquisses = self._ecrivain(niveau)
+        writer.writerow(_ligne_agregat(seau[0], hostname, seau[1], seau[2]))
+        f.flush()
+        ligne = {
+            "debut": seau[0],
+            "hostname": hostname,
+            "cpu": seau[3].etat(),
+            "memoire": seau[4].etat(),
+        }
+        esquisses.write(json.dumps(ligne, separators=(",", ":")) + "\n")
+        esquisses.flush()
+
+    def _purger_si_besoin(self, niveau: str):
+        """
+        Purge un niveau selon sa rétention, au plus une fois par heure.
+        """
+        retention = self.retention.get(niveau)
+        if retention is None:
+            return
+        maintenant = time.monotonic()
+        derniere = self._derniere_purge[niveau]
+        if derniere is not None and maintenant - derniere < 3600:
+            return
+        self._derniere_purge[niveau] = maintenant
+
+        ecrivain = self._fichiers.pop(niveau, None)
+        if ecrivain is not None:
+            ecrivain[0].close()
+            ecrivain[2].close()
+        purger_niveau(self.fichier, niveau, time.time() - retention)
+
+    def vider(self):
+        """
+        Écrit les tranches en cours (partielles) et ferme les fichiers.
+        """
+        for niveau, _ in NIVEAUX:
+            for hostname, seau in self._en_cours[niveau].items():
+                self._ecrire(niveau, hostname, seau)
+            self._en_cours[niveau] = {}
+
+    def fermer(self):
+        """
+        Écrit les tranches en cours et ferme les fichiers des niveaux.
+        """
+        try:
+            self.vider()
+        finally:
+            for f, _, esquisses in self._fichiers.values():
+                f.close()
+                esquisses.close()
+            self._fichiers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+
+def purger_niveau(fichier: str, niveau: str, limite: float):
+    """
+    Supprime d'un niveau les tranches antérieures à une limite.
+
+    Args:
+        fichier (str): chemin de l'historique brut.
+        niveau (str): nom du niveau ("1m", "1h", "1d").
+        limite (float): secondes depuis l'epoch.
+    """
+    chemin = chemin_niveau(fichier, niveau)
+    temporaire = chemin + ".tmp"
+    try:
+        with open(chemin, mode="r", encoding="utf-8", newline="") as src, open(
+            temporaire, mode="w", encoding="utf-8", newline=""
+        ) as dst:
+            writer = csv.DictWriter(dst, fieldnames=CHAMPS_AGREGATS)
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                try:
+                    if int(row["debut"]) < limite:
+                        continue
+                except (KeyError, TypeError, ValueError):
+                    continue
+                writer.writerow(row)
+    except FileNotFoundError:
+        return
+    os.replace(temporaire, chemin)
+    _purger_esquisses(fichier, niveau, limite)
+
+
+def _purger_esquisses(fichier: str, niveau: str, limite: float):
+    chemin = chemin_esquisses(fichier, niveau)
+    temporaire = chemin + ".tmp"
+    try:
+        with open(chemin, mode="r", encoding="utf-8") as src, open(
+            temporaire, mode="w", encoding="utf-8"
+        ) as dst:
+            for ligne in src:
+                try:
+                    if json.loads(ligne)["debut"] < limite:
+                        continue
+                except (KeyError, TypeError, ValueError):
+                    continue
+                dst.write(ligne)
+    except FileNotFoundError:
+        return
+    os.replace(temporaire, chemin)
+
+
+def lire_niveau(
+    fichier: str,
+    niveau: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Lit les lignes d'un niveau dont la tranche recoupe la période demandée.
+
+    Args:
+        fichier (str): chemin de l'historique brut.
+        niveau (str): nom du niveau ("1m", "1h", "1d").
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+
+    Retourne:
+        Iterator[dict]: lignes au format CHAMPS_AGREGATS.
+    """
+    duree = dict(NIVEAUX)[niveau]
+    try:
+        with open(
+            chemin_niveau(fichier, niveau), mode="r", encoding="utf-8", newline=""
+        ) as f:
+            for row in csv.DictReader(f):
+                try:
+                    debut = int(row["debut"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if depuis is not None and debut + duree <= depuis:
+                    continue
+                if jusqua is not None and debut > jusqua:
+                    continue
+                if hote is not None and row.get("hostname") != hote:
+                    continue
+                yield row
+    except FileNotFoundError:
+        return
+
+
+def _esquisse(etat: Dict[str, Any]) -> statistiques.EsquisseQuantiles:
+    return statistiques.EsquisseQuantiles.depuis_etat(etat)
+
+
+def lire_esquisses(
+    fichier: str,
+    niveau: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+):
+    """
+    Fusionne les esquisses de quantiles d'un niveau sur une période (mêmes
+    tranches que lire_niveau).
+
+    Args:
+        fichier (str): chemin de l'historique brut.
+        niveau (str): nom du niveau ("1m", "1h", "1d").
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+
+    Retourne:
+        tuple: (EsquisseQuantiles cpu, EsquisseQuantiles mémoire)
+    """
+    duree = dict(NIVEAUX)[niveau]
+    cpu = statistiques.EsquisseQuantiles()
+    mem = statistiques.EsquisseQuantiles()
+    try:
+        with open(chemin_esquisses(fichier, niveau), mode="r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    row = json.loads(ligne)
+                    debut = row["debut"]
+                    if depuis is not None and debut + duree <= depuis:
+                        continue
+                    if jusqua is not None and debut > jusqua:
+                        continue
+                    if hote is not None and row.get("hostname") != hote:
+                        continue
+                    esquisse_cpu = _esquisse(row["cpu"])
+                    esquisse_mem = _esquisse(row["memoire"])
+                except (KeyError, TypeError, ValueError):
+                    # Ligne tronquée (arrêt pendant une écriture) : ignorée
+                    continue
+                cpu.fusionner(esquisse_cpu)
+                mem.fusionner(esquisse_mem)
+    except FileNotFoundError:
+        pass
+    return cpu, mem
+
+
+def choisir_niveau(
+    fichier: str,
+    depuis: Optional[float],
+    jusqua: Optional[float],
+    retention: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """
+    Choisit le niveau le plus grossier assez précis pour une période.
+
+    Un niveau convient si la période compte au moins TRANCHES_MIN de ses
+    tranches, si ses agrégats couvrent le début de la période et si celui-ci
+    est encore dans sa rétention.
+
+    Args:
+        fichier (str): chemin de l'historique brut.
+        depuis (float | None): borne basse (None = début de l'historique).
+        jusqua (float | None): borne haute (None = maintenant).
+        retention (dict | None): rétention par niveau (None = RETENTION_DEFAUT).
+
+    Retourne:
+        str | None: nom du niveau, ou None pour lire les données brutes.
+    """
+    meta = lire_meta(fichier)
+    couverture = meta.get("couverture_debut")
+    if couverture is None:
+        return None
+
+    maintenant = time.time()
+    fin = jusqua if jusqua is not None else maintenant
+    # Sans borne basse, la période commence au début des agrégats : il faut
+    # alors qu'ils couvrent tout l'historique (reconstruction complète).
+    debut = depuis if depuis is not None else couverture
+    if depuis is None and couverture > 0:
+        return None
+    if depuis is not None and depuis < couverture:
+        return None
+
+    retentions = dict(RETENTION_DEFAUT)
+    if retention:
+        retentions.update(retention)
+
+    for niveau, duree in reversed(NIVEAUX):
+        if (fin - debut) / duree < TRANCHES_MIN:
+            continue
+        limite = retentions.get(niveau)
+        if limite is not None and debut < maintenant - limite:
+            continue
+        if not os.path.exists(chemin_niveau(fichier, niveau)):
+            continue
+        return niveau
+    return None
+
+
+def reconstruire_agregats(
+    fichier: str, retention: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Recalcule tous les niveaux à partir de l'historique brut complet.
+
+    Args:
+        fichier (str): chemin de l'historique brut (CSV ou binaire).
+        retention (dict | None): rétention par niveau (None = RETENTION_DEFAUT).
+
+    Retourne:
+        int: nombre d'échantillons agrégés.
+    """
+    for niveau, _ in NIVEAUX:
+        chemins = (chemin_niveau(fichier, niveau), chemin_esquisses(fichier, niveau))
+        for chemin in chemins:
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+    _ecrire_meta(fichier, {"couverture_debut": 0})
+
+    nombre = 0
+    with GestionnaireAgregats(fichier, retention) as gestionnaire:
+        for epoch, hostname, cpu, mem in _parcourir_brut(fichier):
+            gestionnaire.ajouter_valeurs(epoch, hostname, cpu, mem)
+            nombre += 1
+    for niveau, duree in NIVEAUX:
+        limite = gestionnaire.retention.get(niveau)
+        if limite is not None:
+            purger_niveau(fichier, niveau, time.time() - limite)
+    return nombre
+
+
+def _parcourir_brut(fichier: str) -> Iterator[tuple]:
+    """
+    Parcourt l'historique brut : (epoch, hostname, cpu, mémoire).
+    """
+    if os.path.isdir(fichier):
+        with stockage_binaire.ouvrir_colonnes(fichier) as store:
+            c = store.colonnes
+            for ts, cpu, mem, h in zip(
+                c["timestamp"], c["cpu_percent"], c["mem_percent"], c["hostname"]
+            ):
+                yield ts, store.hotes[h], cpu, mem
+        return
+
+    for row in historique.iterer_lignes(fichier):
+        try:
+            yield (
+                historique.horodatage_vers_epoch(row.get("timestamp") or ""),
+                row.get("hostname", ""),
+                float((row.get("cpu_percent") or "").strip() or 0.0),
+                float((row.get("mem_percent") or "").strip() or 0.0),
+            )
+        except ValueError:
+            continue
+
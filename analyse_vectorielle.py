@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module analyse_vectorielle - analyses de l'historique par colonnes entières.
+
+Si NumPy est installé, les colonnes sont chargées en bloc (numpy.loadtxt,
+ou numpy.fromfile pour le stockage binaire) et toutes les analyses sont des
+opérations vectorielles. Sinon, les mêmes fonctions retombent sur une
+implémentation en Python pur, plus lente mais aux résultats identiques.
+"""
+
+import csv
+import math
+import os
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+import historique
+import index_historique
+import stockage_binaire
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_DISPONIBLE = np is not None
+
+PERCENTILES_DEFAUT = (50, 95, 99)
+
+
+def charger_colonnes(
+    fichier: str,
+    colonnes: Sequence[str] = ("cpu_percent", "mem_percent"),
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Charge des colonnes numériques de tout l'historique (segments compris).
+
+    Args:
+        fichier (str): CSV d'historique ou répertoire du stockage binaire.
+        colonnes (Sequence[str]): noms de colonnes de CHAMPS_CSV.
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+
+    Retourne:
+        dict: nom de colonne -> numpy.ndarray (ou list[float] sans NumPy).
+        Les valeurs vides ou invalides valent NaN.
+    """
+    filtre = depuis is not None or jusqua is not None or hote is not None
+
+    if os.path.isdir(fichier):
+        if np is not None and not filtre:
+            return _charger_binaire_numpy(fichier, colonnes)
+        return _charger_binaire(fichier, colonnes, depuis, jusqua, hote)
+
+    if np is not None and not filtre:
+        return _charger_csv_numpy(fichier, colonnes)
+
+    valeurs = {nom: [] for nom in colonnes}
+    for row in historique.iterer_lignes(fichier, depuis, jusqua):
+        if filtre and not index_historique.ligne_retenue(row, depuis, jusqua, hote):
+            continue
+        for nom in colonnes:
+            valeurs[nom].append(_vers_float(row.get(nom)))
+
+    if np is not None:
+        return {nom: np.asarray(v, dtype=float) for nom, v in valeurs.items()}
+    return valeurs
+
+
+def _vers_float(valeur) -> float:
+    try:
+        return float(valeur)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _charger_csv_numpy(fichier: str, colonnes: Sequence[str]) -> Dict[str, Any]:
+    """
+    Chargement en bloc de chaque segment puis du fichier actif.
+    """
+    chemins = [chemin for chemin, _, _ in historique.lister_segments(fichier)]
+    if os.path.exists(fichier):
+        chemins.append(fichier)
+
+    morceaux = {nom: [] for nom in colonnes}
+    for chemin in chemins:
+        try:
+            donnees = _loadtxt(chemin, colonnes)
+        except FileNotFoundError:
+            continue
+        if donnees is None:
+            continue
+        for i, nom in enumerate(colonnes):
+            morceaux[nom].append(donnees[:, i])
+
+    return {
+        nom: np.concatenate(m) if m else np.empty(0) for nom, m in morceaux.items()
+    }
+
+
+def _loadtxt(chemin: str, colonnes: Sequence[str]):
+    """
+    Charge des colonnes d'un fichier CSV (compressé ou non) avec loadtxt.
+
+    Retourne None si le fichier n'a pas les colonnes demandées ou aucune
+    ligne.
+    """
+    with historique.ouvrir_segment(chemin) as f:
+        champs = next(csv.reader([f.readline()]), [])
+        if not set(colonnes).issubset(champs):
+            return None
+        positions = [champs.index(nom) for nom in colonnes]
+        debut = f.tell()
+        if not f.readline().strip():
+            # En-tête seul (fichier actif juste après une rotation)
+            return None
+        f.seek(debut)
+        try:
+            # Chemin rapide, entièrement en C
+            return np.loadtxt(
+                f, delimiter=",", usecols=positions, ndmin=2, encoding="utf-8"
+            )
+        except ValueError:
+            # Valeurs vides ou invalides : conversion ligne par ligne en NaN
+            f.seek(debut)
+            return np.loadtxt(
+                f,
+                delimiter=",",
+                usecols=positions,
+                ndmin=2,
+                encoding="utf-8",
+                converters=_vers_float,
+            )
+
+
+# Extension des fichiers de colonnes -> type NumPy
+TYPES_NUMPY = {"f64": np.float64, "u32": np.uint32} if np is not None else {}
+
+# Colonne du stockage binaire -> extension de son fichier
+EXTENSIONS = {nom: ext for nom, _, ext in stockage_binaire.COLONNES_BINAIRES}
+
+
+def _charger_binaire_numpy(repertoire: str, colonnes: Sequence[str]) -> Dict[str, Any]:
+    brutes = {}
+    for nom in set(colonnes) | {"timestamp"}:
+        chemin = os.path.join(repertoire, f"{nom}.{EXTENSIONS[nom]}")
+        dtype = np.dtype(TYPES_NUMPY[EXTENSIONS[nom]])
+        try:
+            # Octets d'une ligne incomplète en fin de fichier ignorés
+            nombre = os.path.getsize(chemin) // dtype.itemsize
+            brutes[nom] = np.fromfile(chemin, dtype=dtype, count=nombre)
+        except FileNotFoundError:
+            pass
+    # Seules les lignes complètes dans toutes les colonnes comptent
+    nombre = min((len(v) for v in brutes.values()), default=0)
+    # Colonnes absentes d'un stockage plus ancien : valeurs inconnues, comme
+    # dans stockage_binaire.ColonnesBinaires
+    return {
+        nom: brutes[nom][:nombre] if nom in brutes else np.full(nombre, np.nan)
+        for nom in colonnes
+    }
+
+
+def _charger_binaire(
+    repertoire: str,
+    colonnes: Sequence[str],
+    depuis: Optional[float],
+    jusqua: Optional[float],
+    hote: Optional[str],
+) -> Dict[str, Any]:
+    with stockage_binaire.ouvrir_colonnes(repertoire) as store:
+        c = store.colonnes
+        index_hote = None
+        if hote is not None:
+            index_hote = store.hotes.index(hote) if hote in store.hotes else -1
+
+        if np is not None:
+            return _filtrer_numpy(c, store.nombre, colonnes, depuis, jusqua, index_hote)
+
+        retenues = range(store.nombre)
+        if index_hote is not None:
+            retenues = [i for i in retenues if c["hostname"][i] == index_hote]
+        if depuis is not None or jusqua is not None:
+            bas = depuis if depuis is not None else -math.inf
+            haut = jusqua if jusqua is not None else math.inf
+            retenues = [i for i in retenues if bas <= c["timestamp"][i] <= haut]
+        return {nom: [c[nom][i] for i in retenues] for nom in colonnes}
+
+
+def _filtrer_numpy(c, nombre, colonnes, depuis, jusqua, index_hote):
+    """
+    Filtrage par masques. Les tableaux créés sur les projections mémoire
+    sont locaux à cette fonction : ils sont libérés avant la fermeture du
+    stockage (l'indexation par masque produit des copies).
+    """
+    masque = np.ones(nombre, dtype=bool)
+    if index_hote is not None:
+        masque &= np.frombuffer(c["hostname"], dtype=np.uint32) == index_hote
+    temps = np.frombuffer(c["timestamp"], dtype=np.float64)
+    if depuis is not None:
+        masque &= temps >= depuis
+    if jusqua is not None:
+        masque &= temps <= jusqua
+    return {
+        nom: np.frombuffer(c[nom], dtype=TYPES_NUMPY[EXTENSIONS[nom]])[masque]
+        for nom in colonnes
+    }
+
+
+def _sans_nan(valeurs) -> Any:
+    if np is not None:
+        valeurs = np.asarray(valeurs, dtype=float)
+        return valeurs[~np.isnan(valeurs)]
+    return [v for v in valeurs if not math.isnan(v)]
+
+
+def statistiques(valeurs) -> Dict[str, Any]:
+    """
+    Moyenne, min, max et écart-type d'une colonne (NaN ignorés).
+
+    Retourne:
+        dict: {'moyenne', 'min', 'max', 'ecart_type', 'nombre'}
+        (valeurs None si la colonne est vide)
+    """
+    valeurs = _sans_nan(valeurs)
+    nombre = len(valeurs)
+    if nombre == 0:
+        return {
+            "moyenne": None,
+            "min": None,
+            "max": None,
+            "ecart_type": None,
+            "nombre": 0,
+        }
+
+    if np is not None:
+        return {
+            "moyenne": float(valeurs.mean()),
+            "min": float(valeurs.min()),
+            "max": float(valeurs.max()),
+            "ecart_type": float(valeurs.std()),
+            "nombre": nombre,
+        }
+
+    moyenne = math.fsum(valeurs) / nombre
+    variance = math.fsum((v - moyenne) ** 2 for v in valeurs) / nombre
+    return {
+        "moyenne": moyenne,
+        "min": min(valeurs),
+        "max": max(valeurs),
+        "ecart_type": math.sqrt(variance),
+        "nombre": nombre,
+    }
+
+
+def percentiles(
+    valeurs, rangs: Iterable[float] = PERCENTILES_DEFAUT
+) -> Dict[float, Optional[float]]:
+    """
+    Percentiles exacts d'une colonne, par interpolation linéaire (même
+    définition que numpy.percentile). Les NaN sont ignorés.
+
+    Args:
+        valeurs: colonne (ndarray ou liste).
+        rangs (Iterable[float]): percentiles voulus, entre 0 et 100.
+
+    Retourne:
+        dict: rang -> valeur (None si la colonne est vide).
+    """
+    rangs = list(rangs)
+    valeurs = _sans_nan(valeurs)
+    if len(valeurs) == 0:
+        return {rang: None for rang in rangs}
+
+    if np is not None:
+        resultats = np.percentile(valeurs, rangs)
+        return {rang: float(v) for rang, v in zip(rangs, resultats)}
+
+    tries = sorted(valeurs)
+    dernier = len(tries) - 1
+    resultats = {}
+    for rang in rangs:
+        position = dernier * rang / 100
+        bas = int(math.floor(position))
+        haut = min(bas + 1, dernier)
+        fraction = position - bas
+        resultats[rang] = tries[bas] + (tries[haut] - tries[bas]) * fraction
+    return resultats
+
+
+def moyenne_mobile(valeurs, fenetre: int) -> Any:
+    """
+    Moyenne glissante sur `fenetre` échantillons (fenêtres complètes
+    uniquement, comme numpy.convolve en mode "valid"). Une fenêtre qui
+    contient un NaN vaut NaN, sans effet sur les fenêtres suivantes.
+
+    Retourne:
+        numpy.ndarray | list[float]: len(valeurs) - fenetre + 1 valeurs.
+    """
+    if fenetre <= 0:
+        raise ValueError("La fenêtre doit être strictement positive.")
+    if len(valeurs) < fenetre:
+        return np.empty(0) if np is not None else []
+
+    if np is not None:
+        valeurs = np.asarray(valeurs, dtype=float)
+        absents = np.isnan(valeurs)
+        cumul = np.cumsum(np.insert(np.where(absents, 0.0, valeurs), 0, 0.0))
+        nan_cumul = np.cumsum(np.insert(absents, 0, False))
+        moyennes = (cumul[fenetre:] - cumul[:-fenetre]) / fenetre
+        moyennes[nan_cumul[fenetre:] - nan_cumul[:-fenetre] > 0] = np.nan
+        return moyennes
+
+    resultats = []
+    somme = 0.0
+    absents = 0
+    for i, valeur in enumerate(valeurs):
+        if math.isnan(valeur):
+            absents += 1
+        else:
+            somme += valeur
+        if i >= fenetre:
+            sortante = valeurs[i - fenetre]
+            if math.isnan(sortante):
+                absents -= 1
+            else:
+                somme -= sortante
+        if i >= fenetre - 1:
+            resultats.append(math.nan if absents else somme / fenetre)
+    return resultats
+
+
+def masque_seuil(valeurs, seuil: float) -> Any:
+    """
+    Masque des échantillons strictement au-dessus d'un seuil.
+
+    Retourne:
+        numpy.ndarray[bool] | list[bool]
+    """
+    if np is not None:
+        return np.asarray(valeurs, dtype=float) > seuil
+    return [v > seuil for v in valeurs]
+
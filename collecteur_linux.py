@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module collecteur_linux - collecte rapide par lecture directe de /proc.
+
+Les fichiers /proc/stat, /proc/meminfo, /proc/diskstats et /proc/net/dev
+restent ouverts ; chaque mesure les relit depuis le début avec os.preadv
+dans un tampon réutilisé et n'analyse que les champs utiles. La liste des
+partitions est lue dans /proc/self/mountinfo puis gardée en cache tant que
+le noyau ne signale pas de changement de montage (poll sur le fichier).
+
+Les mesures suivent les définitions de psutil (mêmes formules, mêmes
+arrondis) : le reste de SysWatch ne voit pas la différence. Activé par
+collector.choisir_backend("linux").
+"""
+
+import os
+import select
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import collector
+import models
+
+# Taille de départ des tampons (agrandis si un fichier ne tient pas)
+TAILLE_TAMPON = 4096
+
+# Taille d'un secteur dans /proc/diskstats, quel que soit le disque
+OCTETS_PAR_SECTEUR = 512
+
+
+def _arrondi_pourcentage(partie: float, total: float) -> float:
+    """
+    Pourcentage arrondi au dixième, comme psutil.
+    """
+    try:
+        return round(partie / total * 100, 1)
+    except ZeroDivisionError:
+        return 0.0
+
+
+def _decoder_chemin(brut: bytes) -> str:
+    """
+    Décode un chemin de mountinfo (espaces et tabulations en octal : \\040).
+    """
+    if b"\\" in brut:
+        morceaux = brut.split(b"\\")
+        brut = morceaux[0] + b"".join(
+            bytes([int(m[:3], 8)]) + m[3:] for m in morceaux[1:]
+        )
+    return os.fsdecode(brut)
+
+
+class FichierProc:
+    """
+    Fichier de /proc ouvert une fois et relu depuis le début à la demande.
+    """
+
+    def __init__(self, chemin: str, taille: int = TAILLE_TAMPON):
+        self.chemin = chemin
+        self._fd = os.open(chemin, os.O_RDONLY)
+        self._tampon = bytearray(taille)
+
+    def lire(self, prefixe: bool = False) -> bytes:
+        """
+        Relit le fichier.
+
+        Args:
+            prefixe (bool): le début du fichier suffit (les lignes utiles
+                sont en tête) : une lecture unique, sans agrandir le tampon.
+
+        Retourne:
+            bytes: contenu lu (éventuellement coupé en fin de tampon si
+            prefixe).
+        """
+        while True:
+            n = os.preadv(self._fd, [self._tampon], 0)
+            if n < len(self._tampon) or prefixe:
+                return bytes(memoryview(self._tampon)[:n])
+            self._tampon = bytearray(2 * len(self._tampon))
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def fermer(self):
+        os.close(self._fd)
+
+
+class CollecteurLinux:
+    """
+    Mesures CPU, mémoire, disques et compteurs d'entrées/sorties lus
+    directement dans /proc.
+
+    Lève (à la création) OSError si /proc n'est pas disponible.
+    """
+
+    def __init__(self):
+        self._stat = FichierProc("/proc/stat")
+        # MemTotal et MemAvailable sont dans les premières lignes
+        self._meminfo = FichierProc("/proc/meminfo", 512)
+        self._diskstats = FichierProc("/proc/diskstats")
+        self._netdev = FichierProc("/proc/net/dev")
+        self._mountinfo = FichierProc("/proc/self/mountinfo", 16384)
+
+        self._verrou_cpu = threading.Lock()
+        self._verrou_montages = threading.Lock()
+
+        # Types de systèmes de fichiers « physiques » (même filtre que
+        # psutil.disk_partitions(all=False))
+        self._types_physiques = set()
+        with open("/proc/filesystems", encoding="utf-8") as f:
+            for ligne in f:
+                champs = ligne.split()
+                if not champs:
+                    continue
+                if not ligne.startswith("nodev"):
+                    self._types_physiques.add(champs[0])
+                elif champs[-1] == "zfs":
+                    self._types_physiques.add("zfs")
+
+        self._surveillance = select.poll()
+        self._surveillance.register(
+            self._mountinfo.fileno(), select.POLLPRI | select.POLLERR
+        )
+        self._points = self._lire_montages()
+
+        # Amorçage des compteurs CPU (voir collector.EchantillonneurCPU)
+        self._precedent = self._lire_temps_cpu()
+        self._amorce = time.monotonic()
+        self._premiere_mesure = True
+
+    # --- CPU ------------------------------------------------------------------
+
+    def _lire_temps_cpu(self) -> List[Tuple[float, float]]:
+        """
+        (temps total, temps occupé) de l'ensemble puis de chaque coeur.
+        """
+        resultats = []
+        for ligne in self._stat.lire().split(b"\n"):
+            if not ligne.startswith(b"cpu"):
+                # Les lignes cpu sont en tête du fichier
+                break
+            champs = [int(v) for v in ligne.split()[1:]]
+            # user nice system idle iowait irq softirq steal guest guest_nice :
+            # guest et guest_nice sont déjà comptés dans user et nice
+            total = sum(champs[:8])
+            inactif = champs[3] + champs[4]
+            resultats.append((total, total - inactif))
+        return resultats
+
+    def echantillon_cpu(self) -> models.CpuSample:
+        """
+        Utilisation CPU depuis l'appel précédent (non bloquant).
+        """
+        with self._verrou_cpu:
+            if self._premiere_mesure:
+                attente = collector.DELAI_MIN_AMORCE - (
+                    time.monotonic() - self._amorce
+                )
+                if attente > 0:
+                    time.sleep(attente)
+                self._premiere_mesure = False
+
+            actuel = self._lire_temps_cpu()
+            pourcentages = []
+            for (total, occupe), (total_prec, occupe_prec) in zip(
+                actuel, self._precedent
+            ):
+                delta_total = total - total_prec
+                delta_occupe = max(0, occupe - occupe_prec)
+                if delta_total <= 0:
+                    pourcentages.append(0.0)
+                else:
+                    pourcentages.append(
+                        min(100.0, _arrondi_pourcentage(delta_occupe, delta_total))
+                    )
+            self._precedent = actuel
+
+        hote = collector.descripteur_hote()
+        return models.CpuSample(
+            pourcentages[0] if pourcentages else 0.0,
+            hote["coeurs_physiques"],
+            hote["coeurs_logiques"],
+            pourcentages[1:],
+        )
+
+    # --- Mémoire --------------------------------------------------------------
+
+    def echantillon_memoire(self) -> models.MemSample:
+        """
+        Mémoire totale et disponible (MemAvailable), comme
+        psutil.virtual_memory().
+        """
+        valeurs = {}
+        for ligne in self._meminfo.lire(prefixe=True).split(b"\n"):
+            nom, _, reste = ligne.partition(b":")
+            if nom in (b"MemTotal", b"MemAvailable"):
+                valeurs[nom] = int(reste.split()[0]) * 1024
+                if len(valeurs) == 2:
+                    break
+        total = valeurs.get(b"MemTotal", 0)
+        disponible = valeurs.get(b"MemAvailable", 0)
+        return models.MemSample(
+            total, disponible, _arrondi_pourcentage(total - disponible, total)
+        )
+
+    # --- Disques --------------------------------------------------------------
+
+    def _lire_montages(self) -> List[str]:
+        points = []
+        for ligne in self._mountinfo.lire().split(b"\n"):
+            gauche, separateur, droite = ligne.partition(b" - ")
+            if not separateur:
+                continue
+            champs = gauche.split()
+            type_fs, source = (droite.split() + [b"", b""])[:2]
+            if not source or source == b"none":
+                continue
+            if os.fsdecode(type_fs) not in self._types_physiques:
+                continue
+            points.append(_decoder_chemin(champs[4]))
+        return points
+
+    def points_montage(self) -> List[str]:
+        """
+        Points de montage des partitions physiques, relus seulement si la
+        table des montages a changé.
+        """
+        with self._verrou_montages:
+            if self._surveillance.poll(0):
+                self._points = self._lire_montages()
+            return list(self._points)
+
+    def echantillons_disques(self, delai: float = collector.DELAI_SONDE):
+        """
+        Occupation des partitions (statvfs), avec le délai maximal par sonde
+        de collector.sonder_partitions.
+        """
+        return collector.sonder_partitions(
+            self.points_montage(), _mesurer_partition, delai
+        )
+
+    def lire_diskstats(self) -> Dict[str, Tuple[int, int, int, int]]:
+        """
+        Compteurs cumulés d'entrées/sorties par périphérique bloc, comme
+        psutil.disk_io_counters(perdisk=True).
+
+        Retourne:
+            dict: nom du périphérique -> (lectures, écritures, octets lus,
+            octets écrits)
+        """
+        compteurs = {}
+        for ligne in self._diskstats.lire().split(b"\n"):
+            champs = ligne.split()
+            if len(champs) < 10:
+                continue
+            compteurs[os.fsdecode(champs[2])] = (
+                int(champs[3]),
+                int(champs[7]),
+                int(champs[5]) * OCTETS_PAR_SECTEUR,
+                int(champs[9]) * OCTETS_PAR_SECTEUR,
+            )
+        return compteurs
+
+    # --- Réseau ---------------------------------------------------------------
+
+    def lire_netdev(self) -> Dict[str, Tuple[int, int, int, int]]:
+        """
+        Compteurs cumulés par interface réseau, comme
+        psutil.net_io_counters(pernic=True).
+
+        Retourne:
+            dict: interface -> (octets envoyés, octets reçus, paquets
+            envoyés, paquets reçus)
+        """
+        compteurs = {}
+        # Deux lignes d'en-tête
+        for ligne in self._netdev.lire().split(b"\n")[2:]:
+            nom, separateur, reste = ligne.partition(b":")
+            if not separateur:
+                continue
+            champs = reste.split()
+            compteurs[os.fsdecode(nom.strip())] = (
+                int(champs[8]),
+                int(champs[0]),
+                int(champs[9]),
+                int(champs[1]),
+            )
+        return compteurs
+
+    def fermer(self):
+        for fichier in (
+            self._stat,
+            self._meminfo,
+            self._diskstats,
+            self._netdev,
+            self._mountinfo,
+        ):
+            fichier.fermer()
+
+
+def _mesurer_partition(point_montage: str) -> models.DiskSample:
+    """
+    Occupation d'une partition, comme psutil.disk_usage().
+    """
+    st = os.statvfs(point_montage)
+    total = st.f_blocks * st.f_frsize
+    disponible = st.f_bavail * st.f_frsize
+    utilise = (st.f_blocks - st.f_bfree) * st.f_frsize
+    return models.DiskSample(
+        point_montage,
+        total,
+        utilise,
+        _arrondi_pourcentage(utilise, utilise + disponible),
+    )
@@ -1,11 +1,188 @@
 import platform
+import signal
+import socket
+import threading
+import time
 import psutil
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
+import compteurs
+import models
+
+
+# Délai minimal entre l'amorçage des compteurs CPU et la première mesure :
+# en dessous, le delta est trop court pour donner un pourcentage significatif.
+DELAI_MIN_AMORCE = 0.1
+
+
+class EchantillonneurCPU:
+    """
+    Échantillonneur CPU non bloquant.
+
+    Les compteurs de psutil sont amorcés une seule fois à la création ;
+    chaque appel à mesurer() retourne ensuite l'utilisation calculée sur
+    l'intervalle écoulé depuis l'appel précédent (sémantique interval=None),
+    au lieu de bloquer pendant une seconde.
+    """
+
+    def __init__(self):
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._amorce = time.monotonic()
+        self._premiere_mesure = True
+
+    def mesurer(self):
+        """
+        Mesure l'utilisation CPU depuis l'appel précédent.
+
+        Retourne:
+            tuple: (utilisation globale en %, liste des % par coeur)
+        """
+        if self._premiere_mesure:
+            # Juste après l'amorçage le delta serait quasi nul : on attend
+            # le strict minimum pour obtenir une valeur exploitable.
+            attente = DELAI_MIN_AMORCE - (time.monotonic() - self._amorce)
+            if attente > 0:
+                time.sleep(attente)
+            self._premiere_mesure = False
+
+        utilisation = psutil.cpu_percent(interval=None)
+        par_coeur = psutil.cpu_percent(interval=None, percpu=True)
+        return utilisation, par_coeur
+
+
+# Amorcé dès l'import pour que la première collecte n'ait pas à attendre.
+_echantillonneur_cpu = EchantillonneurCPU()
+
+
+# Délai maximal (en secondes) accordé à chaque sonde avant de la déclarer
+# expirée : un montage NFS/CIFS figé ne doit pas bloquer tout l'instantané.
+DELAI_SONDE = 2.0
+
+# Nombre de threads du pool des groupes de métriques (cpu, mémoire, io).
+TAILLE_POOL = 4
+
+# Nombre de threads du pool des sondes de disque, distinct du précédent :
+# une sonde figée garde son thread jusqu'à ce que le noyau réponde, et des
+# montages figés ne doivent pas priver la collecte cpu/mémoire/io de
+# threads. D'où une marge confortable.
+TAILLE_POOL_SONDES = 16
+
+_pool = None
+_pool_sondes = None
+_verrou_pool = threading.Lock()
+
+# Sondes de disque encore en cours d'une collecte précédente, par point de
+# montage : on ne relance pas une sonde tant que la précédente est figée.
+# Protégé par _verrou_sondes (collecte, démon et pipeline en parallèle).
+_sondes_disque = {}
+_verrou_sondes = threading.Lock()
+
+
+def _obtenir_pool():
+    """
+    Retourne le pool de threads des groupes de métriques, créé au premier
+    usage.
+    """
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=TAILLE_POOL, thread_name_prefix="syswatch-collecte"
+            )
+        return _pool
+
+
+def _obtenir_pool_sondes():
+    """
+    Retourne le pool de threads des sondes de disque, créé au premier usage.
+    """
+    global _pool_sondes
+    with _verrou_pool:
+        if _pool_sondes is None:
+            _pool_sondes = ThreadPoolExecutor(
+                max_workers=TAILLE_POOL_SONDES, thread_name_prefix="syswatch-sonde"
+            )
+        return _pool_sondes
+
+
+# Faits statiques de l'hôte (OS, architecture, nombre de coeurs...), lus
+# une seule fois puis servis depuis le cache jusqu'à invalidation.
+_cache_hote = None
+_verrou_cache_hote = threading.Lock()
+_invalidation_demandee = False
+
+
+def _lire_descripteur_hote():
+    """
+    Interroge le système pour construire le descripteur d'hôte.
+    """
+    uname = platform.uname()
+    return {
+        "systeme": {
+            "os": uname.system,
+            "version": uname.release,
+            "architecture": uname.machine,
+            # platform.uname() est mis en cache par Python : on relit le nom
+            # d'hôte directement pour pouvoir détecter un changement.
+            "hostname": socket.gethostname(),
+        },
+        "coeurs_physiques": psutil.cpu_count(logical=False),
+        "coeurs_logiques": psutil.cpu_count(logical=True),
+    }
+
+
+def descripteur_hote():
+    """
+    Retourne les faits statiques de l'hôte, depuis le cache si possible.
+
+    Le cache est reconstruit si invalider_cache_hote() a été appelé (ou si
+    SIGHUP a été reçu) ou si le nom d'hôte a changé.
+
+    Retourne:
+        dict: {
+            'systeme': {'os', 'version', 'architecture', 'hostname'},
+            'coeurs_physiques': int,
+            'coeurs_logiques': int
+        }
+    """
+    global _cache_hote, _invalidation_demandee
+
+    cache = _cache_hote
+    if (
+        cache is not None
+        and not _invalidation_demandee
+        and cache["systeme"]["hostname"] == socket.gethostname()
+    ):
+        return cache
+
+    with _verrou_cache_hote:
+        _invalidation_demandee = False
+        _cache_hote = _lire_descripteur_hote()
+        return _cache_hote
+
+
+def invalider_cache_hote():
+    """
+    Force la relecture des faits statiques de l'hôte à la prochaine collecte.
+    """
+    global _invalidation_demandee
+    _invalidation_demandee = True
+
+
+def installer_invalidation_sighup():
+    """
+    Invalide le cache d'hôte à la réception de SIGHUP (sans effet sous
+    Windows, qui n'a pas ce signal).
+    """
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: invalider_cache_hote())
+
 
 def collecter_info_systeme():
     """
-    Collecte les informations générales du système.
+    Collecte les informations générales du système (depuis le cache d'hôte).
 
     Retourne:
         dict: {
@@ -15,13 +192,65 @@ def collecter_info_systeme():
             'hostname': ...
         }
     """
-    info = {
-        "os": platform.system(),
-        "version": platform.release(),
-        "architecture": platform.machine(),
-        "hostname": platform.node(),
-    }
-    return info
+    return dict(descripteur_hote()["systeme"])
+
+
+# Source des mesures : None = psutil, sinon un collecteur spécialisé
+# (voir choisir_backend)
+BACKENDS = ("psutil", "linux")
+_backend = None
+
+# Débits d'entrées/sorties : dernière lecture des compteurs cumulés
+_moteur_disques = compteurs.MoteurCompteurs()
+_moteur_reseau = compteurs.MoteurCompteurs()
+
+
+def choisir_backend(nom):
+    """
+    Choisit la source des mesures CPU, mémoire, disques et entrées/sorties
+    pour toutes les fonctions de collecte.
+
+    Args:
+        nom (str): "psutil" (portable) ou "linux" (lecture directe de /proc,
+            voir collecteur_linux).
+
+    Lève:
+        ValueError: backend inconnu.
+        OSError: backend indisponible sur ce système.
+    """
+    global _backend, _moteur_disques, _moteur_reseau
+    if nom == "psutil":
+        _backend = None
+    elif nom == "linux":
+        # Import tardif : le module n'a de sens que sous Linux
+        import collecteur_linux
+
+        _backend = collecteur_linux.CollecteurLinux()
+    else:
+        raise ValueError(f"Backend inconnu : {nom}")
+    # Pas de débit entre deux lectures de sources différentes
+    _moteur_disques = compteurs.MoteurCompteurs()
+    _moteur_reseau = compteurs.MoteurCompteurs()
+    amorcer_io()
+
+
+def echantillon_cpu():
+    """
+    Mesure l'utilisation CPU depuis la collecte précédente (non bloquant).
+
+    Retourne:
+        models.CpuSample
+    """
+    if _backend is not None:
+        return _backend.echantillon_cpu()
+    utilisation, par_coeur = _echantillonneur_cpu.mesurer()
+    hote = descripteur_hote()
+    return models.CpuSample(
+        utilisation,
+        hote["coeurs_physiques"],
+        hote["coeurs_logiques"],
+        par_coeur,
+    )
 
 
 def collecter_cpu():
@@ -32,15 +261,26 @@ def collecter_cpu():
         dict: {
             'coeurs_physiques': int,
             'coeurs_logiques': int,
-            'utilisation': float
+            'utilisation': float,
+            'par_coeur': list[float]
         }
+
+    L'utilisation est mesurée depuis la collecte précédente (non bloquant).
     """
-    data = {
-        "coeurs_physiques": psutil.cpu_count(logical=False),
-        "coeurs_logiques": psutil.cpu_count(logical=True),
-        "utilisation": psutil.cpu_percent(interval=1),  # mesure sur 1s
-    }
-    return data
+    return echantillon_cpu().vers_dict()
+
+
+def echantillon_memoire():
+    """
+    Mesure la mémoire (RAM).
+
+    Retourne:
+        models.MemSample
+    """
+    if _backend is not None:
+        return _backend.echantillon_memoire()
+    mem = psutil.virtual_memory()
+    return models.MemSample(mem.total, mem.available, mem.percent)
 
 
 def collecter_memoire():
@@ -54,20 +294,94 @@ def collecter_memoire():
             'pourcentage': float
         }
     """
-    mem = psutil.virtual_memory()
+    return echantillon_memoire().vers_dict()
 
-    data = {
-        "total": mem.total,
-        "disponible": mem.available,
-        "pourcentage": mem.percent,
-    }
-    return data
+
+def _mesurer_partition(point_montage):
+    """
+    Mesure l'occupation d'une partition (exécuté dans le pool).
+    """
+    usage = psutil.disk_usage(point_montage)
+    return models.DiskSample(point_montage, usage.total, usage.used, usage.percent)
+
+
+def echantillons_disques(delai=DELAI_SONDE):
+    """
+    Mesure les partitions en parallèle, avec un délai maximal par sonde.
+
+    Args:
+        delai (float): délai maximal par sonde, en secondes.
+
+    Retourne:
+        list[models.DiskSample]: une mesure par partition accessible ; une
+        partition qui n'a pas répondu à temps a expire=True.
+    """
+    if _backend is not None:
+        return _backend.echantillons_disques(delai)
+    points = [part.mountpoint for part in psutil.disk_partitions()]
+    return sonder_partitions(points, _mesurer_partition, delai)
 
 
-def collecter_disques():
+def sonder_partitions(points, mesurer, delai=DELAI_SONDE):
+    """
+    Exécute une sonde par point de montage sur le pool des sondes, avec un
+    délai maximal ; une sonde encore figée n'est pas relancée.
+
+    Args:
+        points (list[str]): points de montage (un point monté plusieurs
+            fois n'est mesuré qu'une fois).
+        mesurer: fonction point de montage -> models.DiskSample.
+        delai (float): délai maximal par sonde, en secondes.
+
+    Retourne:
+        list[models.DiskSample]: voir echantillons_disques().
+    """
+    pool = _obtenir_pool_sondes()
+
+    sondes = []
+    with _verrou_sondes:
+        for point in dict.fromkeys(points):
+            future = _sondes_disque.get(point)
+            if future is None or future.done():
+                future = pool.submit(mesurer, point)
+                _sondes_disque[point] = future
+            sondes.append((point, future))
+
+    wait([f for _, f in sondes], timeout=delai)
+
+    resultats = []
+    for point, future in sondes:
+        if not future.done():
+            resultats.append(models.DiskSample(point, expire=True))
+            continue
+
+        with _verrou_sondes:
+            # Un autre appel a pu la retirer, voire en relancer une
+            if _sondes_disque.get(point) is future:
+                del _sondes_disque[point]
+        try:
+            resultats.append(future.result())
+        except PermissionError:
+            # On ignore simplement les partitions auxquelles on n'a pas accès
+            continue
+        except OSError:
+            # Partition démontée entre l'énumération et la mesure
+            continue
+
+    return resultats
+
+
+def collecter_disques(delai=DELAI_SONDE):
     """
     Collecte les informations sur les disques.
 
+    Chaque partition est sondée en parallèle avec un délai maximal : une
+    partition qui ne répond pas à temps (montage réseau figé) est signalée
+    comme expirée au lieu de bloquer la collecte.
+
+    Args:
+        delai (float): délai maximal par sonde, en secondes.
+
     Retourne:
         list[dict]: une liste de dictionnaires, un par partition :
             {
@@ -76,26 +390,104 @@ def collecter_disques():
                 'utilise': int (octets),
                 'pourcentage': float
             }
+        ou, pour une partition qui n'a pas répondu à temps :
+            {
+                'point_montage': str,
+                'expire': True
+            }
     Les partitions inaccessibles (permissions) sont ignorées.
     """
-    resultats = []
+    return [d.vers_dict() for d in echantillons_disques(delai)]
 
-    partitions = psutil.disk_partitions()
-    for part in partitions:
-        try:
-            usage = psutil.disk_usage(part.mountpoint)
-            data_part = {
-                "point_montage": part.mountpoint,
-                "total": usage.total,
-                "utilise": usage.used,
-                "pourcentage": usage.percent,
-            }
-            resultats.append(data_part)
-        except PermissionError:
-            # On ignore simplement les partitions auxquelles on n'a pas accès
-            continue
 
-    return resultats
+def echantillons_io():
+    """
+    Mesure les débits d'entrées/sorties des disques et des interfaces
+    réseau depuis la collecte précédente (voir compteurs.MoteurCompteurs).
+
+    Les compteurs sont lus bruts (nowrap=False) : les débordements et
+    remises à zéro sont traités par le moteur, pour les deux backends.
+
+    Retourne:
+        tuple: (list[models.DiskIOSample], list[models.NetIOSample]) ; un
+        périphérique apparu depuis la lecture précédente n'y figure pas
+        encore.
+    """
+    if _backend is not None:
+        disques = _backend.lire_diskstats()
+        reseau = _backend.lire_netdev()
+    else:
+        disques = {
+            nom: c[:4]
+            for nom, c in (
+                psutil.disk_io_counters(perdisk=True, nowrap=False) or {}
+            ).items()
+        }
+        reseau = {
+            nom: c[:4]
+            for nom, c in psutil.net_io_counters(pernic=True, nowrap=False).items()
+        }
+    instant = time.monotonic()
+
+    debits_disques = _moteur_disques.debits(disques, instant)
+    debits_reseau = _moteur_reseau.debits(reseau, instant)
+
+    io_disques = [
+        models.DiskIOSample(
+            nom, lus, ecrits, lectures, ecritures, compteurs.est_partition(nom)
+        )
+        for nom, (lectures, ecritures, lus, ecrits) in debits_disques.items()
+    ]
+    io_reseau = [
+        models.NetIOSample(
+            nom, recus, envoyes, paquets_r, paquets_e, compteurs.est_boucle(nom)
+        )
+        for nom, (envoyes, recus, paquets_e, paquets_r) in debits_reseau.items()
+    ]
+    return io_disques, io_reseau
+
+
+def amorcer_io():
+    """
+    Lit une première fois les compteurs d'entrées/sorties, pour que la
+    collecte suivante ait déjà des débits. Sans amorçage, la première
+    collecte n'a pas de débits : elle sert de référence.
+    """
+    echantillons_io()
+
+
+def collecter_instantane():
+    """
+    Collecte toutes les métriques dans un objet typé.
+
+    Les groupes de métriques indépendants sont collectés en parallèle sur le
+    pool de threads de collecte ; les faits statiques viennent du cache d'hôte
+    (partagés, sans copie).
+
+    Retourne:
+        models.Snapshot
+    """
+    timestamp = datetime.now().isoformat()  # ex: "2025-11-19T10:23:45.123456"
+
+    pool = _obtenir_pool()
+    cpu = pool.submit(echantillon_cpu)
+    memoire = pool.submit(echantillon_memoire)
+    io = pool.submit(echantillons_io)
+
+    # echantillons_disques gère lui-même ses délais par partition : on
+    # l'exécute dans le thread courant pendant que les autres groupes tournent.
+    disques = echantillons_disques()
+    io_disques, io_reseau = io.result()
+
+    return models.Snapshot(
+        timestamp,
+        descripteur_hote()["systeme"],
+        cpu.result(),
+        memoire.result(),
+        disques,
+        io_disques=io_disques,
+        io_reseau=io_reseau,
+    )
 
 
 def collecter_tout():
@@ -108,14 +500,11 @@ def collecter_tout():
             'systeme': {...},
             'cpu': {...},
             'memoire': {...},
-            'disques': [...]
+            'disques': [...],
+            'io_disques': [...],
+            'io_reseau': [...]
         }
+
+    Voir collecter_instantane() pour la même collecte sous forme d'objets.
     """
-    donnees = {
-        "timestamp": datetime.now().isoformat(),  # ex: "2025-11-19T10:23:45.123456"
-        "systeme": collecter_info_systeme(),
-        "cpu": collecter_cpu(),
-        "memoire": collecter_memoire(),
-        "disques": collecter_disques(),
-    }
-    return donnees
+    return collecter_instantane().vers_dict()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module compteurs - débits calculés à partir de compteurs cumulés.
+
+Les compteurs d'entrées/sorties du noyau (octets, opérations, paquets) ne
+font que croître depuis le démarrage. Un MoteurCompteurs garde la
+dernière valeur de chaque compteur, par périphérique, et retourne à chaque
+appel les débits par seconde depuis l'appel précédent :
+    - un compteur 32 bits qui repasse par zéro (débordement) est corrigé,
+      s'il était assez proche de la limite pour l'avoir atteinte depuis
+      l'appel précédent ;
+    - un compteur qui recule sans pouvoir être un débordement (pilote
+      rechargé, périphérique recréé sous le même nom) sert de nouvelle
+      référence, sans débit pour cet appel ;
+    - un périphérique apparu (branchement à chaud) n'a de débit qu'à partir
+      de l'appel suivant, un périphérique disparu est oublié.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+# Un compteur inférieur à cette valeur peut être un compteur 32 bits
+LIMITE_32_BITS = 2 ** 32
+
+# Progression maximale par seconde d'un compteur 32 bits qui déborde
+# (1 Gio/s). Les compteurs de psutil et de /proc sont 64 bits sur un noyau
+# 64 bits : un recul qui demanderait plus pour être un débordement est une
+# remise à zéro.
+PROGRESSION_MAX_32_BITS = 2 ** 30
+
+# Interfaces réseau de bouclage (exclues des totaux de l'hôte)
+INTERFACES_BOUCLE = ("lo", "lo0")
+
+_partitions = {}
+
+
+def _delta(
+    precedent: int, actuel: int, maximum: int = LIMITE_32_BITS // 2
+) -> Optional[int]:
+    """
+    Progression d'un compteur, None s'il a été remis à zéro.
+
+    Un recul n'est pris pour un débordement 32 bits que si le compteur
+    était proche de la limite : la progression obtenue (reste jusqu'à la
+    limite plus valeur actuelle) ne dépasse pas `maximum`, la progression
+    plausible sur l'intervalle. Sinon le compteur a été remis à zéro.
+    """
+    if actuel >= precedent:
+        return actuel - precedent
+    delta = actuel + LIMITE_32_BITS - precedent
+    if precedent < LIMITE_32_BITS and delta <= maximum:
+        return delta
+    return None
+
+
+class MoteurCompteurs:
+    """
+    Débits par seconde de compteurs cumulés, par périphérique.
+
+    Utilisation:
+        moteur = MoteurCompteurs()
+        moteur.debits({"sda": (lectures, ecritures, lus, ecrits)})  # {}
+        ...
+        moteur.debits({"sda": (...)})   # {"sda": (lectures/s, ...)}
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._precedents = {}
+        self._instant = None
+        self.debordements = 0
+        self.remises_a_zero = 0
+
+    def debits(
+        self,
+        compteurs: Dict[str, Sequence[int]],
+        instant: Optional[float] = None,
+    ) -> Dict[str, Tuple[float, ...]]:
+        """
+        Intègre une lecture des compteurs.
+
+        Args:
+            compteurs (dict): périphérique -> valeurs cumulées (toujours
+                dans le même ordre).
+            instant (float | None): instant de la lecture (time.monotonic),
+                None = maintenant.
+
+        Retourne:
+            dict: périphérique -> débits par seconde, dans l'ordre des
+            valeurs ; seulement pour les périphériques déjà présents à
+            l'appel précédent et dont aucun compteur n'a été remis à zéro.
+        """
+        if instant is None:
+            instant = time.monotonic()
+        resultats = {}
+        with self._verrou:
+            if self._instant is not None and instant > self._instant:
+                duree = instant - self._instant
+                maximum = min(LIMITE_32_BITS // 2, PROGRESSION_MAX_32_BITS * duree)
+                for nom, valeurs in compteurs.items():
+                    precedent = self._precedents.get(nom)
+                    if precedent is None:
+                        continue
+                    deltas = [
+                        _delta(p, v, maximum) for p, v in zip(precedent, valeurs)
+                    ]
+                    if None in deltas:
+                        self.remises_a_zero += 1
+                        continue
+                    if any(v < p for p, v in zip(precedent, valeurs)):
+                        self.debordements += 1
+                    resultats[nom] = tuple(d / duree for d in deltas)
+            # Les périphériques disparus sont oubliés
+            self._precedents = dict(compteurs)
+            self._instant = instant
+        return resultats
+
+
+def est_partition(peripherique: str) -> bool:
+    """
+    Vrai si le périphérique bloc est une partition (ses entrées/sorties
+    sont déjà comptées dans celles du disque). Sous Linux, d'après sysfs ;
+    ailleurs, psutil ne liste que des disques.
+    """
+    resultat = _partitions.get(peripherique)
+    if resultat is None:
+        nom = peripherique.replace("/", "!")
+        resultat = os.path.exists(f"/sys/class/block/{nom}/partition")
+        _partitions[peripherique] = resultat
+    return resultat
+
+
+def est_boucle(interface: str) -> bool:
+    """
+    Vrai pour une interface réseau de bouclage.
+    """
+    return interface in INTERFACES_BOUCLE or interface.startswith("Loopback")
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module demon - collecte permanente et requêtes locales par socket Unix.
+
+Le démon collecte à fréquence fixe (comme --continu), publie chaque
+échantillon dans un pipeline d'exportateurs (historique, agrégats... écrits
+en arrière-plan, voir exporteurs), et garde en mémoire le dernier
+instantané, les échantillons récents et un agrégateur de tout l'historique
+tenu à jour à chaque collecte.
+Il répond sur un socket Unix (syswatch_history.csv.sock) à des requêtes
+JSON d'une ligne, sans relire les fichiers ni relancer psutil :
+
+    {"requete": "snapshot"}
+    {"requete": "stats", "depuis": t0, "jusqua": t1, "hote": "srv1",
+     "episodes": [...]}
+    {"requete": "range", "depuis": t0, "jusqua": t1, "hote": "srv1"}
+
+Réponse : {"ok": true, "resultat": ...} ou {"ok": false, "erreur": "..."}.
+Une requête sur une période plus ancienne que la fenêtre en mémoire est
+servie depuis le disque jusqu'au plus ancien échantillon en mémoire, puis
+depuis la mémoire (les derniers échantillons peuvent être encore dans les
+files d'export), sans écrire le point de reprise de --stats. Sont
+refusées (le client calcule alors lui-même) : les statistiques de tout
+l'historique avec d'autres paramètres d'épisodes que ceux du démon, et
+les requêtes range sans borne ou de plus de LIGNES_MAX_PLAGE lignes.
+"""
+
+import json
+import math
+import os
+import signal
+import socket
+import socketserver
+import threading
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import collector
+import historique
+import index_historique
+import models
+import ordonnanceur
+import stockage_binaire
+import tampon_circulaire
+import traitement
+
+# Nombre d'échantillons récents gardés en mémoire (24 h à 1 s d'intervalle)
+FENETRE_MEMOIRE = tampon_circulaire.CAPACITE_DEFAUT
+
+# Délai maximal (secondes) d'une requête côté client
+DELAI_REQUETE = 5.0
+
+TAILLE_MAX_REQUETE = 64 * 1024
+
+# Nombre maximal de lignes d'une réponse range (une seule ligne JSON)
+LIGNES_MAX_PLAGE = 100_000
+
+
+class DemonIndisponible(Exception):
+    """
+    Aucun démon ne répond sur le socket, ou il a refusé la requête.
+    """
+
+
+def chemin_socket(fichier: str) -> str:
+    """
+    Retourne le chemin du socket du démon associé à un historique.
+    """
+    return fichier.rstrip(os.sep) + ".sock"
+
+
+def _vers_float(valeur) -> Optional[float]:
+    try:
+        valeur = float(valeur)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(valeur) else valeur
+
+
+def _ligne_compacte(row: Dict[str, Any]) -> list:
+    """
+    Ligne d'historique en liste, dans l'ordre de CHAMPS_CSV, valeurs
+    numériques décodées (None si vides).
+    """
+    return [row.get("timestamp", ""), row.get("hostname", "")] + [
+        _vers_float(row.get(nom)) for nom in historique.CHAMPS_CSV[2:]
+    ]
+
+
+def lire_periode(
+    fichier: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+) -> Iterator[list]:
+    """
+    Lit sur disque les lignes d'historique d'une période.
+
+    Args:
+        fichier (str): CSV d'historique ou répertoire du stockage binaire.
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+
+    Retourne:
+        Iterator[list]: lignes dans l'ordre de CHAMPS_CSV.
+    """
+    if os.path.isdir(fichier):
+        with stockage_binaire.ouvrir_colonnes(fichier) as store:
+            c = store.colonnes
+            bas = depuis if depuis is not None else -math.inf
+            haut = jusqua if jusqua is not None else math.inf
+            for i in range(store.nombre):
+                nom_hote = store.hotes[c["hostname"][i]]
+                if hote is not None and nom_hote != hote:
+                    continue
+                epoch = c["timestamp"][i]
+                if math.isnan(epoch) or not bas <= epoch <= haut:
+                    continue
+                yield [historique.epoch_vers_horodatage(epoch), nom_hote] + [
+                    _vers_float(c[nom][i]) for nom in historique.CHAMPS_CSV[2:]
+                ]
+        return
+
+    for row in historique.iterer_segments(fichier, depuis, jusqua):
+        if index_historique.ligne_retenue(row, depuis, jusqua, hote):
+            yield _ligne_compacte(row)
+    for row in index_historique.lire_lignes(fichier, depuis, jusqua, hote):
+        yield _ligne_compacte(row)
+
+
+class Demon:
+    """
+    Collecte permanente et serveur de requêtes.
+
+    Utilisation:
+        pipeline = exporteurs.Pipeline({"csv": ..., "agregats": ...})
+        demon = Demon(pipeline, "syswatch_history.csv", intervalle=1.0)
+        demon.executer()     # jusqu'à Ctrl+C ou SIGTERM
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        fichier: str,
+        intervalle: float,
+        nombre: int = 0,
+        episodes: Optional[List[Dict[str, Any]]] = None,
+        fenetre: int = FENETRE_MEMOIRE,
+        collecteur_processus=None,
+        retention: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            pipeline (exporteurs.Pipeline): exportateurs alimentés à chaque
+                collecte, dont celui de l'historique ; fermé à l'arrêt.
+            fichier (str): chemin de l'historique (CSV ou binaire).
+            intervalle (float): secondes entre chaque collecte.
+            nombre (int): nombre de collectes (0 = infini).
+            episodes (list[dict] | None): détecteurs d'épisodes de
+                l'agrégateur résident (voir traitement.AgregateurHistorique).
+            fenetre (int): nombre d'échantillons récents gardés en mémoire.
+            collecteur_processus (processus.CollecteurProcessus | None):
+                classement des processus ajouté aux échantillons.
+            retention (dict | None): rétention des agrégats par niveau,
+                celle de l'exportateur "agregats" du pipeline.
+        """
+        self.pipeline = pipeline
+        self.collecteur_processus = collecteur_processus
+        self.fichier = fichier
+        self.chemin_socket = chemin_socket(fichier)
+        self.ordo = ordonnanceur.Ordonnanceur(intervalle, nombre)
+        self.episodes = episodes
+        self.retention = retention
+
+        self._verrou = threading.Lock()
+        # Les lectures sur disque (et le point de reprise) une à la fois
+        self._verrou_disque = threading.Lock()
+        self._dernier = None
+        self._recents = tampon_circulaire.TamponCirculaire(fenetre)
+        self._agregateur = None
+        self._serveur = None
+
+    # --- Cycle de vie ---------------------------------------------------------
+
+    def executer(self):
+        """
+        Démarre le serveur puis collecte jusqu'à la fin de l'ordonnanceur ou
+        une interruption. Le socket est supprimé à l'arrêt.
+
+        Lève:
+            RuntimeError: un autre démon sert déjà cet historique.
+        """
+        try:
+            self._liberer_socket()
+        except RuntimeError:
+            self.pipeline.fermer()
+            raise
+        collector.installer_invalidation_sighup()
+        collector.amorcer_io()
+        signal.signal(signal.SIGTERM, _interrompre)
+
+        try:
+            # Statistiques de l'historique existant (reprise incrémentale)
+            self._agregateur = self._analyser_disque(
+                None, None, None, self.episodes, reprise=True
+            )
+            self._demarrer_serveur()
+            for _ in self.ordo:
+                metriques = collector.collecter_instantane()
+                if self.collecteur_processus is not None:
+                    self.collecteur_processus.collecter(metriques)
+                try:
+                    epoch = historique.horodatage_vers_epoch(metriques.timestamp)
+                except ValueError:
+                    epoch = math.nan
+                with self._verrou:
+                    self._dernier = metriques
+                    self._recents.ajouter(metriques)
+                    self._agregateur.ajouter_valeurs(
+                        metriques.cpu.utilisation,
+                        metriques.memoire.pourcentage,
+                        epoch,
+                        metriques.hostname,
+                        {
+                            nom: valeur
+                            for nom, valeur in metriques.totaux_io().items()
+                            if valeur != ""
+                        },
+                    )
+                # Écritures sur disque en arrière-plan
+                self.pipeline.publier(metriques)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._arreter_serveur()
+            self.pipeline.fermer()
+
+    def _liberer_socket(self):
+        if not os.path.exists(self.chemin_socket):
+            return
+        try:
+            interroger(self.fichier, {"requete": "snapshot"}, delai=1.0)
+        except DemonIndisponible:
+            # Socket laissé par un démon arrêté brutalement
+            os.remove(self.chemin_socket)
+        else:
+            raise RuntimeError(f"Un démon répond déjà sur {self.chemin_socket}")
+
+    def _demarrer_serveur(self):
+        demon = self
+
+        class Gestionnaire(socketserver.StreamRequestHandler):
+            def handle(self):
+                ligne = self.rfile.readline(TAILLE_MAX_REQUETE)
+                reponse = demon.traiter(ligne)
+                texte = json.dumps(reponse, separators=(",", ":"))
+                self.wfile.write(texte.encode("utf-8") + b"\n")
+
+        self._serveur = socketserver.ThreadingUnixStreamServer(
+            self.chemin_socket, Gestionnaire
+        )
+        self._serveur.daemon_threads = True
+        threading.Thread(
+            target=self._serveur.serve_forever, name="syswatch-socket", daemon=True
+        ).start()
+
+    def _arreter_serveur(self):
+        if self._serveur is None:
+            return
+        self._serveur.shutdown()
+        self._serveur.server_close()
+        self._serveur = None
+        try:
+            os.remove(self.chemin_socket)
+        except FileNotFoundError:
+            pass
+
+    # --- Requêtes -------------------------------------------------------------
+
+    def traiter(self, brut: bytes) -> Dict[str, Any]:
+        """
+        Traite une requête JSON et retourne la réponse.
+        """
+        try:
+            requete = json.loads(brut)
+            nom = requete["requete"]
+        except (ValueError, TypeError, KeyError):
+            return {"ok": False, "erreur": "requête invalide"}
+
+        traitements = {
+            "snapshot": self._snapshot,
+            "stats": self._stats,
+            "range": self._plage,
+        }
+        if nom not in traitements:
+            return {"ok": False, "erreur": f"requête inconnue : {nom}"}
+        try:
+            return {"ok": True, "resultat": traitements[nom](requete)}
+        except (TypeError, ValueError) as e:
+            return {"ok": False, "erreur": str(e)}
+
+    def _snapshot(self, requete: Dict[str, Any]):
+        with self._verrou:
+            dernier = self._dernier
+        # Conversion hors verrou : l'instantané n'est jamais modifié
+        return None if dernier is None else dernier.vers_dict()
+
+    def _en_memoire(
+        self, depuis: Optional[float], jusqua: Optional[float]
+    ) -> Optional[tampon_circulaire.TamponCirculaire]:
+        """
+        Copie des échantillons récents de la période si la fenêtre en
+        mémoire la couvre, sinon None.
+        """
+        with self._verrou:
+            # Les échantillons antérieurs au plus ancien en mémoire (ou au
+            # démarrage du démon) ne sont que sur disque.
+            plus_ancien = self._recents.plus_ancien()
+            if depuis is None or plus_ancien is None or plus_ancien > depuis:
+                return None
+            return self._recents.extraire(depuis, jusqua)
+
+    def _stats(self, requete: Dict[str, Any]):
+        depuis = requete.get("depuis")
+        jusqua = requete.get("jusqua")
+        hote = requete.get("hote")
+        episodes = requete.get("episodes")
+
+        if depuis is None and jusqua is None and hote is None:
+            # Paramètres complétés par les valeurs par défaut des détecteurs
+            demandes = traitement.AgregateurHistorique(
+                episodes=episodes
+            ).parametres_episodes()
+            with self._verrou:
+                if demandes == self._agregateur.parametres_episodes():
+                    return self._agregateur.resume()
+            # Tout relire prendrait plus que le délai du client
+            raise ValueError(
+                "paramètres d'épisodes différents de ceux du démon : "
+                "statistiques de tout l'historique à calculer localement"
+            )
+
+        recents = self._en_memoire(depuis, jusqua)
+        if recents is not None:
+            agregateur = traitement.AgregateurHistorique(episodes=episodes)
+        else:
+            jusqua_disque, recents = self._separer(jusqua)
+            if _periode_vide(depuis, jusqua_disque):
+                agregateur = traitement.AgregateurHistorique(episodes=episodes)
+            else:
+                agregateur = self._analyser_disque(
+                    depuis, jusqua_disque, hote, episodes
+                )
+        if recents is not None:
+            hotes = recents.hotes
+            for epoch, cpu, mem, h, *debits in zip(
+                recents.colonne("timestamp"),
+                recents.colonne("cpu_percent"),
+                recents.colonne("mem_percent"),
+                recents.colonne("hostname"),
+                *(recents.colonne(nom) for nom in models.CHAMPS_IO),
+            ):
+                if hote is None or hotes[h] == hote:
+                    agregateur.ajouter_valeurs(
+                        cpu, mem, epoch, hotes[h], dict(zip(models.CHAMPS_IO, debits))
+                    )
+        return agregateur.resume()
+
+    def _separer(
+        self, jusqua: Optional[float]
+    ) -> Tuple[Optional[float], Optional[tampon_circulaire.TamponCirculaire]]:
+        """
+        Sépare une période qui commence avant la fenêtre en mémoire : les
+        échantillons antérieurs au plus ancien en mémoire sont lus sur
+        disque, les suivants (dont ceux pas encore écrits par le pipeline)
+        en mémoire.
+
+        Retourne:
+            tuple: (borne haute de la lecture sur disque, None = aucune ;
+            copie des échantillons en mémoire de la période, ou None).
+        """
+        with self._verrou:
+            plus_ancien = self._recents.plus_ancien()
+            if plus_ancien is None:
+                return jusqua, None
+            recents = self._recents.extraire(plus_ancien, jusqua)
+        # Timestamps à la microseconde : borne stricte sur disque
+        limite = plus_ancien - 1e-6
+        return (limite if jusqua is None else min(jusqua, limite)), recents
+
+    def _analyser_disque(self, depuis, jusqua, hote, episodes, reprise=False):
+        # Le point de reprise n'est écrit qu'au démarrage, jamais depuis une
+        # requête
+        with self._verrou_disque:
+            return traitement.analyser_historique(
+                self.fichier,
+                depuis=depuis,
+                jusqua=jusqua,
+                hote=hote,
+                reprise=reprise,
+                episodes=episodes,
+                retention=self.retention,
+            )
+
+    def _plage(self, requete: Dict[str, Any]):
+        depuis = requete.get("depuis")
+        jusqua = requete.get("jusqua")
+        hote = requete.get("hote")
+        if depuis is None and jusqua is None:
+            raise ValueError("requête range sans borne : lire l'historique")
+
+        recents = self._en_memoire(depuis, jusqua)
+        lignes = []
+        if recents is None:
+            jusqua_disque, recents = self._separer(jusqua)
+            if not _periode_vide(depuis, jusqua_disque):
+                with self._verrou_disque:
+                    lignes = list(
+                        islice(
+                            lire_periode(self.fichier, depuis, jusqua_disque, hote),
+                            LIGNES_MAX_PLAGE + 1,
+                        )
+                    )
+        if recents is not None:
+            lignes.extend(
+                islice(recents.lignes(hote=hote), LIGNES_MAX_PLAGE + 1 - len(lignes))
+            )
+        if len(lignes) > LIGNES_MAX_PLAGE:
+            raise ValueError(
+                f"plus de {LIGNES_MAX_PLAGE} lignes : lire l'historique"
+            )
+        return {"champs": historique.CHAMPS_CSV, "lignes": lignes}
+
+
+def _periode_vide(depuis: Optional[float], jusqua: Optional[float]) -> bool:
+    return depuis is not None and jusqua is not None and jusqua < depuis
+
+
+def _interrompre(signum, frame):
+    raise KeyboardInterrupt
+
+
+def interroger(
+    fichier: str, requete: Dict[str, Any], delai: float = DELAI_REQUETE
+) -> Any:
+    """
+    Envoie une requête au démon d'un historique et retourne son résultat.
+
+    Args:
+        fichier (str): chemin de l'historique servi par le démon.
+        requete (dict): ex: {"requete": "stats", "depuis": 1700000000.0}
+        delai (float): délai maximal de la requête, en secondes.
+
+    Retourne:
+        résultat de la requête (voir le docstring du module).
+
+    Lève:
+        DemonIndisponible: pas de démon joignable, ou requête refusée.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(delai)
+            s.connect(chemin_socket(fichier))
+            s.sendall(json.dumps(requete).encode("utf-8") + b"\n")
+            with s.makefile("rb") as f:
+                reponse = json.loads(f.readline())
+    except (OSError, ValueError) as e:
+        raise DemonIndisponible(str(e)) from e
+
+    if not reponse.get("ok"):
+        raise DemonIndisponible(reponse.get("erreur", "réponse invalide"))
+    return reponse["resultat"]
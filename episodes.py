@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module episodes - détection en flux des épisodes de surcharge.
+
+Plutôt que de signaler chaque échantillon au-dessus d'un seuil, le
+détecteur suit, pour chaque hôte, un percentile glissant de la métrique sur
+les derniers échantillons. Un épisode commence quand ce signal dépasse le
+seuil d'entrée et se termine quand il repasse sous le seuil de sortie
+(hystérésis) : une pointe isolée ou une valeur qui oscille autour du seuil ne
+produit pas une rafale d'alertes. Seuls les épisodes d'une durée minimale
+sont retenus, un enregistrement par épisode (début, fin, max, moyenne).
+"""
+
+import bisect
+import math
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import historique
+
+# Paramètres par défaut : médiane glissante sur 5 échantillons, épisodes
+# d'au moins une minute.
+FENETRE_DEFAUT = 5
+RANG_DEFAUT = 50
+DUREE_MIN_DEFAUT = 60.0
+
+
+def _vers_epoch(timestamp) -> Optional[float]:
+    if isinstance(timestamp, (int, float)):
+        return None if math.isnan(timestamp) else float(timestamp)
+    try:
+        return historique.horodatage_vers_epoch(timestamp or "")
+    except ValueError:
+        return None
+
+
+def _percentile_trie(tries: List[float], rang: float) -> float:
+    """
+    Percentile d'une liste déjà triée (interpolation linéaire, comme
+    numpy.percentile).
+    """
+    position = (len(tries) - 1) * rang / 100
+    bas = int(position)
+    haut = min(bas + 1, len(tries) - 1)
+    return tries[bas] + (tries[haut] - tries[bas]) * (position - bas)
+
+
+class DetecteurEpisodes:
+    """
+    Détecteur d'épisodes pour une métrique, tous hôtes confondus.
+
+    Utilisation:
+        detecteur = DetecteurEpisodes("cpu", seuil_entree=80, seuil_sortie=70)
+        for ts, hote, cpu in echantillons:
+            detecteur.ajouter(ts, hote, cpu)
+        detecteur.resultats()   # épisodes terminés puis en cours
+    """
+
+    def __init__(
+        self,
+        metrique: str,
+        seuil_entree: float,
+        seuil_sortie: Optional[float] = None,
+        duree_min: float = DUREE_MIN_DEFAUT,
+        fenetre: int = FENETRE_DEFAUT,
+        rang: float = RANG_DEFAUT,
+    ):
+        """
+        Args:
+            metrique (str): nom de la métrique (repris dans les épisodes).
+            seuil_entree (float): un épisode commence quand le signal le dépasse.
+            seuil_sortie (float | None): l'épisode se termine quand le signal
+                repasse en dessous (défaut: seuil_entree, sans hystérésis).
+            duree_min (float): durée minimale (secondes) d'un épisode retenu.
+            fenetre (int): nombre d'échantillons du percentile glissant
+                (1 = valeur brute).
+            rang (float): percentile glissant utilisé comme signal (0-100).
+        """
+        if fenetre < 1:
+            raise ValueError("La fenêtre doit contenir au moins un échantillon.")
+        self.metrique = metrique
+        self.seuil_entree = seuil_entree
+        self.seuil_sortie = seuil_entree if seuil_sortie is None else seuil_sortie
+        if self.seuil_sortie > seuil_entree:
+            raise ValueError(
+                "Le seuil de sortie doit être inférieur au seuil d'entrée."
+            )
+        self.duree_min = duree_min
+        self.fenetre = fenetre
+        self.rang = rang
+
+        self.episodes = []
+        # hôte -> {'valeurs': deque, 'tries': list, 'episode': dict | None}
+        self._hotes = {}
+
+    def parametres(self) -> Dict[str, Any]:
+        """
+        Paramètres du détecteur (arguments du constructeur).
+        """
+        return {
+            "metrique": self.metrique,
+            "seuil_entree": self.seuil_entree,
+            "seuil_sortie": self.seuil_sortie,
+            "duree_min": self.duree_min,
+            "fenetre": self.fenetre,
+            "rang": self.rang,
+        }
+
+    def _etat_hote(self, hostname: str) -> Dict[str, Any]:
+        etat = self._hotes.get(hostname)
+        if etat is None:
+            etat = {"valeurs": deque(), "tries": [], "episode": None}
+            self._hotes[hostname] = etat
+        return etat
+
+    def ajouter(
+        self,
+        timestamp,
+        hostname: str,
+        valeur: float,
+        maximum: Optional[float] = None,
+        duree: float = 0.0,
+    ):
+        """
+        Intègre un échantillon (dans l'ordre chronologique pour chaque hôte).
+
+        Args:
+            timestamp (str | float): timestamp ISO, ou secondes depuis l'epoch.
+            hostname (str): nom d'hôte.
+            valeur (float): valeur de la métrique.
+            maximum (float | None): maximum si l'échantillon résume une
+                tranche (agrégats), sinon la valeur elle-même.
+            duree (float): durée couverte par l'échantillon (agrégats).
+        """
+        etat = self._etat_hote(hostname)
+        valeurs = etat["valeurs"]
+        tries = etat["tries"]
+
+        valeurs.append(valeur)
+        bisect.insort(tries, valeur)
+        if len(valeurs) > self.fenetre:
+            del tries[bisect.bisect_left(tries, valeurs.popleft())]
+        signal = _percentile_trie(tries, self.rang)
+
+        episode = etat["episode"]
+        if episode is None:
+            if signal <= self.seuil_entree:
+                return
+            debut = _vers_epoch(timestamp)
+            if debut is None:
+                return
+            episode = {
+                "debut": debut,
+                "fin": timestamp,
+                "duree": duree,
+                "max": valeur,
+                "somme": 0.0,
+                "nombre": 0,
+            }
+            etat["episode"] = episode
+        elif signal < self.seuil_sortie:
+            self._terminer(hostname, episode)
+            etat["episode"] = None
+            return
+
+        # Le timestamp de fin n'est converti qu'à la clôture de l'épisode
+        episode["fin"] = timestamp
+        episode["duree"] = duree
+        episode["max"] = max(episode["max"], valeur if maximum is None else maximum)
+        episode["somme"] += valeur
+        episode["nombre"] += 1
+
+    def _enregistrement(self, hostname: str, episode: Dict[str, Any]):
+        """
+        Enregistrement d'un épisode, ou None s'il est trop court.
+        """
+        fin = _vers_epoch(episode["fin"])
+        if fin is None:
+            return None
+        fin += episode["duree"]
+        if fin - episode["debut"] < self.duree_min:
+            return None
+        return {
+            "metrique": self.metrique,
+            "hostname": hostname,
+            "debut": historique.epoch_vers_horodatage(episode["debut"]),
+            "fin": historique.epoch_vers_horodatage(fin),
+            "duree": fin - episode["debut"],
+            "max": episode["max"],
+            "moyenne": episode["somme"] / episode["nombre"],
+            "nombre": episode["nombre"],
+        }
+
+    def _terminer(self, hostname: str, episode: Dict[str, Any]):
+        enregistrement = self._enregistrement(hostname, episode)
+        if enregistrement is not None:
+            self.episodes.append(enregistrement)
+
+    def en_cours(self) -> List[Dict[str, Any]]:
+        """
+        Épisodes pas encore terminés, s'ils durent déjà depuis duree_min.
+        """
+        resultats = []
+        for hostname, etat in self._hotes.items():
+            if etat["episode"] is not None:
+                enregistrement = self._enregistrement(hostname, etat["episode"])
+                if enregistrement is not None:
+                    enregistrement["en_cours"] = True
+                    resultats.append(enregistrement)
+        return resultats
+
+    def resultats(self) -> List[Dict[str, Any]]:
+        """
+        Retourne:
+            list[dict]: épisodes terminés puis en cours :
+                {
+                    'metrique', 'hostname', 'debut', 'fin' (str ISO),
+                    'duree' (s), 'max', 'moyenne', 'nombre',
+                    'en_cours' (uniquement pour un épisode non terminé)
+                }
+        """
+        return self.episodes + self.en_cours()
+
+    def etat(self) -> Dict[str, Any]:
+        """
+        Retourne l'état complet du détecteur, sérialisable en JSON.
+        """
+        return {
+            "parametres": self.parametres(),
+            "episodes": self.episodes,
+            "hotes": {
+                hostname: {
+                    "valeurs": list(etat["valeurs"]),
+                    "episode": etat["episode"],
+                }
+                for hostname, etat in self._hotes.items()
+            },
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat: Dict[str, Any]) -> "DetecteurEpisodes":
+        """
+        Reconstruit un détecteur à partir de etat().
+        """
+        detecteur = cls(**etat["parametres"])
+        detecteur.episodes = etat["episodes"]
+        for hostname, etat_hote in etat["hotes"].items():
+            valeurs = deque(etat_hote["valeurs"])
+            detecteur._hotes[hostname] = {
+                "valeurs": valeurs,
+                "tries": sorted(valeurs),
+                "episode": etat_hote["episode"],
+            }
+        return detecteur
@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module exporteurs - export des échantillons en arrière-plan.
+
+Chaque destination (CSV, stockage binaire, agrégats, JSON, protocole
+ligne, sortie standard, serveur d'agrégation) est un Exportateur
+enregistré dans EXPORTATEURS. Un Pipeline répartit chaque échantillon
+publié dans une file bornée par exportateur ; un thread par exportateur
+vide sa file par lots. La boucle de collecte ne fait qu'ajouter
+l'échantillon aux files : un disque lent ne retarde plus la collecte
+suivante.
+
+Quand une file est pleine, la politique choisie s'applique :
+    - "ancien"   : l'échantillon le plus ancien de la file est abandonné ;
+    - "bloquer"  : la publication attend qu'une place se libère ;
+    - "deborder" : l'échantillon est ajouté à un fichier de débordement
+                   (JSON lines), rejoué dans l'ordre quand la file se vide.
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+import agregats
+import historique
+import models
+import publication
+import serveur
+import statistiques
+import stockage_binaire
+import trames
+
+POLITIQUES = ("ancien", "bloquer", "deborder")
+
+CAPACITE_DEFAUT = 1000
+TAILLE_LOT_DEFAUT = 100
+
+# Fichiers de débordement : <préfixe>.<exportateur>.<pid>.jsonl (un par
+# processus : plusieurs syswatch peuvent tourner dans le même répertoire)
+PREFIXE_DEBORDEMENT = "syswatch_debordement"
+
+MESURE_LIGNE = "syswatch"
+
+
+# --- Exportateurs -------------------------------------------------------------
+
+
+class Exportateur:
+    """
+    Interface d'un exportateur.
+
+    exporter() reçoit des lots d'instantanés dans l'ordre chronologique,
+    toujours depuis le même thread ; fermer() est appelé depuis ce thread
+    après le dernier lot.
+    """
+
+    def exporter(self, lot: List[models.Snapshot]):
+        raise NotImplementedError
+
+    def fermer(self):
+        pass
+
+
+class ExportateurCsv(Exportateur):
+    """
+    Historique CSV (voir historique.EcrivainHistorique).
+    """
+
+    def __init__(self, fichier: str, **options):
+        """
+        Args:
+            fichier (str): chemin du CSV d'historique.
+            **options: options de EcrivainHistorique (rotation...).
+        """
+        self._ecrivain = historique.EcrivainHistorique(fichier, **options)
+
+    def exporter(self, lot: List[models.Snapshot]):
+        for instantane in lot:
+            self._ecrivain.ajouter(instantane)
+
+    def fermer(self):
+        self._ecrivain.fermer()
+
+
+class ExportateurBinaire(Exportateur):
+    """
+    Stockage en colonnes (voir stockage_binaire.EcrivainBinaire).
+    """
+
+    def __init__(self, repertoire: str):
+        self._ecrivain = stockage_binaire.EcrivainBinaire(repertoire)
+
+    def exporter(self, lot: List[models.Snapshot]):
+        for instantane in lot:
+            self._ecrivain.ajouter(instantane)
+
+    def fermer(self):
+        self._ecrivain.fermer()
+
+
+class ExportateurAgregats(Exportateur):
+    """
+    Niveaux d'agrégation 1m/1h/1d (voir agregats.GestionnaireAgregats).
+    """
+
+    def __init__(self, fichier: str, retention: Optional[Dict[str, Any]] = None):
+        self._niveaux = agregats.GestionnaireAgregats(fichier, retention)
+
+    def exporter(self, lot: List[models.Snapshot]):
+        for instantane in lot:
+            self._niveaux.ajouter(instantane)
+
+    def fermer(self):
+        self._niveaux.fermer()
+
+
+class ExportateurJson(Exportateur):
+    """
+    Dernier instantané complet, dans un fichier JSON remplacé de façon
+    atomique à chaque lot (seul le plus récent compte).
+    """
+
+    def __init__(self, fichier: str, indente: bool = False):
+        self.fichier = fichier
+        self.indente = indente
+
+    def exporter(self, lot: List[models.Snapshot]):
+        publication.publier_json(lot[-1], self.fichier, self.indente)
+
+
+class ExportateurEmplacement(Exportateur):
+    """
+    Dernier instantané dans un emplacement projeté en mémoire (voir
+    publication.EmplacementPartage).
+    """
+
+    def __init__(self, chemin: str):
+        self._emplacement = publication.EmplacementPartage(chemin, ecriture=True)
+
+    def exporter(self, lot: List[models.Snapshot]):
+        self._emplacement.ecrire(lot[-1])
+
+    def fermer(self):
+        self._emplacement.fermer()
+
+
+def _echapper_etiquette(texte: str) -> str:
+    for caractere in ("\\", ",", "=", " "):
+        texte = texte.replace(caractere, "\\" + caractere)
+    return texte
+
+
+def vers_protocole_ligne(
+    instantane: models.Snapshot, mesure: str = MESURE_LIGNE
+) -> List[str]:
+    """
+    Convertit un instantané au protocole ligne d'InfluxDB : une ligne pour
+    l'hôte, une par partition mesurée, une par disque et par interface
+    réseau dont le débit est connu (horodatage en nanosecondes).
+
+    Retourne:
+        list[str]: lignes sans retour à la ligne final.
+    """
+    try:
+        epoch = historique.horodatage_vers_epoch(instantane.timestamp)
+    except ValueError:
+        return []
+    ns = int(epoch * 1e9)
+    hote = _echapper_etiquette(instantane.hostname)
+    memoire = instantane.memoire
+
+    lignes = [
+        f"{mesure},hote={hote} "
+        f"cpu_percent={float(instantane.cpu.utilisation)},"
+        f"mem_total_gb={memoire.total_go},"
+        f"mem_dispo_gb={memoire.disponible_go},"
+        f"mem_percent={float(memoire.pourcentage)} {ns}"
+    ]
+    for disque in instantane.disques:
+        if disque.pourcentage is None:
+            continue
+        point = _echapper_etiquette(disque.point_montage)
+        lignes.append(
+            f"{mesure}_disque,hote={hote},point_montage={point} "
+            f"pourcentage={float(disque.pourcentage)} {ns}"
+        )
+    for d in instantane.io_disques:
+        if d.partition:
+            continue
+        lignes.append(
+            f"{mesure}_io_disque,hote={hote},"
+            f"peripherique={_echapper_etiquette(d.peripherique)} "
+            f"octets_lus={d.octets_lus},octets_ecrits={d.octets_ecrits},"
+            f"lectures={d.lectures},ecritures={d.ecritures} {ns}"
+        )
+    for i in instantane.io_reseau:
+        if i.boucle:
+            continue
+        lignes.append(
+            f"{mesure}_io_reseau,hote={hote},"
+            f"interface={_echapper_etiquette(i.interface)} "
+            f"octets_recus={i.octets_recus},octets_envoyes={i.octets_envoyes},"
+            f"paquets_recus={i.paquets_recus},"
+            f"paquets_envoyes={i.paquets_envoyes} {ns}"
+        )
+    return lignes
+
+
+class ExportateurLigne(Exportateur):
+    """
+    Protocole ligne d'InfluxDB, en ajout dans un fichier.
+    """
+
+    def __init__(self, fichier: str, mesure: str = MESURE_LIGNE):
+        self.mesure = mesure
+        self._f = open(fichier, mode="a", encoding="utf-8")
+
+    def exporter(self, lot: List[models.Snapshot]):
+        lignes = []
+        for instantane in lot:
+            lignes.extend(vers_protocole_ligne(instantane, self.mesure))
+        if lignes:
+            self._f.write("\n".join(lignes) + "\n")
+            self._f.flush()
+
+    def fermer(self):
+        self._f.close()
+
+
+class ExportateurSortie(Exportateur):
+    """
+    Une ligne JSON compacte par instantané sur la sortie standard.
+    """
+
+    def exporter(self, lot: List[models.Snapshot]):
+        sys.stdout.write(
+            "".join(
+                json.dumps(i.vers_dict(), separators=(",", ":"), ensure_ascii=False)
+                + "\n"
+                for i in lot
+            )
+        )
+        sys.stdout.flush()
+
+
+class ExportateurProcessus(Exportateur):
+    """
+    Journal des classements de processus (JSON lines), pour les
+    échantillons où la collecte par processus était active (voir
+    processus.lire_journal).
+    """
+
+    def __init__(self, fichier: str):
+        self._f = open(fichier, mode="a", encoding="utf-8")
+
+    def exporter(self, lot: List[models.Snapshot]):
+        lignes = [
+            json.dumps(
+                {
+                    "timestamp": i.timestamp,
+                    "hostname": i.hostname,
+                    "processus": [p.vers_dict() for p in i.processus],
+                },
+                separators=(",", ":"),
+                ensure_ascii=False,
+            )
+            + "\n"
+            for i in lot
+            if i.processus
+        ]
+        if lignes:
+            self._f.write("".join(lignes))
+            self._f.flush()
+
+    def fermer(self):
+        self._f.close()
+
+
+class ExportateurServeur(Exportateur):
+    """
+    Envoi des lots au serveur d'agrégation de la flotte (voir serveur), sur
+    une connexion persistante.
+
+    Serveur injoignable : le lot est perdu (compté dans les erreurs du
+    canal) et la reconnexion n'est retentée qu'après DELAI_RECONNEXION.
+    """
+
+    DELAI_RECONNEXION = 5.0
+
+    def __init__(
+        self, adresse: str = serveur.ADRESSE_DEFAUT, format_lots: str = "json"
+    ):
+        """
+        Args:
+            adresse (str): adresse du serveur (voir serveur.analyser_adresse).
+            format_lots (str): "json" (colonnes de l'historique) ou "trames"
+                (échantillons complets en binaire, voir trames).
+        """
+        serveur.analyser_adresse(adresse)
+        if format_lots not in serveur.FORMATS:
+            raise ValueError(f"Format inconnu : {format_lots}")
+        self.adresse = adresse
+        self.format_lots = format_lots
+        self._encodeur = trames.Encodeur()
+        self._socket = None
+        self._prochaine_tentative = 0.0
+
+    def _connecter(self):
+        maintenant = time.monotonic()
+        if maintenant < self._prochaine_tentative:
+            raise ConnectionError(f"Serveur {self.adresse} injoignable")
+        self._prochaine_tentative = maintenant + self.DELAI_RECONNEXION
+        self._socket = serveur.connecter(self.adresse)
+        self._socket.sendall(serveur.message_bonjour(self.format_lots))
+        # Nouvelle connexion : nouveau dictionnaire de chaînes
+        self._encodeur.reinitialiser()
+
+    def exporter(self, lot: List[models.Snapshot]):
+        try:
+            if self._socket is None:
+                self._connecter()
+            if self.format_lots == "trames":
+                self._socket.sendall(self._encodeur.encoder(lot))
+            else:
+                self._socket.sendall(serveur.messages_lot(lot))
+        except OSError:
+            self.fermer()
+            raise
+
+    def fermer(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+# nom -> classe (ou fabrique) d'exportateur
+EXPORTATEURS = {
+    "csv": ExportateurCsv,
+    "binaire": ExportateurBinaire,
+    "agregats": ExportateurAgregats,
+    "json": ExportateurJson,
+    "emplacement": ExportateurEmplacement,
+    "processus": ExportateurProcessus,
+    "ligne": ExportateurLigne,
+    "stdout": ExportateurSortie,
+    "serveur": ExportateurServeur,
+}
+
+
+def enregistrer(nom: str, fabrique):
+    """
+    Ajoute (ou remplace) un exportateur dans le registre.
+
+    Args:
+        nom (str): nom de l'exportateur.
+        fabrique: classe ou fonction retournant un Exportateur.
+    """
+    EXPORTATEURS[nom] = fabrique
+
+
+def creer(nom: str, **options) -> Exportateur:
+    """
+    Crée un exportateur du registre.
+
+    Args:
+        nom (str): clé de EXPORTATEURS.
+        **options: arguments de la fabrique.
+
+    Lève:
+        ValueError: exportateur inconnu.
+    """
+    fabrique = EXPORTATEURS.get(nom)
+    if fabrique is None:
+        raise ValueError(f"Exportateur inconnu : {nom}")
+    return fabrique(**options)
+
+
+# --- Files et threads ---------------------------------------------------------
+
+
+def _duree_ms(stats: statistiques.StatistiqueFlux) -> Dict[str, Any]:
+    return {"moyenne": stats.moyenne, "max": stats.max}
+
+
+class CanalExport:
+    """
+    File bornée d'un exportateur et son thread de vidage.
+
+    Les éléments sont des couples (heure de publication, instantané) ; les
+    métriques (lots, durées, latences, pertes) sont mises à jour sous le
+    verrou de la file.
+    """
+
+    def __init__(
+        self,
+        nom: str,
+        exportateur: Exportateur,
+        capacite: int = CAPACITE_DEFAUT,
+        politique: str = "ancien",
+        taille_lot: int = TAILLE_LOT_DEFAUT,
+        debordement: str = PREFIXE_DEBORDEMENT,
+    ):
+        """
+        Args:
+            nom (str): nom de l'exportateur (métriques, fichier de
+                débordement, nom du thread).
+            exportateur (Exportateur): destination des lots.
+            capacite (int): nombre maximal d'échantillons en attente.
+            politique (str): une valeur de POLITIQUES.
+            taille_lot (int): nombre maximal d'échantillons par lot.
+            debordement (str): préfixe du fichier de débordement.
+        """
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue : {politique}")
+        if capacite < 1 or taille_lot < 1:
+            raise ValueError("La capacité et la taille de lot doivent être >= 1.")
+        self.nom = nom
+        self.exportateur = exportateur
+        self.capacite = capacite
+        self.politique = politique
+        self.taille_lot = taille_lot
+        self._base_debordement = f"{debordement}.{nom}"
+        self.chemin_debordement = f"{self._base_debordement}.{os.getpid()}.jsonl"
+
+        self._file = deque()
+        self._condition = threading.Condition()
+        self._ferme = False
+        # Débordement en attente de rejeu (fichier ouvert tant qu'il y en a)
+        self._f_debordement = None
+        self._en_debordement = 0
+
+        self.exportes = 0
+        self.lots = 0
+        self.abandonnes = 0
+        self.debordes = 0
+        self.erreurs = 0
+        self.derniere_erreur = None
+        self.duree_lot = statistiques.StatistiqueFlux()
+        self.latence = statistiques.StatistiqueFlux()
+        self.quantiles_latence = statistiques.EsquisseQuantiles()
+
+        # Débordement laissé par un processus précédent de même pid
+        if os.path.exists(self.chemin_debordement):
+            self._en_debordement = 1
+
+        self._thread = threading.Thread(
+            target=self._boucle, name=f"syswatch-export-{nom}", daemon=True
+        )
+        self._thread.start()
+
+    # --- Côté collecte --------------------------------------------------------
+
+    def mettre(self, publie: float, instantane: models.Snapshot):
+        """
+        Ajoute un échantillon à la file selon la politique.
+        """
+        with self._condition:
+            if self._ferme:
+                return
+            if self.politique == "deborder" and (
+                self._en_debordement or len(self._file) >= self.capacite
+            ):
+                # Tant qu'un débordement attend, tout y va : l'ordre est gardé
+                self._deborder(publie, instantane)
+                return
+            if len(self._file) >= self.capacite:
+                if self.politique == "ancien":
+                    self._file.popleft()
+                    self.abandonnes += 1
+                else:
+                    while len(self._file) >= self.capacite and not self._ferme:
+                        self._condition.wait()
+                    if self._ferme:
+                        return
+            self._file.append((publie, instantane))
+            self._condition.notify_all()
+
+    def _deborder(self, publie: float, instantane: models.Snapshot):
+        if self._f_debordement is None:
+            self._f_debordement = open(
+                self.chemin_debordement, mode="a", encoding="utf-8"
+            )
+        self._f_debordement.write(
+            json.dumps(
+                {"publie": publie, "instantane": instantane.vers_dict()},
+                separators=(",", ":"),
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        self._f_debordement.flush()
+        self._en_debordement += 1
+        self.debordes += 1
+        self._condition.notify_all()
+
+    # --- Côté export ----------------------------------------------------------
+
+    def _boucle(self):
+        try:
+            # Débordements et rejeux laissés par des processus arrêtés
+            # brutalement : leurs éléments sont les plus anciens (certains
+            # ont pu être exportés deux fois).
+            for orphelin in self._reclamer_orphelins():
+                self._rejouer(orphelin)
+            if os.path.exists(self.chemin_debordement + ".rejeu"):
+                self._rejouer(self.chemin_debordement + ".rejeu")
+            while True:
+                lot, debordement = self._prendre()
+                if debordement is not None:
+                    self._rejouer(debordement)
+                elif lot:
+                    self._exporter(lot)
+                else:
+                    break
+        finally:
+            try:
+                self.exportateur.fermer()
+            except OSError as e:
+                self._erreur(e)
+
+    def _reclamer_orphelins(self) -> List[str]:
+        """
+        Prend possession des fichiers de débordement dont le processus
+        n'existe plus, en les renommant (une seule réclamation réussit si
+        plusieurs processus démarrent en même temps).
+
+        Retourne:
+            list: fichiers à rejouer, du plus ancien au plus récent.
+        """
+        candidats = []
+        for chemin in glob.glob(glob.escape(self._base_debordement) + ".*"):
+            reste = chemin[len(self._base_debordement) + 1 :]
+            pid = reste.split(".", 1)[0]
+            # Sans pid : fichier d'une version précédente
+            if pid.isdigit() and (
+                int(pid) == os.getpid() or psutil.pid_exists(int(pid))
+            ):
+                continue
+            try:
+                candidats.append((os.path.getmtime(chemin), chemin))
+            except OSError:
+                continue
+        reclames = []
+        for numero, (_, chemin) in enumerate(sorted(candidats)):
+            cible = f"{self.chemin_debordement}.{numero}.rejeu"
+            try:
+                os.replace(chemin, cible)
+            except FileNotFoundError:
+                # Réclamé par un autre processus
+                continue
+            reclames.append(cible)
+        return reclames
+
+    def _prendre(self):
+        """
+        Attend du travail : (lot, None), (None, fichier de débordement à
+        rejouer), ou (None, None) une fois fermé et vidé.
+        """
+        with self._condition:
+            while True:
+                while not self._file and not self._en_debordement and not self._ferme:
+                    self._condition.wait()
+                if self._file:
+                    # Lot adaptatif : tout ce qui s'est accumulé pendant
+                    # l'export précédent, dans la limite de taille_lot.
+                    nombre = min(self.taille_lot, len(self._file))
+                    lot = [self._file.popleft() for _ in range(nombre)]
+                    self._condition.notify_all()
+                    return lot, None
+                if not self._en_debordement:
+                    return None, None
+                # La file mémoire est vide : les éléments débordés sont
+                # maintenant les plus anciens.
+                if self._f_debordement is not None:
+                    self._f_debordement.close()
+                    self._f_debordement = None
+                self._en_debordement = 0
+                rejeu = self.chemin_debordement + ".rejeu"
+                try:
+                    os.replace(self.chemin_debordement, rejeu)
+                except FileNotFoundError:
+                    # Fichier disparu (supprimé à la main) : rien à rejouer,
+                    # on continue d'attendre
+                    continue
+                return None, rejeu
+
+    def _rejouer(self, chemin: str):
+        lot = []
+        with open(chemin, encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    element = json.loads(ligne)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    continue
+                lot.append(
+                    (
+                        element["publie"],
+                        models.Snapshot.depuis_dict(element["instantane"]),
+                    )
+                )
+                if len(lot) >= self.taille_lot:
+                    self._exporter(lot)
+                    lot = []
+        if lot:
+            self._exporter(lot)
+        os.remove(chemin)
+
+    def _exporter(self, lot: list):
+        debut = time.perf_counter()
+        try:
+            self.exportateur.exporter([instantane for _, instantane in lot])
+        except Exception as e:
+            # Un exportateur défaillant ne doit pas arrêter son thread
+            with self._condition:
+                self._erreur(e)
+            return
+        fin = time.perf_counter()
+        maintenant = time.time()
+        with self._condition:
+            self.lots += 1
+            self.exportes += len(lot)
+            self.duree_lot.ajouter((fin - debut) * 1000)
+            for publie, _ in lot:
+                latence = (maintenant - publie) * 1000
+                self.latence.ajouter(latence)
+                self.quantiles_latence.ajouter(latence)
+
+    def _erreur(self, erreur: Exception):
+        self.erreurs += 1
+        self.derniere_erreur = f"{type(erreur).__name__}: {erreur}"
+
+    # --- Arrêt et métriques ---------------------------------------------------
+
+    def fermer(self, delai: Optional[float] = None) -> bool:
+        """
+        Exporte ce qui reste en attente puis ferme l'exportateur.
+
+        Args:
+            delai (float | None): attente maximale (secondes), None = infinie.
+
+        Retourne:
+            bool: True si le thread s'est terminé dans le délai.
+        """
+        self._arreter()
+        self._thread.join(delai)
+        return not self._thread.is_alive()
+
+    def _arreter(self):
+        with self._condition:
+            self._ferme = True
+            self._condition.notify_all()
+
+    def statistiques(self) -> Dict[str, Any]:
+        """
+        Retourne:
+            dict: {
+                'nom', 'politique', 'en_attente', 'exportes', 'lots',
+                'abandonnes', 'debordes', 'erreurs', 'derniere_erreur',
+                'duree_lot_ms': {'moyenne', 'max'},
+                'latence_ms': {'moyenne', 'max', 'p50', 'p99'}
+            }
+            La latence va de la publication à la fin de l'export.
+        """
+        with self._condition:
+            quantiles = self.quantiles_latence.quantiles((50, 99))
+            return {
+                "nom": self.nom,
+                "politique": self.politique,
+                "en_attente": len(self._file) + self._en_debordement,
+                "exportes": self.exportes,
+                "lots": self.lots,
+                "abandonnes": self.abandonnes,
+                "debordes": self.debordes,
+                "erreurs": self.erreurs,
+                "derniere_erreur": self.derniere_erreur,
+                "duree_lot_ms": _duree_ms(self.duree_lot),
+                "latence_ms": dict(
+                    _duree_ms(self.latence), p50=quantiles[50], p99=quantiles[99]
+                ),
+            }
+
+
+class Pipeline:
+    """
+    Répartit chaque échantillon publié entre plusieurs exportateurs.
+
+    Utilisation:
+        with Pipeline({"csv": creer("csv", fichier="h.csv")}) as pipeline:
+            for _ in ordo:
+                pipeline.publier(collecter_instantane())
+        pipeline.statistiques()
+    """
+
+    def __init__(
+        self,
+        exportateurs: Dict[str, Exportateur],
+        capacite: int = CAPACITE_DEFAUT,
+        politique: str = "ancien",
+        taille_lot: int = TAILLE_LOT_DEFAUT,
+        debordement: str = PREFIXE_DEBORDEMENT,
+    ):
+        """
+        Args:
+            exportateurs (dict): nom -> Exportateur.
+            capacite (int): taille maximale de la file de chaque exportateur.
+            politique (str): une valeur de POLITIQUES.
+            taille_lot (int): nombre maximal d'échantillons par lot.
+            debordement (str): préfixe des fichiers de débordement.
+        """
+        self.canaux = [
+            CanalExport(nom, exportateur, capacite, politique, taille_lot, debordement)
+            for nom, exportateur in exportateurs.items()
+        ]
+
+    def publier(self, instantane: models.Snapshot):
+        """
+        Met un échantillon dans la file de chaque exportateur (sans attendre,
+        sauf politique "bloquer" avec une file pleine).
+        """
+        publie = time.time()
+        for canal in self.canaux:
+            canal.mettre(publie, instantane)
+
+    def fermer(self, delai: Optional[float] = None) -> List[str]:
+        """
+        Vide les files et ferme les exportateurs.
+
+        Args:
+            delai (float | None): attente maximale par exportateur.
+
+        Retourne:
+            list[str]: exportateurs qui n'ont pas terminé dans le délai.
+        """
+        # Tous les threads vident leur file en parallèle
+        for canal in self.canaux:
+            canal._arreter()
+        return [canal.nom for canal in self.canaux if not canal.fermer(delai)]
+
+    def statistiques(self) -> List[Dict[str, Any]]:
+        """
+        Métriques de chaque exportateur (voir CanalExport.statistiques).
+        """
+        return [canal.statistiques() for canal in self.canaux]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
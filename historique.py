@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module historique - écriture du fichier CSV d'historique de SysWatch.
+
+Le fichier actif (syswatch_history.csv) peut être tourné par taille ou par
+durée : il est alors renommé en segment fermé portant ses bornes de temps,
+par ex. syswatch_history.1763560000-1763646400.csv (suivi de .1, .2...
+avant l'extension si un segment de mêmes bornes existe déjà), puis
+éventuellement compressé en arrière-plan (.csv.gz, .csv.xz ou .csv.zst).
+iterer_lignes() relit de façon transparente tous les segments puis le
+fichier actif.
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import index_historique
+import models
+
+try:
+    # Module standard à partir de Python 3.14
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+# Extension des segments compressés et fonction d'ouverture associée.
+COMPRESSIONS = {
+    "gzip": (".gz", gzip.open),
+    "bz2": (".bz2", bz2.open),
+    "lzma": (".xz", lzma.open),
+}
+if zstd is not None:
+    COMPRESSIONS["zstd"] = (".zst", zstd.open)
+
+CHAMPS_CSV = [
+    "timestamp",
+    "hostname",
+    "cpu_percent",
+    "mem_total_gb",
+    "mem_dispo_gb",
+    "mem_percent",
+    "disk_root_percent",
+] + models.CHAMPS_IO
+
+
+def horodatage_vers_epoch(timestamp: str) -> float:
+    """
+    Convertit un timestamp ISO de l'historique en secondes depuis l'epoch.
+
+    Args:
+        timestamp (str): ex: "2025-11-19T10:23:45.123456" (heure locale)
+
+    Retourne:
+        float: secondes depuis l'epoch.
+    """
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def epoch_vers_horodatage(epoch: float) -> str:
+    """
+    Convertit des secondes depuis l'epoch en timestamp ISO (heure locale).
+
+    Args:
+        epoch (float): secondes depuis l'epoch.
+
+    Retourne:
+        str: ex: "2025-11-19T10:23:45.123456"
+    """
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+def metriques_vers_ligne(metriques) -> Dict[str, Any]:
+    """
+    Convertit des métriques en ligne CSV.
+
+    Args:
+        metriques (models.Snapshot | dict): instantané retourné par
+            collecter_instantane(), ou dictionnaire de collecter_tout()
+
+    Retourne:
+        dict: ligne indexée par les noms de CHAMPS_CSV.
+    """
+    if isinstance(metriques, models.Snapshot):
+        return metriques.vers_ligne()
+
+    systeme = metriques.get("systeme", {})
+    cpu = metriques.get("cpu", {})
+    mem = metriques.get("memoire", {})
+    disques = metriques.get("disques", [])
+
+    # On cherche la partition root "/"
+    disk_root_percent = ""
+    for d in disques:
+        if d.get("point_montage") == "/":
+            disk_root_percent = d.get("pourcentage", "")
+            break
+
+    ligne = {
+        "timestamp": metriques.get("timestamp", ""),
+        "hostname": systeme.get("hostname", ""),
+        "cpu_percent": cpu.get("utilisation", 0.0),
+        "mem_total_gb": mem.get("total", 0) / (1024 ** 3),
+        "mem_dispo_gb": mem.get("disponible", 0) / (1024 ** 3),
+        "mem_percent": mem.get("pourcentage", 0.0),
+        "disk_root_percent": disk_root_percent,
+    }
+    io_disques = metriques.get("io_disques", [])
+    io_reseau = metriques.get("io_reseau", [])
+    ligne.update(
+        models.totaux_io(
+            [models.DiskIOSample.depuis_dict(d) for d in io_disques],
+            [models.NetIOSample.depuis_dict(i) for i in io_reseau],
+        )
+    )
+    return ligne
+
+
+class EcrivainHistorique:
+    """
+    Écrivain CSV longue durée pour le fichier d'historique.
+
+    Le fichier reste ouvert et les lignes sont accumulées en mémoire, puis
+    écrites et synchronisées sur disque (fsync) dès que l'une des conditions
+    est atteinte : nombre de lignes, délai depuis la dernière écriture, ou
+    fermeture. En cas de crash, on perd au plus une fenêtre de vidage.
+
+    L'index temporel (voir index_historique) est mis à jour après chaque
+    vidage, en ne relisant que les lignes qui viennent d'être écrites.
+
+    Avec taille_max ou duree_max, le fichier actif est tourné en segment
+    fermé (voir faire_tourner) dès qu'il dépasse l'une des limites, ainsi
+    qu'à l'ouverture si son en-tête date d'une version précédente.
+
+    Utilisation:
+        with EcrivainHistorique("syswatch_history.csv") as ecrivain:
+            ecrivain.ajouter(metriques)
+    """
+
+    def __init__(
+        self,
+        fichier: str,
+        lignes_max: int = 100,
+        delai_max: float = 5.0,
+        indexer: bool = True,
+        taille_max: Optional[int] = None,
+        duree_max: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        """
+        Args:
+            fichier (str): chemin du fichier CSV.
+            lignes_max (int): nombre de lignes en attente déclenchant un vidage.
+            delai_max (float): secondes maximum entre deux vidages.
+            indexer (bool): maintient l'index temporel du fichier.
+            taille_max (int | None): taille (octets) déclenchant une rotation.
+            duree_max (float | None): âge (secondes) du premier échantillon
+                du fichier actif déclenchant une rotation.
+            compression (str | None): compression des segments fermés
+                (une clé de COMPRESSIONS), None = aucune.
+        """
+        self.fichier = fichier
+        self.lignes_max = lignes_max
+        self.delai_max = delai_max
+        self.indexer = indexer
+        self.taille_max = taille_max
+        self.duree_max = duree_max
+        self.compression = compression
+
+        self._tampon = io.StringIO()
+        self._writer = csv.DictWriter(self._tampon, fieldnames=CHAMPS_CSV)
+        self._en_attente = 0
+        self._dernier_vidage = time.monotonic()
+
+        self._ouvrir()
+
+    def _ouvrir(self):
+        self._index = None
+        fermer_si_entete_perime(self.fichier, self.compression)
+        self._f = open(self.fichier, mode="a", encoding="utf-8", newline="")
+        if self._f.tell() == 0:
+            self._writer.writeheader()
+            self._vider_tampon()
+
+        self._debut_segment = None
+        if self.duree_max is not None:
+            bornes = bornes_fichier(self.fichier)
+            self._debut_segment = bornes[0] if bornes else None
+
+        if self.indexer:
+            self._index = index_historique.IndexHistorique(self.fichier)
+            self._index.rattraper()
+
+    def ajouter(self, metriques):
+        """
+        Ajoute un échantillon au tampon, et vide si nécessaire.
+
+        Args:
+            metriques (models.Snapshot | dict): instantané retourné par
+                collecter_instantane(), ou dictionnaire de collecter_tout()
+        """
+        ligne = metriques_vers_ligne(metriques)
+        self._writer.writerow(ligne)
+        self._en_attente += 1
+
+        if self.duree_max is not None and self._debut_segment is None:
+            try:
+                self._debut_segment = horodatage_vers_epoch(ligne["timestamp"])
+            except ValueError:
+                pass
+
+        if (
+            self._en_attente >= self.lignes_max
+            or time.monotonic() - self._dernier_vidage >= self.delai_max
+        ):
+            self.vider()
+
+    def vider(self):
+        """
+        Écrit les lignes en attente et les synchronise sur disque, puis
+        tourne le fichier si une limite est atteinte.
+        """
+        if self._en_attente:
+            self._vider_tampon()
+        self._dernier_vidage = time.monotonic()
+
+        if self._rotation_necessaire():
+            self._f.close()
+            faire_tourner(self.fichier, self.compression)
+            self._ouvrir()
+
+    def _rotation_necessaire(self) -> bool:
+        if self.taille_max is not None and self._f.tell() >= self.taille_max:
+            return True
+        return (
+            self.duree_max is not None
+            and self._debut_segment is not None
+            and time.time() - self._debut_segment >= self.duree_max
+        )
+
+    def _vider_tampon(self):
+        self._f.write(self._tampon.getvalue())
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._tampon.seek(0)
+        self._tampon.truncate()
+        self._en_attente = 0
+        if self._index is not None:
+            self._index.rattraper()
+
+    def fermer(self):
+        """
+        Vide les lignes en attente et ferme le fichier.
+        """
+        if self._f.closed:
+            return
+        try:
+            self.vider()
+        finally:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+
+# --- Segments ---------------------------------------------------------------
+
+
+def _motif_segment(fichier: str):
+    base, extension = os.path.splitext(os.path.basename(fichier))
+    suffixes = "|".join(re.escape(ext) for ext, _ in COMPRESSIONS.values())
+    return re.compile(
+        rf"^{re.escape(base)}\.(\d+)-(\d+)(?:\.(\d+))?"
+        rf"{re.escape(extension)}({suffixes})?$"
+    )
+
+
+def _renommer_sans_ecraser(source: str, destination: str):
+    """
+    Renomme source en destination sans jamais remplacer un fichier existant.
+
+    Lève:
+        FileExistsError: destination existe déjà.
+    """
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Liens physiques non pris en charge (système de fichiers)
+        if os.path.exists(destination):
+            raise FileExistsError(destination)
+        os.replace(source, destination)
+        return
+    os.unlink(source)
+
+
+def _segment_existe(segment: str) -> bool:
+    """
+    Vrai si le segment existe, compressé ou non.
+    """
+    extensions = [""] + [ext for ext, _ in COMPRESSIONS.values()]
+    return any(os.path.exists(segment + ext) for ext in extensions)
+
+
+def bornes_fichier(chemin: str) -> Optional[Tuple[float, float]]:
+    """
+    Lit les timestamps de la première et de la dernière ligne d'un CSV non
+    compressé, sans parcourir le fichier.
+
+    Retourne:
+        tuple | None: (premier, dernier) en secondes depuis l'epoch, ou None
+        si le fichier ne contient aucune ligne datée.
+    """
+    try:
+        with open(chemin, mode="rb") as f:
+            entete = f.readline()
+            premiere = f.readline()
+            taille = os.fstat(f.fileno()).st_size
+            f.seek(max(len(entete), taille - 4096))
+            fin = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+
+    champs = next(csv.reader([entete.decode("utf-8")]), [])
+    if "timestamp" not in champs or not premiere.strip():
+        return None
+    position = champs.index("timestamp")
+
+    def epoch(brut: bytes) -> Optional[float]:
+        try:
+            valeurs = next(csv.reader([brut.decode("utf-8")]))
+            return horodatage_vers_epoch(valeurs[position])
+        except (ValueError, IndexError, StopIteration, UnicodeDecodeError):
+            return None
+
+    debut = epoch(premiere)
+    dernier = None
+    for brut in reversed(fin):
+        dernier = epoch(brut)
+        if dernier is not None:
+            break
+    if debut is None or dernier is None:
+        return None
+    return debut, dernier
+
+
+def faire_tourner(fichier: str, compression: Optional[str] = None) -> Optional[str]:
+    """
+    Ferme le segment actif : le fichier est renommé avec ses bornes de temps
+    puis, si demandé, compressé dans un thread d'arrière-plan.
+
+    Args:
+        fichier (str): chemin du fichier CSV actif.
+        compression (str | None): une clé de COMPRESSIONS, None = aucune.
+
+    Retourne:
+        str | None: chemin du segment créé (avant compression), None si le
+        fichier ne contenait aucune ligne.
+    """
+    bornes = bornes_fichier(fichier)
+    if bornes is None:
+        return None
+
+    base, extension = os.path.splitext(fichier)
+    nom = f"{base}.{int(bornes[0])}-{int(bornes[1]) + 1}"
+    numero = 0
+    while True:
+        # Bornes déjà prises (rotations rapprochées, horloge recalée) : le
+        # segment existant n'est jamais écrasé
+        segment = f"{nom}.{numero}{extension}" if numero else f"{nom}{extension}"
+        if not _segment_existe(segment):
+            try:
+                _renommer_sans_ecraser(fichier, segment)
+                break
+            except FileExistsError:
+                pass
+        numero += 1
+    try:
+        os.remove(index_historique.chemin_index(fichier))
+    except FileNotFoundError:
+        pass
+
+    if compression is not None:
+        thread = threading.Thread(
+            target=compresser_segment,
+            args=(segment, compression),
+            name="syswatch-compression",
+        )
+        thread.start()
+    return segment
+
+
+def fermer_si_entete_perime(
+    fichier: str, compression: Optional[str] = None
+) -> Optional[str]:
+    """
+    Ferme le fichier actif si son en-tête n'est pas CHAMPS_CSV (fichier
+    écrit par une version précédente) : les nouvelles lignes partent dans
+    un fichier neuf, l'ancien reste lisible en segment fermé.
+
+    Args:
+        fichier (str): chemin du fichier CSV actif.
+        compression (str | None): une clé de COMPRESSIONS, None = aucune.
+
+    Retourne:
+        str | None: chemin du segment créé, None si rien n'a été tourné.
+    """
+    try:
+        with open(fichier, mode="r", encoding="utf-8", newline="") as f:
+            entete = next(csv.reader([f.readline()]), [])
+    except FileNotFoundError:
+        return None
+    if not entete or entete == CHAMPS_CSV:
+        return None
+    segment = faire_tourner(fichier, compression)
+    if segment is None:
+        # En-tête seul, sans ligne : rien à conserver
+        os.remove(fichier)
+        try:
+            os.remove(index_historique.chemin_index(fichier))
+        except FileNotFoundError:
+            pass
+    return segment
+
+
+def compresser_segment(segment: str, compression: str) -> str:
+    """
+    Compresse un segment fermé et supprime la version non compressée.
+
+    Args:
+        segment (str): chemin du segment non compressé.
+        compression (str): une clé de COMPRESSIONS.
+
+    Retourne:
+        str: chemin du segment compressé, ou du segment non compressé
+        (conservé) si la destination existe déjà.
+    """
+    extension, ouvrir = COMPRESSIONS[compression]
+    destination = segment + extension
+    temporaire = destination + ".tmp"
+    with open(segment, mode="rb") as src, ouvrir(temporaire, mode="wb") as dst:
+        while True:
+            bloc = src.read(1024 * 1024)
+            if not bloc:
+                break
+            dst.write(bloc)
+    try:
+        _renommer_sans_ecraser(temporaire, destination)
+    except FileExistsError:
+        os.remove(temporaire)
+        return segment
+    os.remove(segment)
+    return destination
+
+
+def lister_segments(fichier: str) -> List[Tuple[str, float, float]]:
+    """
+    Liste les segments fermés d'un historique, du plus ancien au plus récent.
+
+    Si un segment existe à la fois compressé et non compressé (compression
+    en cours), seule la version non compressée est retenue.
+
+    Retourne:
+        list[tuple]: (chemin, début, fin) en secondes depuis l'epoch.
+    """
+    repertoire = os.path.dirname(fichier) or "."
+    motif = _motif_segment(fichier)
+
+    trouves = {}
+    try:
+        noms = os.listdir(repertoire)
+    except FileNotFoundError:
+        return []
+    for nom in noms:
+        m = motif.match(nom)
+        if m is None:
+            continue
+        cle = (int(m.group(1)), int(m.group(2)), int(m.group(3) or 0))
+        compresse = m.group(4) is not None
+        if cle not in trouves or (trouves[cle][1] and not compresse):
+            trouves[cle] = (os.path.join(repertoire, nom), compresse)
+
+    return [
+        (chemin, debut, fin)
+        for (debut, fin, _), (chemin, _) in sorted(trouves.items())
+    ]
+
+
+def ouvrir_segment(chemin: str, binaire: bool = False):
+    """
+    Ouvre un segment (compressé ou non) en lecture texte, ou en lecture
+    binaire du contenu décompressé si binaire=True.
+    """
+    for extension, ouvrir in COMPRESSIONS.values():
+        if chemin.endswith(extension):
+            if binaire:
+                return ouvrir(chemin, mode="rb")
+            return ouvrir(chemin, mode="rt", encoding="utf-8", newline="")
+    if binaire:
+        return open(chemin, mode="rb")
+    return open(chemin, mode="r", encoding="utf-8", newline="")
+
+
+def iterer_segments(
+    fichier: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Parcourt en flux les lignes des segments fermés, du plus ancien au plus
+    récent, compressés ou non.
+
+    Les segments dont les bornes (lues dans leur nom) sont hors de la
+    période demandée ne sont pas ouverts. Les lignes des segments retenus
+    sont toutes retournées : le filtrage fin reste à la charge de l'appelant
+    (voir index_historique.ligne_retenue).
+
+    Args:
+        fichier (str): chemin du fichier CSV actif.
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+
+    Retourne:
+        Iterator[dict]: lignes au format csv.DictReader.
+    """
+    for chemin, debut, fin in lister_segments(fichier):
+        if depuis is not None and fin < depuis:
+            continue
+        if jusqua is not None and debut > jusqua:
+            continue
+
+        if not os.path.exists(chemin):
+            # Compressé depuis le listage : on lit la version compressée
+            for extension, _ in COMPRESSIONS.values():
+                if os.path.exists(chemin + extension):
+                    chemin += extension
+                    break
+        try:
+            with ouvrir_segment(chemin) as f:
+                yield from csv.DictReader(f)
+        except FileNotFoundError:
+            continue
+
+
+def iterer_lignes(
+    fichier: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Parcourt en flux les lignes de tous les segments puis du fichier actif.
+
+    Args:
+        fichier (str): chemin du fichier CSV actif.
+        depuis (float | None): borne basse pour le choix des segments.
+        jusqua (float | None): borne haute pour le choix des segments.
+
+    Retourne:
+        Iterator[dict]: lignes au format csv.DictReader.
+    """
+    yield from iterer_segments(fichier, depuis, jusqua)
+
+    try:
+        with open(fichier, mode="r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    except FileNotFoundError:
+        return
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module index_historique - index temporel clairsemé du CSV d'historique.
+
+L'index découpe le fichier en blocs contigus (un par tranche de temps) et
+mémorise pour chacun sa position en octets, ses timestamps extrêmes et les
+hôtes présents. Une requête "dernière heure sur l'hôte X" ne lit alors que
+les quelques blocs concernés au lieu de tout le fichier.
+
+L'index est un fichier JSON Lines en ajout seul, à côté du CSV
+(syswatch_history.csv.idx) : une ligne d'en-tête, puis une ligne par bloc
+terminé. Le bloc en cours n'est pas écrit ; il est reconstruit en relisant
+la fin du fichier. Un index absent, d'un autre format ou ne correspondant
+plus au fichier (tronqué, remplacé) est reconstruit automatiquement.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Any, Iterator, List, Optional
+
+import historique
+
+VERSION_INDEX = 1
+
+# Durée d'une tranche de temps (secondes) et taille maximale d'un bloc.
+DUREE_BLOC = 300
+TAILLE_MAX_BLOC = 1024 * 1024
+
+# Nombre d'octets du début du fichier servant à reconnaître le fichier indexé.
+TAILLE_SIGNATURE = 4096
+
+
+def chemin_index(fichier_csv: str) -> str:
+    """
+    Retourne le chemin du fichier d'index associé à un CSV.
+    """
+    return fichier_csv + ".idx"
+
+
+def _signature(f, taille: int) -> str:
+    """
+    Empreinte des `taille` premiers octets du fichier.
+    """
+    f.seek(0)
+    return hashlib.sha1(f.read(taille)).hexdigest()
+
+
+class IndexHistorique:
+    """
+    Index temporel et par hôte d'un CSV d'historique.
+
+    Utilisation:
+        index = IndexHistorique("syswatch_history.csv")
+        index.rattraper()            # indexe les lignes ajoutées
+        for row in index.lire(depuis=t0, hote="srv1"):
+            ...
+    """
+
+    def __init__(self, fichier_csv: str, duree_bloc: int = DUREE_BLOC):
+        """
+        Args:
+            fichier_csv (str): chemin du fichier CSV d'historique.
+            duree_bloc (int): durée d'une tranche de temps, en secondes.
+        """
+        self.fichier = fichier_csv
+        self.chemin = chemin_index(fichier_csv)
+        self.duree_bloc = duree_bloc
+
+        self.entete = None
+        self.champs = []
+        self.blocs = []
+        self._courant = None
+        self._position = 0
+        self._taille_idx = 0
+
+        self._charger()
+
+    # --- Chargement et validation ------------------------------------------
+
+    def _charger(self):
+        """
+        Charge l'index existant, ou le remet à zéro s'il est invalide.
+        """
+        try:
+            with open(self.chemin, mode="rb") as f:
+                meta = json.loads(f.readline() or b"{}")
+                blocs = [json.loads(ligne) for ligne in f if ligne.strip()]
+                taille_idx = f.tell()
+        except (FileNotFoundError, ValueError):
+            self._reinitialiser()
+            return
+
+        if (
+            meta.get("version") != VERSION_INDEX
+            or meta.get("duree_bloc") != self.duree_bloc
+            or not self._correspond(meta, blocs)
+        ):
+            self._reinitialiser()
+            return
+
+        self.entete = meta["entete"]
+        self.champs = next(csv.reader([self.entete]))
+        self.blocs = blocs
+        self._position = blocs[-1]["fin"] if blocs else meta["debut_donnees"]
+        self._taille_idx = taille_idx
+
+    def _correspond(self, meta: Dict[str, Any], blocs: List[Dict[str, Any]]) -> bool:
+        """
+        Vérifie que l'index décrit bien le fichier actuel (ni tronqué, ni
+        remplacé par un autre fichier).
+        """
+        try:
+            with open(self.fichier, mode="rb") as f:
+                taille = os.fstat(f.fileno()).st_size
+                if blocs and blocs[-1]["fin"] > taille:
+                    return False
+                octets_signes = meta.get("octets_signes", 0)
+                if octets_signes > taille:
+                    return False
+                return _signature(f, octets_signes) == meta.get("signature")
+        except FileNotFoundError:
+            return False
+
+    def _reinitialiser(self):
+        self.entete = None
+        self.champs = []
+        self.blocs = []
+        self._courant = None
+        self._position = 0
+        self._taille_idx = 0
+        try:
+            os.remove(self.chemin)
+        except FileNotFoundError:
+            pass
+
+    # --- Mise à jour incrémentale ------------------------------------------
+
+    def rattraper(self):
+        """
+        Indexe les lignes ajoutées au CSV depuis le dernier appel.
+
+        Seule la fin du fichier non encore indexée est lue. Les blocs
+        terminés sont ajoutés au fichier d'index.
+        """
+        try:
+            f = open(self.fichier, mode="rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            taille = os.fstat(f.fileno()).st_size
+            if taille < self._position:
+                # Fichier tronqué ou remplacé depuis : on repart de zéro.
+                self._reinitialiser()
+
+            if self.entete is None:
+                if not self._lire_entete(f, taille):
+                    return
+
+            f.seek(self._position)
+            donnees = f.read(taille - self._position)
+
+        nouveaux = []
+        debut = 0
+        while True:
+            fin = donnees.find(b"\n", debut)
+            if fin < 0:
+                break  # ligne incomplète : elle sera indexée plus tard
+            self._indexer_ligne(
+                donnees[debut:fin],
+                self._position + debut,
+                self._position + fin + 1,
+                nouveaux,
+            )
+            debut = fin + 1
+        self._position += debut
+
+        if nouveaux:
+            self._persister(nouveaux)
+
+    def _persister(self, nouveaux: List[Dict[str, Any]]):
+        """
+        Ajoute des blocs terminés au fichier d'index.
+
+        Si le fichier a changé depuis notre dernière lecture, un autre
+        processus (l'exportateur) l'a déjà complété : on garde nos blocs en
+        mémoire sans les écrire une seconde fois.
+        """
+        with open(self.chemin, mode="ab") as f:
+            if f.tell() != self._taille_idx:
+                return
+            for bloc in nouveaux:
+                f.write(json.dumps(bloc, separators=(",", ":")).encode("utf-8"))
+                f.write(b"\n")
+            self._taille_idx = f.tell()
+
+    def _lire_entete(self, f, taille: int) -> bool:
+        """
+        Lit l'en-tête du CSV et crée un nouvel index. Retourne False si le
+        fichier ne contient pas encore d'en-tête complet.
+        """
+        f.seek(0)
+        ligne = f.readline()
+        if not ligne.endswith(b"\n"):
+            return False
+
+        self.entete = ligne.decode("utf-8").rstrip("\r\n")
+        self.champs = next(csv.reader([self.entete]))
+        self._position = len(ligne)
+
+        octets_signes = min(taille, TAILLE_SIGNATURE)
+        meta = {
+            "version": VERSION_INDEX,
+            "duree_bloc": self.duree_bloc,
+            "entete": self.entete,
+            "debut_donnees": self._position,
+            "octets_signes": octets_signes,
+            "signature": _signature(f, octets_signes),
+        }
+        with open(self.chemin, mode="wb") as idx:
+            idx.write(json.dumps(meta).encode("utf-8") + b"\n")
+            self._taille_idx = idx.tell()
+        return True
+
+    def _indexer_ligne(self, brut: bytes, debut: int, fin: int, nouveaux: list):
+        try:
+            valeurs = next(csv.reader([brut.decode("utf-8")]))
+            row = dict(zip(self.champs, valeurs))
+            epoch = historique.horodatage_vers_epoch(row.get("timestamp") or "")
+        except (ValueError, StopIteration, UnicodeDecodeError):
+            epoch = None
+            row = {}
+
+        courant = self._courant
+        tranche = int(epoch // self.duree_bloc) if epoch is not None else None
+
+        if courant is not None and (
+            (tranche is not None and tranche != courant["tranche"])
+            or courant["fin"] - courant["debut"] >= TAILLE_MAX_BLOC
+        ):
+            nouveaux.append(self._terminer_bloc(courant))
+            self.blocs.append(nouveaux[-1])
+            courant = None
+
+        if courant is None:
+            courant = {
+                "tranche": tranche,
+                "debut": debut,
+                "fin": fin,
+                "t_min": None,
+                "t_max": None,
+                "hotes": set(),
+            }
+            self._courant = courant
+
+        courant["fin"] = fin
+        if epoch is not None:
+            if courant["tranche"] is None:
+                courant["tranche"] = tranche
+            if courant["t_min"] is None or epoch < courant["t_min"]:
+                courant["t_min"] = epoch
+            if courant["t_max"] is None or epoch > courant["t_max"]:
+                courant["t_max"] = epoch
+        courant["hotes"].add(row.get("hostname", ""))
+
+    @staticmethod
+    def _terminer_bloc(courant: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "debut": courant["debut"],
+            "fin": courant["fin"],
+            "t_min": courant["t_min"],
+            "t_max": courant["t_max"],
+            "hotes": sorted(courant["hotes"]),
+        }
+
+    # --- Requêtes -----------------------------------------------------------
+
+    def _blocs_candidats(
+        self,
+        depuis: Optional[float],
+        jusqua: Optional[float],
+        hote: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        blocs = list(self.blocs)
+        if self._courant is not None:
+            blocs.append(self._terminer_bloc(self._courant))
+
+        retenus = []
+        for bloc in blocs:
+            # Un bloc sans timestamp valide est conservé : les lignes seront
+            # de toute façon filtrées une par une.
+            if bloc["t_min"] is not None:
+                if depuis is not None and bloc["t_max"] < depuis:
+                    continue
+                if jusqua is not None and bloc["t_min"] > jusqua:
+                    continue
+            if hote is not None and hote not in bloc["hotes"]:
+                continue
+
+            # Blocs adjacents fusionnés pour limiter les lectures
+            if retenus and retenus[-1][1] == bloc["debut"]:
+                retenus[-1][1] = bloc["fin"]
+            else:
+                retenus.append([bloc["debut"], bloc["fin"]])
+        return retenus
+
+    def lire(
+        self,
+        depuis: Optional[float] = None,
+        jusqua: Optional[float] = None,
+        hote: Optional[str] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Retourne les lignes du CSV dans l'intervalle et pour l'hôte demandés.
+
+        Args:
+            depuis (float | None): borne basse (secondes depuis l'epoch).
+            jusqua (float | None): borne haute (secondes depuis l'epoch).
+            hote (str | None): nom d'hôte, None = tous.
+
+        Retourne:
+            Iterator[dict]: lignes au format csv.DictReader.
+        """
+        self.rattraper()
+        if self.entete is None:
+            return
+
+        with open(self.fichier, mode="rb") as f:
+            for debut, fin in self._blocs_candidats(depuis, jusqua, hote):
+                f.seek(debut)
+                texte = f.read(fin - debut).decode("utf-8")
+                reader = csv.DictReader(io.StringIO(texte), fieldnames=self.champs)
+                for row in reader:
+                    if ligne_retenue(row, depuis, jusqua, hote):
+                        yield row
+
+
+def ligne_retenue(
+    row: Dict[str, str],
+    depuis: Optional[float],
+    jusqua: Optional[float],
+    hote: Optional[str],
+) -> bool:
+    """
+    Indique si une ligne du CSV correspond aux filtres de temps et d'hôte.
+    """
+    if hote is not None and row.get("hostname") != hote:
+        return False
+    if depuis is None and jusqua is None:
+        return True
+    try:
+        epoch = historique.horodatage_vers_epoch(row.get("timestamp") or "")
+    except ValueError:
+        return False
+    if depuis is not None and epoch < depuis:
+        return False
+    return jusqua is None or epoch <= jusqua
+
+
+def mettre_a_jour_index(fichier_csv: str):
+    """
+    Indexe les lignes ajoutées au CSV (ou reconstruit l'index s'il est
+    absent ou périmé).
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV d'historique.
+    """
+    IndexHistorique(fichier_csv).rattraper()
+
+
+def lire_lignes(
+    fichier_csv: str,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Lit les lignes d'un CSV d'historique via son index.
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV d'historique.
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+
+    Retourne:
+        Iterator[dict]: lignes au format csv.DictReader.
+    """
+    return IndexHistorique(fichier_csv).lire(depuis, jusqua, hote)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+models.py - Objets typés d'un échantillon de métriques SysWatch.
+
+Un Snapshot regroupe les mesures d'une collecte dans des objets à
+__slots__ (pas de dictionnaire par instance, accès direct aux attributs).
+Les conversions vers les formes historiques sont faites une seule fois,
+ici : vers_dict() pour le JSON (forme de collecter_tout()) et vers_ligne()
+pour le CSV d'historique (forme de CHAMPS_CSV).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+OCTETS_PAR_GO = 1024 ** 3
+
+# Colonnes de débits de l'hôte dans le CSV d'historique (voir totaux_io)
+CHAMPS_IO = [
+    "disk_read_bps",
+    "disk_write_bps",
+    "disk_iops",
+    "net_recv_bps",
+    "net_sent_bps",
+    "net_pps",
+]
+
+
+@dataclass(slots=True)
+class CpuSample:
+    """
+    Mesure CPU d'une collecte.
+    """
+
+    utilisation: float
+    coeurs_physiques: Optional[int] = None
+    coeurs_logiques: Optional[int] = None
+    par_coeur: List[float] = field(default_factory=list)
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """
+        Forme retournée par collecter_cpu().
+        """
+        return {
+            "coeurs_physiques": self.coeurs_physiques,
+            "coeurs_logiques": self.coeurs_logiques,
+            "utilisation": self.utilisation,
+            "par_coeur": self.par_coeur,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "CpuSample":
+        return cls(
+            utilisation=data.get("utilisation", 0.0),
+            coeurs_physiques=data.get("coeurs_physiques"),
+            coeurs_logiques=data.get("coeurs_logiques"),
+            par_coeur=data.get("par_coeur") or [],
+        )
+
+
+@dataclass(slots=True)
+class MemSample:
+    """
+    Mesure mémoire (RAM) d'une collecte, tailles en octets.
+    """
+
+    total: int
+    disponible: int
+    pourcentage: float
+
+    @property
+    def total_go(self) -> float:
+        return self.total / OCTETS_PAR_GO
+
+    @property
+    def disponible_go(self) -> float:
+        return self.disponible / OCTETS_PAR_GO
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """
+        Forme retournée par collecter_memoire().
+        """
+        return {
+            "total": self.total,
+            "disponible": self.disponible,
+            "pourcentage": self.pourcentage,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "MemSample":
+        return cls(
+            total=data.get("total", 0),
+            disponible=data.get("disponible", 0),
+            pourcentage=data.get("pourcentage", 0.0),
+        )
+
+
+@dataclass(slots=True)
+class DiskSample:
+    """
+    Mesure d'une partition. Une partition qui n'a pas répondu à temps a
+    expire=True et pas de tailles.
+    """
+
+    point_montage: str
+    total: Optional[int] = None
+    utilise: Optional[int] = None
+    pourcentage: Optional[float] = None
+    expire: bool = False
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """
+        Forme d'un élément de collecter_disques().
+        """
+        if self.expire:
+            return {"point_montage": self.point_montage, "expire": True}
+        return {
+            "point_montage": self.point_montage,
+            "total": self.total,
+            "utilise": self.utilise,
+            "pourcentage": self.pourcentage,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "DiskSample":
+        if data.get("expire"):
+            return cls(data.get("point_montage", ""), expire=True)
+        return cls(
+            point_montage=data.get("point_montage", ""),
+            total=data.get("total"),
+            utilise=data.get("utilise"),
+            pourcentage=data.get("pourcentage"),
+        )
+
+
+@dataclass(slots=True)
+class ProcessSample:
+    """
+    Mesure d'un processus. cpu_percent est relatif à un coeur (peut
+    dépasser 100 %) et vaut None tant que le processus n'a été lu qu'une
+    fois.
+    """
+
+    pid: int
+    nom: str
+    cpu_percent: Optional[float]
+    rss: int
+
+    @property
+    def rss_mo(self) -> float:
+        return self.rss / 1024 ** 2
+
+    def vers_dict(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            "nom": self.nom,
+            "cpu_percent": self.cpu_percent,
+            "rss": self.rss,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "ProcessSample":
+        return cls(
+            pid=data.get("pid", 0),
+            nom=data.get("nom", ""),
+            cpu_percent=data.get("cpu_percent"),
+            rss=data.get("rss", 0),
+        )
+
+
+@dataclass(slots=True)
+class DiskIOSample:
+    """
+    Débits d'un périphérique bloc depuis la collecte précédente, par
+    seconde. Les entrées/sorties d'une partition sont aussi comptées dans
+    son disque.
+    """
+
+    peripherique: str
+    octets_lus: float
+    octets_ecrits: float
+    lectures: float
+    ecritures: float
+    partition: bool = False
+
+    def vers_dict(self) -> Dict[str, Any]:
+        return {
+            "peripherique": self.peripherique,
+            "octets_lus": self.octets_lus,
+            "octets_ecrits": self.octets_ecrits,
+            "lectures": self.lectures,
+            "ecritures": self.ecritures,
+            "partition": self.partition,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "DiskIOSample":
+        return cls(
+            peripherique=data.get("peripherique", ""),
+            octets_lus=data.get("octets_lus", 0.0),
+            octets_ecrits=data.get("octets_ecrits", 0.0),
+            lectures=data.get("lectures", 0.0),
+            ecritures=data.get("ecritures", 0.0),
+            partition=data.get("partition", False),
+        )
+
+
+@dataclass(slots=True)
+class NetIOSample:
+    """
+    Débits d'une interface réseau depuis la collecte précédente, par
+    seconde.
+    """
+
+    interface: str
+    octets_recus: float
+    octets_envoyes: float
+    paquets_recus: float
+    paquets_envoyes: float
+    boucle: bool = False
+
+    def vers_dict(self) -> Dict[str, Any]:
+        return {
+            "interface": self.interface,
+            "octets_recus": self.octets_recus,
+            "octets_envoyes": self.octets_envoyes,
+            "paquets_recus": self.paquets_recus,
+            "paquets_envoyes": self.paquets_envoyes,
+            "boucle": self.boucle,
+        }
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "NetIOSample":
+        return cls(
+            interface=data.get("interface", ""),
+            octets_recus=data.get("octets_recus", 0.0),
+            octets_envoyes=data.get("octets_envoyes", 0.0),
+            paquets_recus=data.get("paquets_recus", 0.0),
+            paquets_envoyes=data.get("paquets_envoyes", 0.0),
+            boucle=data.get("boucle", False),
+        )
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """
+    Ensemble des métriques d'une collecte.
+
+    systeme est le dictionnaire des faits statiques de l'hôte (os, version,
+    architecture, hostname), partagé avec le cache du collecteur : il ne
+    doit pas être modifié. processus n'est rempli que si la collecte par
+    processus est active (voir processus.CollecteurProcessus). io_disques
+    et io_reseau sont vides tant qu'aucun débit n'est connu (voir
+    compteurs.MoteurCompteurs).
+    """
+
+    timestamp: str
+    systeme: Dict[str, Any]
+    cpu: CpuSample
+    memoire: MemSample
+    disques: List[DiskSample] = field(default_factory=list)
+    processus: List[ProcessSample] = field(default_factory=list)
+    io_disques: List[DiskIOSample] = field(default_factory=list)
+    io_reseau: List[NetIOSample] = field(default_factory=list)
+
+    @property
+    def hostname(self) -> str:
+        return self.systeme.get("hostname", "")
+
+    def disque(self, point_montage: str) -> Optional[DiskSample]:
+        """
+        Mesure d'une partition (None si absente).
+        """
+        for d in self.disques:
+            if d.point_montage == point_montage:
+                return d
+        return None
+
+    def totaux_io(self) -> Dict[str, Any]:
+        """
+        Débits de l'hôte (voir totaux_io).
+        """
+        return totaux_io(self.io_disques, self.io_reseau)
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """
+        Forme retournée par collecter_tout(), sérialisable en JSON (avec
+        les clés 'processus', 'io_disques' et 'io_reseau' si ces mesures
+        sont présentes).
+        """
+        data = {
+            "timestamp": self.timestamp,
+            "systeme": dict(self.systeme),
+            "cpu": self.cpu.vers_dict(),
+            "memoire": self.memoire.vers_dict(),
+            "disques": [d.vers_dict() for d in self.disques],
+        }
+        if self.processus:
+            data["processus"] = [p.vers_dict() for p in self.processus]
+        if self.io_disques:
+            data["io_disques"] = [d.vers_dict() for d in self.io_disques]
+        if self.io_reseau:
+            data["io_reseau"] = [i.vers_dict() for i in self.io_reseau]
+        return data
+
+    def vers_ligne(self) -> Dict[str, Any]:
+        """
+        Ligne du CSV d'historique (voir historique.CHAMPS_CSV).
+        """
+        racine = self.disque("/")
+        disk_root_percent = ""
+        if racine is not None and racine.pourcentage is not None:
+            disk_root_percent = racine.pourcentage
+        ligne = {
+            "timestamp": self.timestamp,
+            "hostname": self.hostname,
+            "cpu_percent": self.cpu.utilisation,
+            "mem_total_gb": self.memoire.total_go,
+            "mem_dispo_gb": self.memoire.disponible_go,
+            "mem_percent": self.memoire.pourcentage,
+            "disk_root_percent": disk_root_percent,
+        }
+        ligne.update(self.totaux_io())
+        return ligne
+
+    @classmethod
+    def depuis_dict(cls, data: Dict[str, Any]) -> "Snapshot":
+        """
+        Reconstruit un Snapshot depuis la forme de collecter_tout() (ex:
+        syswatch_last.json ou réponse du démon).
+        """
+        return cls(
+            timestamp=data.get("timestamp", ""),
+            systeme=data.get("systeme") or {},
+            cpu=CpuSample.depuis_dict(data.get("cpu") or {}),
+            memoire=MemSample.depuis_dict(data.get("memoire") or {}),
+            disques=[DiskSample.depuis_dict(d) for d in data.get("disques") or []],
+            processus=[
+                ProcessSample.depuis_dict(p) for p in data.get("processus") or []
+            ],
+            io_disques=[
+                DiskIOSample.depuis_dict(d) for d in data.get("io_disques") or []
+            ],
+            io_reseau=[
+                NetIOSample.depuis_dict(i) for i in data.get("io_reseau") or []
+            ],
+        )
+
+
+def totaux_io(
+    io_disques: List[DiskIOSample], io_reseau: List[NetIOSample]
+) -> Dict[str, Any]:
+    """
+    Débits de l'hôte : somme des disques entiers (sans les partitions) et
+    des interfaces réseau hors bouclage.
+
+    Retourne:
+        dict: colonnes de CHAMPS_IO (octets/s, opérations/s, paquets/s),
+        "" si aucun débit n'est encore connu.
+    """
+    totaux = dict.fromkeys(CHAMPS_IO, "")
+    disques = [d for d in io_disques if not d.partition]
+    if disques:
+        totaux["disk_read_bps"] = sum(d.octets_lus for d in disques)
+        totaux["disk_write_bps"] = sum(d.octets_ecrits for d in disques)
+        totaux["disk_iops"] = sum(d.lectures + d.ecritures for d in disques)
+    interfaces = [i for i in io_reseau if not i.boucle]
+    if interfaces:
+        totaux["net_recv_bps"] = sum(i.octets_recus for i in interfaces)
+        totaux["net_sent_bps"] = sum(i.octets_envoyes for i in interfaces)
+        totaux["net_pps"] = sum(i.paquets_recus + i.paquets_envoyes for i in interfaces)
+    # Au dixième : des débits, pas des compteurs
+    for nom, valeur in totaux.items():
+        if valeur != "":
+            totaux[nom] = round(valeur, 1)
+    return totaux
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module ordonnanceur - cadencement à fréquence fixe pour SysWatch.
+
+Les échéances sont absolues (t0 + n * intervalle) sur l'horloge monotone :
+le temps passé à collecter, afficher ou exporter ne décale donc pas les
+collectes suivantes. Si un tick est manqué, il est sauté et compté au lieu
+d'être rattrapé en rafale.
+"""
+
+import time
+from typing import Dict, Any, Iterator
+
+
+class Ordonnanceur:
+    """
+    Ordonnanceur à fréquence fixe sans dérive.
+
+    Utilisation:
+        ordo = Ordonnanceur(0.25)
+        for tick in ordo:
+            ...  # travail du tick
+    """
+
+    def __init__(self, intervalle: float, nombre: int = 0):
+        """
+        Args:
+            intervalle (float): période en secondes (peut être < 1).
+            nombre (int): nombre de ticks à produire (0 = infini).
+        """
+        if intervalle <= 0:
+            raise ValueError("L'intervalle doit être strictement positif.")
+
+        self.intervalle = float(intervalle)
+        self.nombre = nombre
+
+        self.ticks = 0
+        self.ticks_manques = 0
+        self.depassements = 0
+        self.gigue_derniere = 0.0
+        self.gigue_max = 0.0
+        self._gigue_totale = 0.0
+
+        self._origine = None
+        self._prochain_index = 0
+
+    def __iter__(self) -> Iterator[int]:
+        while self.nombre == 0 or self.ticks < self.nombre:
+            yield self.attendre_tick()
+
+    def attendre_tick(self) -> int:
+        """
+        Attend la prochaine échéance et enregistre les statistiques du tick.
+
+        Retourne:
+            int: index du tick (nombre de périodes écoulées depuis le début).
+        """
+        maintenant = time.monotonic()
+
+        if self._origine is None:
+            # Le premier tick part immédiatement et sert de référence.
+            self._origine = maintenant
+            self._prochain_index = 1
+            self.ticks = 1
+            return 0
+
+        index = self._prochain_index
+        echeance = self._origine + index * self.intervalle
+
+        if maintenant > echeance:
+            # Le travail du tick précédent a dépassé la période : on saute
+            # les échéances déjà passées au lieu de les enchaîner.
+            self.depassements += 1
+            suivant = int((maintenant - self._origine) // self.intervalle) + 1
+            self.ticks_manques += suivant - index
+            index = suivant
+            echeance = self._origine + index * self.intervalle
+
+        attente = echeance - time.monotonic()
+        if attente > 0:
+            time.sleep(attente)
+
+        gigue = time.monotonic() - echeance
+        self.gigue_derniere = gigue
+        self.gigue_max = max(self.gigue_max, gigue)
+        self._gigue_totale += gigue
+
+        self._prochain_index = index + 1
+        self.ticks += 1
+        return index
+
+    def statistiques(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de cadencement.
+
+        Retourne:
+            dict: {
+                'intervalle': float,
+                'ticks': int,
+                'ticks_manques': int,
+                'depassements': int,
+                'gigue_derniere_ms': float,
+                'gigue_moyenne_ms': float,
+                'gigue_max_ms': float
+            }
+        """
+        # Le premier tick n'a pas d'échéance, il n'entre pas dans la moyenne.
+        mesures = max(self.ticks - 1, 0)
+        moyenne = self._gigue_totale / mesures if mesures else 0.0
+
+        return {
+            "intervalle": self.intervalle,
+            "ticks": self.ticks,
+            "ticks_manques": self.ticks_manques,
+            "depassements": self.depassements,
+            "gigue_derniere_ms": self.gigue_derniere * 1000,
+            "gigue_moyenne_ms": moyenne * 1000,
+            "gigue_max_ms": self.gigue_max * 1000,
+        }
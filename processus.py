@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module processus - processus les plus gourmands (CPU et mémoire).
+
+Le CollecteurProcessus relève les N processus qui consomment le plus de CPU
+et de mémoire résidente (RSS), à coût borné par échantillon :
+    - psutil.process_iter avec une liste d'attributs restreinte ; ses objets
+      Process sont réutilisés d'un échantillon à l'autre et l'utilisation
+      CPU est calculée par différence des temps CPU cumulés ;
+    - un budget de temps par échantillon : le parcours de tous les
+      processus reprend là où il s'était arrêté à l'échantillon suivant,
+      tandis que les processus du classement courant sont relus à chaque
+      fois ;
+    - une collecte seulement tous les K échantillons, ou seulement pendant
+      une surcharge de l'hôte (seuils avec hystérésis).
+
+Avec un budget, un processus hors classement est relu une fois par tour
+complet : sa mesure peut dater de quelques échantillons.
+"""
+
+import heapq
+import json
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+import psutil
+
+import historique
+import models
+import statistiques
+
+ATTRIBUTS = ["pid", "name", "cpu_times", "memory_info"]
+
+NOMBRE_DEFAUT = 5
+BUDGET_MS_DEFAUT = 3.0
+
+
+class CollecteurProcessus:
+    """
+    Classement des processus, un appel par échantillon.
+
+    Utilisation:
+        collecteur = CollecteurProcessus(nombre=5, budget_ms=3)
+        for _ in ordo:
+            instantane = collecter_instantane()
+            collecteur.collecter(instantane)   # remplit instantane.processus
+    """
+
+    def __init__(
+        self,
+        nombre: int = NOMBRE_DEFAUT,
+        tous_les: int = 1,
+        seuil_entree: Optional[float] = None,
+        seuil_sortie: Optional[float] = None,
+        budget_ms: Optional[float] = BUDGET_MS_DEFAUT,
+    ):
+        """
+        Args:
+            nombre (int): taille de chaque classement (CPU et RSS).
+            tous_les (int): collecte un échantillon sur tous_les.
+            seuil_entree (float | None): si défini, collecte seulement
+                pendant une surcharge : CPU ou mémoire de l'hôte (%) au-dessus
+                de ce seuil, jusqu'au retour des deux sous seuil_sortie.
+            seuil_sortie (float | None): fin de surcharge (défaut:
+                seuil_entree).
+            budget_ms (float | None): temps maximal de parcours par
+                échantillon, None = parcours complet à chaque fois.
+        """
+        if nombre < 1 or tous_les < 1:
+            raise ValueError("nombre et tous_les doivent être >= 1.")
+        self.nombre = nombre
+        self.tous_les = tous_les
+        self.seuil_entree = seuil_entree
+        self.seuil_sortie = seuil_entree if seuil_sortie is None else seuil_sortie
+        self.budget_ms = budget_ms
+
+        self.ticks = 0
+        self.ticks_actifs = 0
+        self.tours = 0
+        self.duree = statistiques.StatistiqueFlux()
+        self.en_surcharge = False
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        # pid -> psutil.Process (objets du cache de process_iter)
+        self._processus = {}
+        # pid -> (Process, temps CPU cumulé, instant de la lecture)
+        self._precedents = {}
+        # pid -> models.ProcessSample (dernière mesure)
+        self._mesures = {}
+        self._classement = []
+        self._iterateur = None
+        self._vus = set()
+
+    # --- Déclenchement --------------------------------------------------------
+
+    def _doit_collecter(self, instantane: models.Snapshot) -> bool:
+        self.ticks += 1
+        if self.seuil_entree is not None:
+            charge = max(instantane.cpu.utilisation, instantane.memoire.pourcentage)
+            if self.en_surcharge and charge < self.seuil_sortie:
+                # Fin de surcharge : la prochaine repart de zéro (pas de
+                # différence CPU sur toute la période calme)
+                self.en_surcharge = False
+                self._reinitialiser()
+            elif not self.en_surcharge and charge > self.seuil_entree:
+                self.en_surcharge = True
+            if not self.en_surcharge:
+                return False
+        return (self.ticks - 1) % self.tous_les == 0
+
+    # --- Collecte -------------------------------------------------------------
+
+    def collecter(self, instantane: models.Snapshot) -> List[models.ProcessSample]:
+        """
+        Met à jour le classement si la collecte est active pour cet
+        échantillon, et le place dans instantane.processus.
+
+        Retourne:
+            list[models.ProcessSample]: les `nombre` premiers par CPU, puis
+            ceux des `nombre` premiers par RSS qui n'y sont pas déjà (vide
+            si la collecte est inactive). Au premier passage, l'utilisation
+            CPU n'est pas encore connue (None).
+        """
+        if not self._doit_collecter(instantane):
+            return []
+
+        debut = time.perf_counter()
+        limite = None
+        if self.budget_ms is not None:
+            limite = debut + self.budget_ms / 1000
+        maintenant = time.monotonic()
+
+        # Le classement courant d'abord, relu à chaque échantillon
+        relus = set()
+        for pid in self._classement:
+            proc = self._processus.get(pid)
+            if proc is None:
+                continue
+            try:
+                self._mesurer(proc, proc.as_dict(ATTRIBUTS), maintenant)
+            except psutil.NoSuchProcess:
+                self._oublier(pid)
+                continue
+            relus.add(pid)
+
+        # Puis la suite du parcours, dans la limite du budget
+        while limite is None or time.perf_counter() < limite:
+            if self._iterateur is None:
+                self._iterateur = psutil.process_iter(ATTRIBUTS)
+                self._vus = set()
+            try:
+                proc = next(self._iterateur)
+            except StopIteration:
+                self._fin_de_tour(relus)
+                break
+            self._vus.add(proc.pid)
+            self._processus[proc.pid] = proc
+            if proc.pid not in relus:
+                self._mesurer(proc, proc.info, maintenant)
+
+        resultat = self._classer()
+        instantane.processus = resultat
+        self.ticks_actifs += 1
+        self.duree.ajouter((time.perf_counter() - debut) * 1000)
+        return resultat
+
+    def _mesurer(self, proc: psutil.Process, info: Dict[str, Any], maintenant: float):
+        temps = info.get("cpu_times")
+        memoire = info.get("memory_info")
+        cpu = None
+        if temps is not None:
+            total = temps.user + temps.system
+            precedent = self._precedents.get(proc.pid)
+            # Même objet Process : pas un pid réutilisé par un autre processus
+            if precedent is not None and precedent[0] is proc:
+                _, total_precedent, instant = precedent
+                if maintenant > instant and total >= total_precedent:
+                    cpu = (total - total_precedent) / (maintenant - instant) * 100
+            self._precedents[proc.pid] = (proc, total, maintenant)
+        self._mesures[proc.pid] = models.ProcessSample(
+            proc.pid,
+            info.get("name") or "",
+            cpu,
+            memoire.rss if memoire is not None else 0,
+        )
+
+    def _oublier(self, pid: int):
+        self._processus.pop(pid, None)
+        self._precedents.pop(pid, None)
+        self._mesures.pop(pid, None)
+
+    def _fin_de_tour(self, relus: set):
+        """
+        Tour complet : les processus qui n'y figuraient pas ont disparu.
+        """
+        for pid in list(self._mesures):
+            if pid not in self._vus and pid not in relus:
+                self._oublier(pid)
+        self._iterateur = None
+        self.tours += 1
+
+    def _classer(self) -> List[models.ProcessSample]:
+        mesures = self._mesures.values()
+        par_cpu = heapq.nlargest(
+            self.nombre,
+            (m for m in mesures if m.cpu_percent is not None),
+            key=lambda m: m.cpu_percent,
+        )
+        pids = {m.pid for m in par_cpu}
+        par_rss = [
+            m
+            for m in heapq.nlargest(self.nombre, mesures, key=lambda m: m.rss)
+            if m.pid not in pids
+        ]
+        resultat = par_cpu + par_rss
+        self._classement = [m.pid for m in resultat]
+        return resultat
+
+    def statistiques(self) -> Dict[str, Any]:
+        """
+        Coût de la collecte.
+
+        Retourne:
+            dict: {
+                'ticks', 'ticks_actifs', 'tours' (parcours complets),
+                'processus_suivis', 'duree_moyenne_ms', 'duree_max_ms'
+            }
+        """
+        return {
+            "ticks": self.ticks,
+            "ticks_actifs": self.ticks_actifs,
+            "tours": self.tours,
+            "processus_suivis": len(self._mesures),
+            "duree_moyenne_ms": self.duree.moyenne,
+            "duree_max_ms": self.duree.max,
+        }
+
+
+# --- Journal des classements ----------------------------------------------------
+
+
+def lire_journal(
+    fichier: str, depuis: Optional[float] = None, jusqua: Optional[float] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lit le journal des classements (voir exporteurs.ExportateurProcessus).
+
+    Args:
+        fichier (str): chemin du journal (JSON lines).
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+
+    Retourne:
+        Iterator[dict]: {'epoch', 'hostname', 'processus': list[dict]}
+    """
+    try:
+        f = open(fichier, encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for ligne in f:
+            try:
+                enregistrement = json.loads(ligne)
+                epoch = historique.horodatage_vers_epoch(enregistrement["timestamp"])
+            except (ValueError, KeyError):
+                # Dernière ligne tronquée par un arrêt brutal
+                continue
+            if depuis is not None and epoch < depuis:
+                continue
+            if jusqua is not None and epoch > jusqua:
+                continue
+            enregistrement["epoch"] = epoch
+            yield enregistrement
+
+
+def principaux(
+    enregistrements: List[Dict[str, Any]],
+    hostname: str,
+    debut: float,
+    fin: float,
+    nombre: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Processus ayant le plus consommé de CPU sur une période (ex: un épisode
+    de surcharge), d'après le journal des classements.
+
+    Args:
+        enregistrements (list[dict]): résultat de lire_journal().
+        hostname (str): hôte de la période.
+        debut (float): début (secondes depuis l'epoch).
+        fin (float): fin (secondes depuis l'epoch).
+        nombre (int): nombre de processus retournés.
+
+    Retourne:
+        list[dict]: {'pid', 'nom', 'cpu_max', 'rss_max'} par CPU décroissant.
+    """
+    par_pid = {}
+    for e in enregistrements:
+        if e["hostname"] != hostname or not debut <= e["epoch"] <= fin:
+            continue
+        for p in e["processus"]:
+            resume = par_pid.setdefault(
+                p["pid"],
+                {"pid": p["pid"], "nom": p["nom"], "cpu_max": 0.0, "rss_max": 0},
+            )
+            if p["cpu_percent"] is not None:
+                resume["cpu_max"] = max(resume["cpu_max"], p["cpu_percent"])
+            resume["rss_max"] = max(resume["rss_max"], p["rss"])
+    return heapq.nlargest(nombre, par_pid.values(), key=lambda r: r["cpu_max"])
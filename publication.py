@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module publication - publication du dernier instantané.
+
+publier_json() remplace le fichier JSON de façon atomique (fichier
+temporaire puis renommage) : un lecteur voit l'ancien document ou le
+nouveau, jamais un document tronqué. La sérialisation est compacte par
+défaut, indentée sur demande.
+
+Un EmplacementPartage est un petit fichier de taille fixe projeté en
+mémoire (mmap) contenant les métriques principales en binaire. Un agent
+local le projette une fois puis lit chaque instantané sans ouvrir de
+fichier ni analyser de JSON. Les écritures sont protégées par un compteur
+de séquence (seqlock) : impair pendant l'écriture, le lecteur recommence
+s'il a changé pendant sa lecture.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Any, Optional
+
+import historique
+import models
+
+# En-tête : signature, version, réservé, séquence
+ENTETE = struct.Struct("<4sHHQ")
+SIGNATURE = b"SWSL"
+VERSION = 1
+
+# Enregistrement : timestamp (epoch), cpu_percent, mem_total_gb,
+# mem_dispo_gb, mem_percent, disk_root_percent (NaN si absent), hostname
+ENREGISTREMENT = struct.Struct("<dddddd64s")
+TAILLE_EMPLACEMENT = ENTETE.size + ENREGISTREMENT.size
+
+# Durée maximale (secondes) des nouvelles tentatives d'une lecture
+# concurrente d'une écriture
+DELAI_LECTURE = 0.5
+
+
+def publier_json(metriques, fichier: str, indente: bool = False):
+    """
+    Écrit les métriques complètes dans un fichier JSON, de façon atomique.
+
+    Args:
+        metriques (models.Snapshot | dict): instantané retourné par
+            collecter_instantane(), ou dictionnaire de collecter_tout()
+        fichier (str): chemin du fichier JSON.
+        indente (bool): JSON indenté (lisible) au lieu de compact.
+    """
+    if isinstance(metriques, models.Snapshot):
+        metriques = metriques.vers_dict()
+    if indente:
+        texte = json.dumps(metriques, indent=2, ensure_ascii=False)
+    else:
+        texte = json.dumps(metriques, separators=(",", ":"), ensure_ascii=False)
+
+    # Un temporaire par processus : deux écrivains ne se marchent pas dessus
+    temporaire = f"{fichier}.{os.getpid()}.tmp"
+    try:
+        with open(temporaire, mode="w", encoding="utf-8") as f:
+            f.write(texte)
+        os.replace(temporaire, fichier)
+    except BaseException:
+        try:
+            os.remove(temporaire)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class EmplacementPartage:
+    """
+    Emplacement projeté en mémoire contenant le dernier instantané.
+
+    Utilisation:
+        ecrivain = EmplacementPartage("/dev/shm/syswatch.slot", ecriture=True)
+        ecrivain.ecrire(collecter_instantane())
+
+        lecteur = EmplacementPartage("/dev/shm/syswatch.slot")
+        lecteur.lire()   # dict, ou None si rien n'a encore été publié
+    """
+
+    def __init__(self, chemin: str, ecriture: bool = False):
+        """
+        Args:
+            chemin (str): fichier de l'emplacement (sur un tmpfs comme
+                /dev/shm, il ne touche jamais le disque).
+            ecriture (bool): ouvre l'emplacement pour y publier (créé ou
+                réinitialisé si besoin).
+
+        Lève:
+            FileNotFoundError: lecture d'un emplacement inexistant.
+            ValueError: le fichier n'est pas un emplacement SysWatch.
+        """
+        self.chemin = chemin
+        self.ecriture = ecriture
+        if ecriture:
+            fd = os.open(chemin, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            fd = os.open(chemin, os.O_RDONLY)
+        try:
+            if ecriture and os.fstat(fd).st_size != TAILLE_EMPLACEMENT:
+                os.ftruncate(fd, TAILLE_EMPLACEMENT)
+            elif os.fstat(fd).st_size < TAILLE_EMPLACEMENT:
+                raise ValueError(f"{chemin} n'est pas un emplacement SysWatch.")
+            acces = mmap.ACCESS_WRITE if ecriture else mmap.ACCESS_READ
+            self._mm = mmap.mmap(fd, TAILLE_EMPLACEMENT, access=acces)
+        finally:
+            # La projection reste valide après la fermeture du descripteur
+            os.close(fd)
+
+        signature, version, _, sequence = ENTETE.unpack_from(self._mm, 0)
+        if ecriture:
+            if signature != SIGNATURE or version != VERSION:
+                ENTETE.pack_into(self._mm, 0, SIGNATURE, VERSION, 0, 0)
+            elif sequence % 2:
+                # Écrivain précédent interrompu en pleine écriture
+                ENTETE.pack_into(self._mm, 0, SIGNATURE, VERSION, 0, sequence + 1)
+        elif signature != SIGNATURE or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{chemin} n'est pas un emplacement SysWatch.")
+
+    def _sequence(self) -> int:
+        return ENTETE.unpack_from(self._mm, 0)[3]
+
+    def ecrire(self, metriques):
+        """
+        Publie un instantané.
+
+        Args:
+            metriques (models.Snapshot | dict): instantané retourné par
+                collecter_instantane(), ou dictionnaire de collecter_tout()
+        """
+        ligne = historique.metriques_vers_ligne(metriques)
+        try:
+            epoch = historique.horodatage_vers_epoch(ligne["timestamp"])
+        except ValueError:
+            epoch = math.nan
+        disque = ligne["disk_root_percent"]
+        enregistrement = ENREGISTREMENT.pack(
+            epoch,
+            float(ligne["cpu_percent"]),
+            float(ligne["mem_total_gb"]),
+            float(ligne["mem_dispo_gb"]),
+            float(ligne["mem_percent"]),
+            math.nan if disque in ("", None) else float(disque),
+            ligne["hostname"].encode("utf-8")[:64],
+        )
+
+        sequence = self._sequence()
+        ENTETE.pack_into(self._mm, 0, SIGNATURE, VERSION, 0, sequence + 1)
+        self._mm[ENTETE.size : TAILLE_EMPLACEMENT] = enregistrement
+        ENTETE.pack_into(self._mm, 0, SIGNATURE, VERSION, 0, sequence + 2)
+
+    def lire(self) -> Optional[Dict[str, Any]]:
+        """
+        Lit le dernier instantané publié.
+
+        Retourne:
+            dict | None: colonnes principales de CHAMPS_CSV ('timestamp' en
+            secondes depuis l'epoch, None pour une valeur absente), plus
+            'sequence' ; None si rien n'a encore été publié.
+
+        Lève:
+            RuntimeError: pas de lecture cohérente pendant DELAI_LECTURE
+                (écrivain bloqué en pleine écriture).
+        """
+        limite = None
+        while True:
+            avant = self._sequence()
+            if avant % 2 == 0:
+                valeurs = ENREGISTREMENT.unpack_from(self._mm, ENTETE.size)
+                if self._sequence() == avant:
+                    break
+            # Écriture en cours : on laisse l'écrivain avancer
+            if limite is None:
+                limite = time.monotonic() + DELAI_LECTURE
+            elif time.monotonic() > limite:
+                raise RuntimeError(
+                    "Emplacement en cours d'écriture, lecture impossible."
+                )
+            time.sleep(0)
+
+        if avant == 0:
+            return None
+        epoch, cpu, total, dispo, mem, disque, hostname = valeurs
+        return {
+            "sequence": avant // 2,
+            "timestamp": None if math.isnan(epoch) else epoch,
+            "hostname": hostname.rstrip(b"\0").decode("utf-8", "replace"),
+            "cpu_percent": cpu,
+            "mem_total_gb": total,
+            "mem_dispo_gb": dispo,
+            "mem_percent": mem,
+            "disk_root_percent": None if math.isnan(disque) else disque,
+        }
+
+    def fermer(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
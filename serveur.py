@@ -0,0 +1,900 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module serveur - serveur d'agrégation des agents SysWatch d'une flotte.
+
+Chaque agent (syswatch_v3 --serveur ADRESSE) garde une connexion
+persistante (TCP ou socket Unix) et y envoie ses échantillons par lots. Le
+serveur, une boucle asyncio sur un seul thread, tient pour chaque hôte :
+    - un TamponCirculaire des échantillons récents (FENETRE_HOTE) ;
+    - un AgregateurHistorique depuis le démarrage (statistiques, débits et
+      percentiles approchés) ;
+    - des agrégats par minute du CPU et de la mémoire (RETENTION_MINUTES),
+      en tableaux typés.
+Il répond aux requêtes de statistiques et de pics, pour toute la flotte ou
+pour un hôte.
+
+Protocole : une ligne JSON compacte par message, dans les deux sens.
+
+    agent   -> {"bonjour": VERSION_PROTOCOLE, "champs": CHAMPS_LOT,
+                "format": "json"}
+    agent   -> {"hote": "srv1", "lignes": [[epoch, cpu, ...], ...]}
+    client  -> {"requete": "hotes"}
+    client  -> {"requete": "stats", "depuis": t0, "jusqua": t1, "hote": "srv1"}
+    client  -> {"requete": "pics", "metrique": "cpu_percent", "nombre": 10,
+                "depuis": t0, "jusqua": t1}
+    client  -> {"requete": "serveur"}
+
+Les lots ne reçoivent pas de réponse ; une requête reçoit
+{"ok": true, "resultat": ...} ou {"ok": false, "erreur": "..."}, comme
+celles du démon (voir demon).
+
+Avec "format": "trames" dans le bonjour, la suite de la connexion est un
+flux de trames binaires (voir trames) : échantillons complets, environ dix
+fois moins volumineux qu'en JSON.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import time
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+import historique
+import models
+import statistiques
+import tampon_circulaire
+import traitement
+import trames
+
+VERSION_PROTOCOLE = 1
+
+# Colonnes d'une ligne de lot : timestamp en secondes depuis l'epoch, puis
+# les valeurs de l'historique (sans hostname, porté par le lot)
+CHAMPS_LOT = ["timestamp"] + historique.CHAMPS_CSV[2:]
+
+ADRESSE_DEFAUT = "127.0.0.1:7878"
+
+# Encodage des lots : lignes JSON (CHAMPS_LOT) ou trames binaires
+FORMATS = ("json", "trames")
+
+# Échantillons récents gardés par hôte (15 min à une seconde d'intervalle)
+FENETRE_HOTE = 900
+
+# Agrégats par minute gardés par hôte (24 h)
+RETENTION_MINUTES = 1440
+
+# Taille maximale d'un message (un lot complet)
+TAILLE_MAX_MESSAGE = 4 * 1024 * 1024
+
+# Délai maximal (secondes) d'une requête côté client
+DELAI_REQUETE = 5.0
+
+# Métriques des agrégats par minute : (nombre, moyenne, min, max, m2) du
+# CPU puis de la mémoire, précédés du début de la tranche
+_LARGEUR_MINUTE = 11
+
+
+class ServeurIndisponible(Exception):
+    """
+    Pas de serveur joignable à cette adresse, ou requête refusée.
+    """
+
+
+def analyser_adresse(adresse: str) -> Tuple[str, Any]:
+    """
+    Décode une adresse de serveur.
+
+    Args:
+        adresse (str): "hôte:port" (TCP), ou chemin d'un socket Unix
+            (contenant un "/" ou terminé par ".sock").
+
+    Retourne:
+        tuple: ("unix", chemin) ou ("tcp", (hôte, port)).
+
+    Lève:
+        ValueError: adresse invalide.
+    """
+    if os.sep in adresse or adresse.endswith(".sock"):
+        return "unix", adresse
+    hote, separateur, port = adresse.rpartition(":")
+    if not separateur or not port.isdigit():
+        raise ValueError(f"Adresse invalide : {adresse} (attendu hôte:port)")
+    return "tcp", (hote or "127.0.0.1", int(port))
+
+
+# --- Côté agent ---------------------------------------------------------------
+
+
+def connecter(adresse: str, delai: float = DELAI_REQUETE) -> socket.socket:
+    """
+    Ouvre une connexion bloquante vers le serveur.
+
+    Lève:
+        OSError: serveur injoignable.
+    """
+    famille, cible = analyser_adresse(adresse)
+    if famille == "unix":
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        s = socket.socket(socket.AF_INET6 if ":" in cible[0] else socket.AF_INET)
+    try:
+        s.settimeout(delai)
+        s.connect(cible)
+        if famille == "tcp":
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        s.close()
+        raise
+    return s
+
+
+def _encoder(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def message_bonjour(format_lots: str = "json") -> bytes:
+    """
+    Premier message d'un agent sur une connexion.
+
+    Args:
+        format_lots (str): encodage des lots qui suivent (FORMATS).
+    """
+    return _encoder(
+        {"bonjour": VERSION_PROTOCOLE, "champs": CHAMPS_LOT, "format": format_lots}
+    )
+
+
+def valeurs_echantillon(metriques) -> Dict[str, Any]:
+    """
+    Valeurs d'un échantillon pour le serveur.
+
+    Args:
+        metriques (models.Snapshot | dict): instantané ou dictionnaire de
+            collecter_tout().
+
+    Retourne:
+        dict: colonnes de CHAMPS_LOT ('timestamp' en secondes depuis
+        l'epoch) et 'hostname' ; None pour une valeur absente.
+    """
+    ligne = historique.metriques_vers_ligne(metriques)
+    valeurs = {nom: None if ligne[nom] == "" else ligne[nom] for nom in CHAMPS_LOT}
+    try:
+        valeurs["timestamp"] = historique.horodatage_vers_epoch(ligne["timestamp"])
+    except ValueError:
+        valeurs["timestamp"] = None
+    valeurs["hostname"] = ligne["hostname"]
+    return valeurs
+
+
+def ligne_lot(instantane: models.Snapshot) -> list:
+    """
+    Ligne d'un lot (ordre de CHAMPS_LOT, None pour une valeur absente).
+    """
+    valeurs = valeurs_echantillon(instantane)
+    return [valeurs[nom] for nom in CHAMPS_LOT]
+
+
+def messages_lot(lot: List[models.Snapshot]) -> bytes:
+    """
+    Messages d'un lot d'instantanés, un par hôte.
+    """
+    par_hote = {}
+    for instantane in lot:
+        par_hote.setdefault(instantane.hostname, []).append(ligne_lot(instantane))
+    return b"".join(
+        _encoder({"hote": hote, "lignes": lignes}) for hote, lignes in par_hote.items()
+    )
+
+
+def interroger(
+    adresse: str, requete: Dict[str, Any], delai: float = DELAI_REQUETE
+) -> Any:
+    """
+    Envoie une requête au serveur et retourne son résultat.
+
+    Args:
+        adresse (str): adresse du serveur (voir analyser_adresse).
+        requete (dict): ex: {"requete": "stats", "depuis": 1700000000.0}
+        delai (float): délai maximal de la requête, en secondes.
+
+    Retourne:
+        résultat de la requête (voir le docstring du module).
+
+    Lève:
+        ServeurIndisponible: pas de serveur joignable, ou requête refusée.
+    """
+    try:
+        with connecter(adresse, delai) as s:
+            s.sendall(_encoder(requete))
+            with s.makefile("rb") as f:
+                reponse = json.loads(f.readline())
+    except (OSError, ValueError) as e:
+        raise ServeurIndisponible(str(e)) from e
+
+    if not reponse.get("ok"):
+        raise ServeurIndisponible(reponse.get("erreur", "réponse invalide"))
+    return reponse["resultat"]
+
+
+# --- État par hôte ------------------------------------------------------------
+
+
+class EtatHote:
+    """
+    Échantillons récents, cumul et agrégats par minute d'un hôte.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        fenetre: int = FENETRE_HOTE,
+        retention_minutes: int = RETENTION_MINUTES,
+    ):
+        self.hostname = hostname
+        self.retention_minutes = retention_minutes
+        self.recents = tampon_circulaire.TamponCirculaire(fenetre)
+        self.cumul = traitement.AgregateurHistorique()
+        # Tranches fermées, _LARGEUR_MINUTE valeurs chacune
+        self.minutes = array("d")
+        # Tranche en cours : [début, stats CPU, stats mémoire]
+        self._minute = None
+        self.connexions = 0
+        self.dernier_contact = None
+        self.dernier_echantillon = None
+
+    def ajouter(self, valeurs: Dict[str, Any]):
+        """
+        Intègre un échantillon décodé (colonnes de CHAMPS_LOT, 'hostname').
+
+        Lève:
+            TypeError, ValueError: valeur non numérique (échantillon ignoré).
+        """
+        epoch = valeurs.get("timestamp")
+        cpu = valeurs.get("cpu_percent")
+        mem = valeurs.get("mem_percent")
+        if epoch is None or cpu is None or mem is None:
+            self.cumul.lignes_invalides += 1
+            return
+        # Conversions avant toute mise à jour : un échantillon invalide ne
+        # laisse pas l'état à moitié modifié
+        epoch, cpu, mem = float(epoch), float(cpu), float(mem)
+        debits = {}
+        for nom in models.CHAMPS_IO:
+            valeur = valeurs.get(nom)
+            if valeur is not None:
+                debits[nom] = float(valeur)
+        disque = valeurs.get("disk_root_percent")
+        if disque is not None:
+            disque = {"/": float(disque)}
+
+        self.recents.ajouter_valeurs(valeurs, disque)
+        self.cumul.ajouter_valeurs(cpu, mem, epoch, self.hostname, debits)
+        self._ajouter_minute(epoch, cpu, mem)
+        self.dernier_echantillon = valeurs
+
+    def _ajouter_minute(self, epoch: float, cpu: float, mem: float):
+        debut = int(epoch // 60) * 60
+        if self._minute is not None and debut < self._minute[0]:
+            # Échantillon en retard (deux agents sous le même nom d'hôte,
+            # lot retardé) : fusionné dans sa tranche, jamais dupliqué
+            self._fusionner_minute(debut, cpu, mem)
+            return
+        if self._minute is None or self._minute[0] != debut:
+            self._fermer_minute()
+            self._minute = [
+                debut,
+                statistiques.StatistiqueFlux(),
+                statistiques.StatistiqueFlux(),
+            ]
+        self._minute[1].ajouter(cpu)
+        self._minute[2].ajouter(mem)
+
+    def _fusionner_minute(self, debut: float, cpu: float, mem: float):
+        """
+        Ajoute un échantillon à une tranche fermée, créée à sa place dans
+        l'ordre chronologique si elle n'existe pas.
+        """
+        m = self.minutes
+        i = len(m)
+        # Tranches triées par début ; un retard porte sur les plus récentes
+        while i > 0 and m[i - _LARGEUR_MINUTE] > debut:
+            i -= _LARGEUR_MINUTE
+        if i > 0 and m[i - _LARGEUR_MINUTE] == debut:
+            i -= _LARGEUR_MINUTE
+            _, stat_cpu, stat_mem = self._lire_tranche(i)
+        else:
+            stat_cpu = statistiques.StatistiqueFlux()
+            stat_mem = statistiques.StatistiqueFlux()
+            m[i:i] = array("d", [debut] + [0.0] * (_LARGEUR_MINUTE - 1))
+        stat_cpu.ajouter(cpu)
+        stat_mem.ajouter(mem)
+        m[i + 1 : i + _LARGEUR_MINUTE] = array(
+            "d", stat_cpu.etat() + stat_mem.etat()
+        )
+
+    def _lire_tranche(self, i: int):
+        m = self.minutes
+        return (
+            m[i],
+            statistiques.StatistiqueFlux.depuis_resume(
+                int(m[i + 1]), *m[i + 2 : i + 6]
+            ),
+            statistiques.StatistiqueFlux.depuis_resume(
+                int(m[i + 6]), *m[i + 7 : i + 11]
+            ),
+        )
+
+    def _fermer_minute(self):
+        if self._minute is None:
+            return
+        debut, cpu, mem = self._minute
+        self.minutes.append(debut)
+        self.minutes.extend(cpu.etat())
+        self.minutes.extend(mem.etat())
+        self._minute = None
+        # Purge par paquets d'une heure : pas de copie à chaque tranche
+        exces = len(self.minutes) // _LARGEUR_MINUTE - self.retention_minutes
+        if exces >= 60:
+            del self.minutes[: exces * _LARGEUR_MINUTE]
+
+    def tranches(self, depuis: Optional[float], jusqua: Optional[float]):
+        """
+        Agrégats par minute dont le début est dans la période, y compris la
+        tranche en cours.
+
+        Retourne:
+            Iterator[tuple]: (début, StatistiqueFlux CPU, StatistiqueFlux
+            mémoire)
+        """
+        bas = -math.inf if depuis is None else depuis
+        haut = math.inf if jusqua is None else jusqua
+        m = self.minutes
+        for i in range(0, len(m), _LARGEUR_MINUTE):
+            debut = m[i]
+            if bas <= debut <= haut:
+                yield self._lire_tranche(i)
+        if self._minute is not None and bas <= self._minute[0] <= haut:
+            yield tuple(self._minute)
+
+    def couvre(self, depuis: Optional[float]) -> bool:
+        """
+        Vrai si les échantillons récents couvrent la période (ou tous les
+        échantillons reçus).
+        """
+        if len(self.recents) == self.cumul.cpu.nombre:
+            return True
+        plus_ancien = self.recents.plus_ancien()
+        return depuis is not None and plus_ancien is not None and plus_ancien <= depuis
+
+    def contribuer(
+        self,
+        flotte: traitement.AgregateurHistorique,
+        depuis: Optional[float],
+        jusqua: Optional[float],
+    ) -> str:
+        """
+        Ajoute les statistiques de l'hôte sur une période à celles de la
+        flotte.
+
+        Retourne:
+            str: source utilisée ("cumul", "recents" ou "1m").
+        """
+        if depuis is None and jusqua is None:
+            flotte.cpu.fusionner(self.cumul.cpu)
+            flotte.memoire.fusionner(self.cumul.memoire)
+            for nom, stats in self.cumul.debits.items():
+                flotte.debits[nom].fusionner(stats)
+            flotte.fusionner_quantiles(
+                self.cumul.quantiles_cpu, self.cumul.quantiles_memoire
+            )
+            flotte.lignes_invalides += self.cumul.lignes_invalides
+            return "cumul"
+
+        if self.couvre(depuis):
+            debut, fin = self.recents.fenetre(depuis, jusqua)
+            for nom, stats, esquisse in (
+                ("cpu_percent", flotte.cpu, flotte.quantiles_cpu),
+                ("mem_percent", flotte.memoire, flotte.quantiles_memoire),
+            ):
+                for v in self.recents.colonne(nom, debut, fin):
+                    stats.ajouter(v)
+                    esquisse.ajouter(v)
+            for nom in models.CHAMPS_IO:
+                for v in self.recents.colonne(nom, debut, fin):
+                    if not math.isnan(v):
+                        flotte.debits[nom].ajouter(v)
+            return "recents"
+
+        # Au-delà de la fenêtre en mémoire : agrégats par minute (CPU et
+        # mémoire seulement, sans percentiles)
+        for _, cpu, mem in self.tranches(depuis, jusqua):
+            flotte.cpu.fusionner(cpu)
+            flotte.memoire.fusionner(mem)
+        return "1m"
+
+    def pic(
+        self, metrique: str, depuis: Optional[float], jusqua: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Maximum d'une métrique sur une période.
+
+        Retourne:
+            dict | None: {'hostname', 'max', 'epoch', 'moyenne'}, None sans
+            valeur dans la période.
+        """
+        if self.couvre(depuis) or metrique not in ("cpu_percent", "mem_percent"):
+            debut, fin = self.recents.fenetre(depuis, jusqua)
+            valeurs = self.recents.colonne(metrique, debut, fin)
+            horodatages = self.recents.colonne("timestamp", debut, fin)
+            stats = statistiques.StatistiqueFlux()
+            maximum, instant = None, None
+            for v, t in zip(valeurs, horodatages):
+                if math.isnan(v):
+                    continue
+                stats.ajouter(v)
+                if maximum is None or v > maximum:
+                    maximum, instant = v, t
+            if maximum is None:
+                return None
+            moyenne = stats.moyenne
+        else:
+            # Au-delà de la fenêtre en mémoire : agrégats par minute
+            index = 1 if metrique == "cpu_percent" else 2
+            stats = statistiques.StatistiqueFlux()
+            maximum, instant = None, None
+            for tranche in self.tranches(depuis, jusqua):
+                stats.fusionner(tranche[index])
+                if maximum is None or tranche[index].max > maximum:
+                    maximum, instant = tranche[index].max, tranche[0]
+            if maximum is None:
+                return None
+            moyenne = stats.moyenne
+        return {
+            "hostname": self.hostname,
+            "max": maximum,
+            "epoch": instant,
+            "moyenne": moyenne,
+        }
+
+
+# --- Serveur ------------------------------------------------------------------
+
+
+class ServeurAgregation:
+    """
+    Serveur asyncio des agents d'une flotte.
+
+    Utilisation:
+        serveur = ServeurAgregation("0.0.0.0:7878")
+        serveur.executer()     # jusqu'à Ctrl+C
+
+    ou, dans une boucle asyncio existante :
+        await serveur.demarrer()
+        ...
+        await serveur.fermer()
+    """
+
+    def __init__(
+        self,
+        adresse: str = ADRESSE_DEFAUT,
+        fenetre: int = FENETRE_HOTE,
+        retention_minutes: int = RETENTION_MINUTES,
+    ):
+        """
+        Args:
+            adresse (str): adresse d'écoute (voir analyser_adresse).
+            fenetre (int): échantillons récents gardés par hôte.
+            retention_minutes (int): agrégats par minute gardés par hôte.
+        """
+        self.adresse = adresse
+        self.fenetre = fenetre
+        self.retention_minutes = retention_minutes
+        self.hotes = {}
+        self._serveur = None
+
+        self.connexions = 0
+        self.messages = 0
+        self.echantillons = 0
+        self.erreurs = 0
+        self.duree_lot = statistiques.StatistiqueFlux()
+
+    # --- Cycle de vie ---------------------------------------------------------
+
+    async def demarrer(self):
+        """
+        Ouvre l'écoute.
+
+        Lève:
+            OSError: adresse déjà utilisée ou indisponible.
+        """
+        famille, cible = analyser_adresse(self.adresse)
+        if famille == "unix":
+            if os.path.exists(cible):
+                # Socket laissé par un serveur arrêté brutalement
+                try:
+                    interroger(self.adresse, {"requete": "serveur"}, delai=1.0)
+                except ServeurIndisponible:
+                    os.remove(cible)
+                else:
+                    raise OSError(f"Un serveur répond déjà sur {cible}")
+            self._serveur = await asyncio.start_unix_server(
+                self._connexion, cible, limit=TAILLE_MAX_MESSAGE
+            )
+        else:
+            self._serveur = await asyncio.start_server(
+                self._connexion, *cible, limit=TAILLE_MAX_MESSAGE
+            )
+
+    async def fermer(self):
+        """
+        Arrête l'écoute (les connexions en cours se terminent).
+        """
+        if self._serveur is None:
+            return
+        self._serveur.close()
+        await self._serveur.wait_closed()
+        self._serveur = None
+        famille, cible = analyser_adresse(self.adresse)
+        if famille == "unix":
+            try:
+                os.remove(cible)
+            except FileNotFoundError:
+                pass
+
+    async def servir(self):
+        """
+        Démarre puis sert jusqu'à l'annulation de la tâche.
+        """
+        await self.demarrer()
+        try:
+            await self._serveur.serve_forever()
+        finally:
+            await self.fermer()
+
+    def executer(self):
+        """
+        Sert jusqu'à Ctrl+C.
+        """
+        try:
+            asyncio.run(self.servir())
+        except KeyboardInterrupt:
+            pass
+
+    # --- Connexions -----------------------------------------------------------
+
+    async def _connexion(self, lecteur, ecrivain):
+        self.connexions += 1
+        champs = CHAMPS_LOT
+        hotes = set()
+        try:
+            while True:
+                try:
+                    brut = await lecteur.readline()
+                except (ValueError, ConnectionError):
+                    # Message trop long ou connexion coupée
+                    self.erreurs += 1
+                    break
+                if not brut:
+                    break
+                try:
+                    message = json.loads(brut)
+                except ValueError:
+                    self.erreurs += 1
+                    continue
+                self.messages += 1
+
+                if "lignes" in message:
+                    self._recevoir_lot(message, champs, hotes)
+                elif "bonjour" in message:
+                    champs = message.get("champs") or CHAMPS_LOT
+                    if message.get("format") == "trames":
+                        await self._recevoir_trames(lecteur, hotes)
+                        break
+                elif "requete" in message:
+                    ecrivain.write(_encoder(self.traiter(message)))
+                    await ecrivain.drain()
+                else:
+                    self.erreurs += 1
+        finally:
+            self.connexions -= 1
+            for nom in hotes:
+                self.hotes[nom].connexions -= 1
+            ecrivain.close()
+            try:
+                await ecrivain.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _recevoir_lot(self, message: Dict[str, Any], champs: List[str], hotes: set):
+        nom = message.get("hote")
+        lignes = message.get("lignes")
+        if not isinstance(nom, str) or not isinstance(lignes, list):
+            self.erreurs += 1
+            return
+        echantillons = []
+        for ligne in lignes:
+            try:
+                valeurs = dict(zip(champs, ligne))
+            except TypeError:
+                self.erreurs += 1
+                continue
+            valeurs["hostname"] = nom
+            echantillons.append(valeurs)
+        self._ingerer(nom, echantillons, hotes)
+
+    async def _recevoir_trames(self, lecteur, hotes: set):
+        """
+        Lit le flux de trames binaires d'un agent jusqu'à sa fermeture.
+        """
+        decodeur = trames.Decodeur()
+        while True:
+            try:
+                entete = await lecteur.readexactly(trames.ENTETE.size)
+                longueur = decodeur.longueur(entete)
+                if longueur > TAILLE_MAX_MESSAGE:
+                    raise trames.TrameInvalide("Trame trop longue.")
+                trame = entete + await lecteur.readexactly(
+                    longueur - trames.ENTETE.size
+                )
+                echantillons = decodeur.decoder(trame)
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    self.erreurs += 1
+                return
+            except (trames.TrameInvalide, ConnectionError):
+                # Flux désynchronisé : la connexion est fermée, l'agent se
+                # reconnecte avec un nouveau dictionnaire
+                self.erreurs += 1
+                return
+            self.messages += 1
+            par_hote = {}
+            for data in echantillons:
+                valeurs = valeurs_echantillon(data)
+                par_hote.setdefault(valeurs["hostname"], []).append(valeurs)
+            for nom, valeurs in par_hote.items():
+                self._ingerer(nom, valeurs, hotes)
+
+    def _ingerer(self, nom: str, echantillons: List[Dict[str, Any]], hotes: set):
+        """
+        Intègre les échantillons décodés d'un hôte reçus sur une connexion
+        (hotes : hôtes déjà vus sur cette connexion).
+        """
+        debut = time.perf_counter()
+        hote = self.hotes.get(nom)
+        if hote is None:
+            hote = EtatHote(nom, self.fenetre, self.retention_minutes)
+            self.hotes[nom] = hote
+        if nom not in hotes:
+            hotes.add(nom)
+            hote.connexions += 1
+        for valeurs in echantillons:
+            try:
+                hote.ajouter(valeurs)
+            except (TypeError, ValueError):
+                self.erreurs += 1
+        self.echantillons += len(echantillons)
+        hote.dernier_contact = time.time()
+        self.duree_lot.ajouter((time.perf_counter() - debut) * 1000)
+
+    # --- Requêtes -------------------------------------------------------------
+
+    def traiter(self, requete: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Traite une requête décodée et retourne la réponse.
+        """
+        nom = requete.get("requete")
+        traitements = {
+            "hotes": self._hotes,
+            "stats": self._stats,
+            "pics": self._pics,
+            "serveur": self._etat_serveur,
+        }
+        if nom not in traitements:
+            return {"ok": False, "erreur": f"requête inconnue : {nom}"}
+        try:
+            return {"ok": True, "resultat": traitements[nom](requete)}
+        except (TypeError, ValueError, KeyError) as e:
+            return {"ok": False, "erreur": str(e)}
+
+    def _choisir(self, requete: Dict[str, Any]) -> List[EtatHote]:
+        hote = requete.get("hote")
+        if hote is None:
+            return list(self.hotes.values())
+        return [self.hotes[hote]] if hote in self.hotes else []
+
+    def _hotes(self, requete: Dict[str, Any]):
+        resultat = []
+        for hote in self.hotes.values():
+            dernier = hote.dernier_echantillon or {}
+            resultat.append(
+                {
+                    "hostname": hote.hostname,
+                    "connecte": hote.connexions > 0,
+                    "echantillons": hote.cumul.cpu.nombre,
+                    "dernier_contact": hote.dernier_contact,
+                    "timestamp": dernier.get("timestamp"),
+                    "cpu_percent": dernier.get("cpu_percent"),
+                    "mem_percent": dernier.get("mem_percent"),
+                }
+            )
+        return sorted(resultat, key=lambda h: h["hostname"])
+
+    def _stats(self, requete: Dict[str, Any]):
+        depuis = requete.get("depuis")
+        jusqua = requete.get("jusqua")
+        flotte = traitement.AgregateurHistorique()
+        sources = {}
+        hotes = self._choisir(requete)
+        for hote in hotes:
+            source = hote.contribuer(flotte, depuis, jusqua)
+            sources[source] = sources.get(source, 0) + 1
+        resume = flotte.resume()
+        resume["hotes"] = len(hotes)
+        resume["sources"] = sources
+        return resume
+
+    def _pics(self, requete: Dict[str, Any]):
+        metrique = requete.get("metrique", "cpu_percent")
+        if metrique not in tampon_circulaire.COLONNES or metrique == "timestamp":
+            raise ValueError(f"Métrique inconnue : {metrique}")
+        nombre = int(requete.get("nombre", 10))
+        pics = []
+        for hote in self._choisir(requete):
+            pic = hote.pic(metrique, requete.get("depuis"), requete.get("jusqua"))
+            if pic is not None:
+                pics.append(pic)
+        pics.sort(key=lambda p: p["max"], reverse=True)
+        return pics[:nombre]
+
+    def _etat_serveur(self, requete: Dict[str, Any]):
+        return {
+            "hotes": len(self.hotes),
+            "connexions": self.connexions,
+            "messages": self.messages,
+            "echantillons": self.echantillons,
+            "erreurs": self.erreurs,
+            "duree_lot_ms": {
+                "moyenne": self.duree_lot.moyenne,
+                "max": self.duree_lot.max,
+            },
+            "cpu_s": time.process_time(),
+        }
+
+
+# --- Agents simulés -----------------------------------------------------------
+
+
+def _instantane_simule(
+    hasard: random.Random, systeme: Dict[str, Any], cpu: float, mem: float, total: int
+) -> models.Snapshot:
+    disque = 256 * 1024 ** 3
+    return models.Snapshot(
+        historique.epoch_vers_horodatage(time.time()),
+        systeme,
+        models.CpuSample(
+            round(cpu, 1),
+            4,
+            8,
+            [round(min(100.0, max(0.0, hasard.gauss(cpu, 10))), 1) for _ in range(8)],
+        ),
+        models.MemSample(total, int(total * (1 - mem / 100)), round(mem, 1)),
+        [models.DiskSample("/", disque, disque // 2, 50.0)],
+        io_disques=[
+            models.DiskIOSample(
+                "sda",
+                hasard.uniform(0, 1e6),
+                hasard.uniform(0, 5e6),
+                hasard.uniform(0, 100),
+                hasard.uniform(0, 400),
+            )
+        ],
+        io_reseau=[
+            models.NetIOSample(
+                "eth0",
+                hasard.uniform(0, 1e5),
+                hasard.uniform(0, 1e5),
+                hasard.uniform(0, 100),
+                hasard.uniform(0, 100),
+            ),
+            models.NetIOSample("lo", 0.0, 0.0, 0.0, 0.0, boucle=True),
+        ],
+    )
+
+
+async def _agent_simule(
+    adresse: str,
+    hostname: str,
+    echantillons: int,
+    intervalle: float,
+    taille_lot: int,
+    format_lots: str,
+    graine: int,
+):
+    famille, cible = analyser_adresse(adresse)
+    if famille == "unix":
+        lecteur, ecrivain = await asyncio.open_unix_connection(cible)
+    else:
+        lecteur, ecrivain = await asyncio.open_connection(*cible)
+    hasard = random.Random(graine)
+    systeme = {
+        "os": "Linux",
+        "version": "simulé",
+        "architecture": "x86_64",
+        "hostname": hostname,
+    }
+    cpu = hasard.uniform(5, 60)
+    mem = hasard.uniform(20, 80)
+    total = hasard.choice((8, 16, 32, 64)) * 1024 ** 3
+    encodeur = trames.Encodeur()
+    octets = 0
+    # Départs étalés sur un intervalle, comme des agents indépendants
+    await asyncio.sleep(hasard.uniform(0, intervalle))
+    ecrivain.write(message_bonjour(format_lots))
+
+    lot = []
+    prochain = time.monotonic()
+    for numero in range(echantillons):
+        cpu = min(100.0, max(0.0, cpu + hasard.gauss(0, 5)))
+        mem = min(100.0, max(0.0, mem + hasard.gauss(0, 1)))
+        lot.append(_instantane_simule(hasard, systeme, cpu, mem, total))
+        if len(lot) >= taille_lot or numero == echantillons - 1:
+            if format_lots == "trames":
+                message = encodeur.encoder(lot)
+            else:
+                message = messages_lot(lot)
+            octets += len(message)
+            ecrivain.write(message)
+            await ecrivain.drain()
+            lot = []
+        prochain += intervalle
+        await asyncio.sleep(max(0.0, prochain - time.monotonic()))
+    ecrivain.close()
+    await ecrivain.wait_closed()
+    return octets
+
+
+async def simuler_agents(
+    adresse: str,
+    nombre: int,
+    echantillons: int,
+    intervalle: float = 1.0,
+    taille_lot: int = 1,
+    format_lots: str = "json",
+) -> int:
+    """
+    Agents de substitution pour tester un serveur : chaque agent ouvre sa
+    connexion et envoie des échantillons synthétiques (marche aléatoire) au
+    rythme d'un agent réel.
+
+    Args:
+        adresse (str): adresse du serveur.
+        nombre (int): nombre d'agents (hôtes agent-000, agent-001...).
+        echantillons (int): échantillons envoyés par agent.
+        intervalle (float): secondes entre deux échantillons d'un agent.
+        taille_lot (int): échantillons par message.
+        format_lots (str): encodage des lots (FORMATS).
+
+    Retourne:
+        int: octets envoyés par l'ensemble des agents (hors bonjour).
+    """
+    octets = await asyncio.gather(
+        *(
+            _agent_simule(
+                adresse,
+                f"agent-{i:03d}",
+                echantillons,
+                intervalle,
+                taille_lot,
+                format_lots,
+                i,
+            )
+            for i in range(nombre)
+        )
+    )
+    return sum(octets)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module statistiques - statistiques en flux et en mémoire constante.
+"""
+
+import math
+from typing import Dict, Any, Iterable, Optional
+
+# Précision des esquisses de quantiles : erreur de rang de l'ordre de
+# 1.7 / K_ESQUISSE (environ 1% pour K = 200), quel que soit le nombre de
+# valeurs.
+K_ESQUISSE = 200
+
+
+class StatistiqueFlux:
+    """
+    Statistiques d'une métrique calculées en une seule passe, en mémoire
+    constante (moyenne et variance par l'algorithme de Welford).
+    """
+
+    def __init__(self):
+        self.nombre = 0
+        self.moyenne = None
+        self.min = None
+        self.max = None
+        self.m2 = 0.0
+
+    def ajouter(self, valeur: float):
+        """
+        Intègre une nouvelle valeur.
+
+        Args:
+            valeur (float): valeur observée.
+        """
+        self.nombre += 1
+        if self.nombre == 1:
+            self.moyenne = valeur
+            self.min = valeur
+            self.max = valeur
+            return
+
+        delta = valeur - self.moyenne
+        self.moyenne += delta / self.nombre
+        self.m2 += delta * (valeur - self.moyenne)
+        if valeur < self.min:
+            self.min = valeur
+        if valeur > self.max:
+            self.max = valeur
+
+    def fusionner(self, autre: "StatistiqueFlux"):
+        """
+        Intègre les statistiques d'une autre série (formule de Chan), sans
+        revenir aux valeurs brutes.
+
+        Args:
+            autre (StatistiqueFlux): statistiques à fusionner.
+        """
+        if autre.nombre == 0:
+            return
+        if self.nombre == 0:
+            self.nombre = autre.nombre
+            self.moyenne = autre.moyenne
+            self.min = autre.min
+            self.max = autre.max
+            self.m2 = autre.m2
+            return
+
+        total = self.nombre + autre.nombre
+        delta = autre.moyenne - self.moyenne
+        self.moyenne += delta * autre.nombre / total
+        self.m2 += autre.m2 + delta * delta * self.nombre * autre.nombre / total
+        self.nombre = total
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+
+    @classmethod
+    def depuis_resume(
+        cls, nombre: int, moyenne: float, minimum: float, maximum: float, m2: float
+    ) -> "StatistiqueFlux":
+        """
+        Reconstruit des statistiques à partir de leur résumé.
+        """
+        stat = cls()
+        if nombre:
+            stat.nombre = nombre
+            stat.moyenne = moyenne
+            stat.min = minimum
+            stat.max = maximum
+            stat.m2 = m2
+        return stat
+
+    def etat(self) -> list:
+        """
+        Résumé sérialisable, à relire avec depuis_resume(*etat).
+
+        Retourne:
+            list: [nombre, moyenne, min, max, m2]
+        """
+        return [self.nombre, self.moyenne, self.min, self.max, self.m2]
+
+    @property
+    def variance(self) -> Optional[float]:
+        """
+        Variance de population (None si aucune valeur).
+        """
+        if self.nombre == 0:
+            return None
+        return self.m2 / self.nombre
+
+    def resultat(self) -> Dict[str, Any]:
+        """
+        Retourne:
+            dict: {
+                'moyenne': float, 'min': float, 'max': float,
+                'variance': float, 'ecart_type': float, 'nombre': int
+            }
+        """
+        variance = self.variance
+        return {
+            "moyenne": self.moyenne,
+            "min": self.min,
+            "max": self.max,
+            "variance": variance,
+            "ecart_type": math.sqrt(variance) if variance is not None else None,
+            "nombre": self.nombre,
+        }
+
+
+class EsquisseQuantiles:
+    """
+    Esquisse de quantiles KLL : quantiles approchés d'une série de taille
+    quelconque, en mémoire bornée (quelques centaines de valeurs).
+
+    Les valeurs sont rangées par niveaux ; quand un niveau est plein, il est
+    trié et une valeur sur deux passe au niveau suivant, où elle compte
+    double. Deux esquisses se fusionnent niveau par niveau, sans revenir aux
+    valeurs brutes (segments, hôtes ou tranches d'agrégats).
+    """
+
+    def __init__(self, k: int = K_ESQUISSE):
+        """
+        Args:
+            k (int): capacité du niveau le plus haut (précision).
+        """
+        self.k = k
+        self.nombre = 0
+        self.niveaux = [[]]
+        self._taille = 0
+        self._taille_max = self._capacite(0)
+        # Alterne les valeurs conservées (paires/impaires) à chaque compactage
+        self._decalage = 0
+
+    def _capacite(self, niveau: int) -> int:
+        profondeur = len(self.niveaux) - niveau - 1
+        return int(math.ceil(self.k * (2 / 3) ** profondeur)) + 1
+
+    def _ajouter_niveau(self):
+        self.niveaux.append([])
+        self._taille_max = sum(self._capacite(h) for h in range(len(self.niveaux)))
+
+    def ajouter(self, valeur: float):
+        """
+        Intègre une nouvelle valeur.
+
+        Args:
+            valeur (float): valeur observée.
+        """
+        self.niveaux[0].append(valeur)
+        self.nombre += 1
+        self._taille += 1
+        if self._taille >= self._taille_max:
+            self._compacter()
+
+    def _compacter(self):
+        while self._taille >= self._taille_max:
+            for h, niveau in enumerate(self.niveaux):
+                if len(niveau) < self._capacite(h):
+                    continue
+                if h + 1 == len(self.niveaux):
+                    self._ajouter_niveau()
+                niveau.sort()
+                # Un élément reste sur place si le nombre est impair
+                reste = [niveau.pop()] if len(niveau) % 2 else []
+                self.niveaux[h + 1].extend(niveau[self._decalage :: 2])
+                self._decalage ^= 1
+                self.niveaux[h] = reste
+                self._taille = sum(len(n) for n in self.niveaux)
+                break
+
+    def fusionner(self, autre: "EsquisseQuantiles"):
+        """
+        Intègre une autre esquisse.
+
+        Args:
+            autre (EsquisseQuantiles): esquisse à fusionner.
+        """
+        while len(self.niveaux) < len(autre.niveaux):
+            self._ajouter_niveau()
+        for h, niveau in enumerate(autre.niveaux):
+            self.niveaux[h].extend(niveau)
+        self.nombre += autre.nombre
+        self._taille = sum(len(n) for n in self.niveaux)
+        if self._taille >= self._taille_max:
+            self._compacter()
+
+    def quantiles(self, rangs: Iterable[float]) -> Dict[float, Optional[float]]:
+        """
+        Quantiles approchés.
+
+        Args:
+            rangs (Iterable[float]): percentiles voulus, entre 0 et 100.
+
+        Retourne:
+            dict: rang -> valeur (None si l'esquisse est vide).
+        """
+        rangs = list(rangs)
+        ponderees = sorted(
+            (valeur, 1 << h)
+            for h, niveau in enumerate(self.niveaux)
+            for valeur in niveau
+        )
+        if not ponderees:
+            return {rang: None for rang in rangs}
+
+        total = sum(poids for _, poids in ponderees)
+        resultats = {}
+        for rang in sorted(rangs):
+            cible = rang / 100 * total
+            cumul = 0
+            for valeur, poids in ponderees:
+                cumul += poids
+                if cumul >= cible:
+                    break
+            resultats[rang] = valeur
+        return {rang: resultats[rang] for rang in rangs}
+
+    def etat(self) -> Dict[str, Any]:
+        """
+        Résumé sérialisable en JSON, à relire avec depuis_etat().
+        """
+        return {"k": self.k, "nombre": self.nombre, "niveaux": self.niveaux}
+
+    @classmethod
+    def depuis_etat(cls, etat: Dict[str, Any]) -> "EsquisseQuantiles":
+        """
+        Reconstruit une esquisse à partir de etat().
+        """
+        esquisse = cls(etat["k"])
+        esquisse.niveaux = [list(niveau) for niveau in etat["niveaux"]] or [[]]
+        esquisse.nombre = etat["nombre"]
+        esquisse._taille = sum(len(n) for n in esquisse.niveaux)
+        esquisse._taille_max = sum(
+            esquisse._capacite(h) for h in range(len(esquisse.niveaux))
+        )
+        return esquisse
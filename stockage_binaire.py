@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module stockage_binaire - historique SysWatch en colonnes binaires.
+
+Alternative compacte à syswatch_history.csv : un répertoire contenant un
+fichier par colonne, en ajout seul, de largeur fixe (float64 ou uint32, ordre
+d'octets natif). Les colonnes peuvent être projetées en mémoire (mmap) et lues
+sans copie ni analyse de texte.
+
+    syswatch_history.col/
+        timestamp.f64          secondes depuis l'epoch
+        cpu_percent.f64
+        mem_total_gb.f64
+        mem_dispo_gb.f64
+        mem_percent.f64
+        disk_root_percent.f64  NaN si la partition "/" est absente
+        disk_read_bps.f64 ...  débits de l'hôte (models.CHAMPS_IO), NaN si
+                               inconnus
+        hostname.u32           index dans hotes.txt
+        hotes.txt              un nom d'hôte par ligne
+"""
+
+import csv
+import math
+import mmap
+import os
+import time
+from array import array
+from typing import Dict, Any, List, Optional
+
+import historique
+import models
+
+# (nom de colonne, code de type array, extension)
+COLONNES_BINAIRES = [
+    ("timestamp", "d", "f64"),
+    ("cpu_percent", "d", "f64"),
+    ("mem_total_gb", "d", "f64"),
+    ("mem_dispo_gb", "d", "f64"),
+    ("mem_percent", "d", "f64"),
+    ("disk_root_percent", "d", "f64"),
+    ("hostname", "I", "u32"),
+] + [(nom, "d", "f64") for nom in models.CHAMPS_IO]
+
+# Valeurs écrites par bloc lors du remplissage d'une colonne ajoutée
+TAILLE_BLOC_REMPLISSAGE = 65536
+
+FICHIER_HOTES = "hotes.txt"
+
+
+def _chemin_colonne(repertoire: str, nom: str, extension: str) -> str:
+    return os.path.join(repertoire, f"{nom}.{extension}")
+
+
+def _lire_hotes(repertoire: str) -> List[str]:
+    try:
+        with open(
+            os.path.join(repertoire, FICHIER_HOTES), mode="r", encoding="utf-8"
+        ) as f:
+            return [ligne.rstrip("\n") for ligne in f]
+    except FileNotFoundError:
+        return []
+
+
+def _vers_float(valeur) -> float:
+    """
+    Convertit une valeur CSV en float, NaN si elle est vide ou invalide.
+    """
+    if valeur is None or valeur == "":
+        return math.nan
+    try:
+        return float(valeur)
+    except ValueError:
+        return math.nan
+
+
+class EcrivainBinaire:
+    """
+    Écrivain en ajout seul pour le stockage en colonnes.
+
+    Comme EcrivainHistorique, les lignes sont tamponnées puis écrites en bloc
+    (nombre de lignes, délai, ou fermeture). À l'ouverture, les colonnes sont
+    ramenées à la même longueur pour réparer un vidage interrompu, et les
+    colonnes absentes d'un stockage plus ancien sont créées remplies de NaN.
+    """
+
+    def __init__(
+        self,
+        repertoire: str,
+        lignes_max: int = 100,
+        delai_max: float = 5.0,
+    ):
+        """
+        Args:
+            repertoire (str): répertoire du stockage (créé si besoin).
+            lignes_max (int): nombre de lignes en attente déclenchant un vidage.
+            delai_max (float): secondes maximum entre deux vidages.
+        """
+        self.repertoire = repertoire
+        self.lignes_max = lignes_max
+        self.delai_max = delai_max
+
+        os.makedirs(repertoire, exist_ok=True)
+        self._reparer()
+
+        self._hotes = {nom: i for i, nom in enumerate(_lire_hotes(repertoire))}
+        self._f_hotes = open(
+            os.path.join(repertoire, FICHIER_HOTES), mode="a", encoding="utf-8"
+        )
+
+        self._tampons = {nom: array(code) for nom, code, _ in COLONNES_BINAIRES}
+        self._fichiers = {
+            nom: open(_chemin_colonne(repertoire, nom, ext), mode="ab")
+            for nom, _, ext in COLONNES_BINAIRES
+        }
+        self._en_attente = 0
+        self._dernier_vidage = time.monotonic()
+
+    def _reparer(self):
+        """
+        Tronque toutes les colonnes à la longueur de la plus courte, et
+        complète de NaN les colonnes absentes.
+        """
+        longueurs = {}
+        absentes = []
+        for nom, code, ext in COLONNES_BINAIRES:
+            chemin = _chemin_colonne(self.repertoire, nom, ext)
+            if os.path.exists(chemin):
+                longueurs[chemin] = (os.path.getsize(chemin), array(code).itemsize)
+            else:
+                absentes.append(chemin)
+
+        nombre = min(
+            (taille // largeur for taille, largeur in longueurs.values()), default=0
+        )
+        for chemin, (taille, largeur) in longueurs.items():
+            if taille != nombre * largeur:
+                with open(chemin, mode="ab") as f:
+                    f.truncate(nombre * largeur)
+
+        bloc = array("d", [math.nan]) * TAILLE_BLOC_REMPLISSAGE
+        for chemin in absentes:
+            with open(chemin, mode="wb") as f:
+                reste = nombre
+                while reste > 0:
+                    bloc[: min(reste, len(bloc))].tofile(f)
+                    reste -= len(bloc)
+
+    def _index_hote(self, hostname: str) -> int:
+        index = self._hotes.get(hostname)
+        if index is None:
+            index = len(self._hotes)
+            self._hotes[hostname] = index
+            # Le dictionnaire d'hôtes est écrit avant les lignes qui s'y réfèrent.
+            self._f_hotes.write(hostname + "\n")
+            self._f_hotes.flush()
+            os.fsync(self._f_hotes.fileno())
+        return index
+
+    def ajouter_ligne(self, row: Dict[str, Any]):
+        """
+        Ajoute une ligne au format CSV d'historique (voir CHAMPS_CSV).
+
+        Args:
+            row (dict): ligne issue de metriques_vers_ligne() ou d'un DictReader.
+        """
+        try:
+            epoch = historique.horodatage_vers_epoch(row.get("timestamp") or "")
+        except ValueError:
+            epoch = math.nan
+
+        t = self._tampons
+        t["timestamp"].append(epoch)
+        t["cpu_percent"].append(_vers_float(row.get("cpu_percent")))
+        t["mem_total_gb"].append(_vers_float(row.get("mem_total_gb")))
+        t["mem_dispo_gb"].append(_vers_float(row.get("mem_dispo_gb")))
+        t["mem_percent"].append(_vers_float(row.get("mem_percent")))
+        t["disk_root_percent"].append(_vers_float(row.get("disk_root_percent")))
+        t["hostname"].append(self._index_hote(row.get("hostname") or ""))
+        for nom in models.CHAMPS_IO:
+            t[nom].append(_vers_float(row.get(nom)))
+        self._en_attente += 1
+
+        if (
+            self._en_attente >= self.lignes_max
+            or time.monotonic() - self._dernier_vidage >= self.delai_max
+        ):
+            self.vider()
+
+    def ajouter(self, metriques):
+        """
+        Ajoute un échantillon.
+
+        Args:
+            metriques (models.Snapshot | dict): instantané retourné par
+                collecter_instantane(), ou dictionnaire de collecter_tout()
+        """
+        self.ajouter_ligne(historique.metriques_vers_ligne(metriques))
+
+    def vider(self):
+        """
+        Écrit les lignes en attente dans chaque colonne et synchronise.
+        """
+        if self._en_attente:
+            for nom, _, _ in COLONNES_BINAIRES:
+                f = self._fichiers[nom]
+                self._tampons[nom].tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+                del self._tampons[nom][:]
+            self._en_attente = 0
+        self._dernier_vidage = time.monotonic()
+
+    def fermer(self):
+        """
+        Vide les lignes en attente et ferme les fichiers.
+        """
+        if self._f_hotes.closed:
+            return
+        try:
+            self.vider()
+        finally:
+            for f in self._fichiers.values():
+                f.close()
+            self._f_hotes.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+
+class ColonnesBinaires:
+    """
+    Vue en lecture seule, sans copie, d'un stockage en colonnes.
+
+    Attributs:
+        colonnes (dict[str, memoryview]): une vue typée par colonne.
+        hotes (list[str]): dictionnaire des noms d'hôtes.
+        nombre (int): nombre de lignes complètes.
+
+    Les vues ne sont valides que tant que l'objet n'est pas fermé.
+    """
+
+    def __init__(self, repertoire: str):
+        self.repertoire = repertoire
+        self.hotes = _lire_hotes(repertoire)
+        self._maps = []
+
+        vues = {}
+        absentes = []
+        for nom, code, ext in COLONNES_BINAIRES:
+            vue = self._projeter(_chemin_colonne(repertoire, nom, ext), code)
+            if vue is None:
+                absentes.append(nom)
+            else:
+                vues[nom] = vue
+
+        # Un vidage interrompu peut laisser des colonnes plus longues :
+        # seules les lignes présentes dans toutes les colonnes comptent.
+        self.nombre = min((len(v) for v in vues.values()), default=0)
+        # Colonnes d'une version plus récente, pas encore créées par un
+        # écrivain : valeurs inconnues
+        for nom in absentes:
+            vues[nom] = memoryview(array("d", [math.nan]) * self.nombre)
+        self.colonnes = {nom: v[: self.nombre] for nom, v in vues.items()}
+        self._vues = list(vues.values())
+
+    def _projeter(self, chemin: str, code: str) -> Optional[memoryview]:
+        largeur = array(code).itemsize
+        try:
+            with open(chemin, mode="rb") as f:
+                taille = os.fstat(f.fileno()).st_size
+                utile = taille - taille % largeur
+                if utile == 0:
+                    return memoryview(b"").cast("B").cast(code)
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        self._maps.append(m)
+        return memoryview(m)[:utile].cast("B").cast(code)
+
+    def fermer(self):
+        """
+        Libère les vues et les projections mémoire.
+        """
+        for v in list(self.colonnes.values()) + self._vues:
+            v.release()
+        self.colonnes = {}
+        self._vues = []
+        for m in self._maps:
+            m.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+
+def ouvrir_colonnes(repertoire: str) -> ColonnesBinaires:
+    """
+    Ouvre un stockage en colonnes en lecture, sans copie.
+
+    Args:
+        repertoire (str): répertoire du stockage.
+
+    Retourne:
+        ColonnesBinaires: à utiliser de préférence avec "with".
+    """
+    return ColonnesBinaires(repertoire)
+
+
+def exporter_binaire(metriques, repertoire: str):
+    """
+    Ajoute les métriques au stockage en colonnes.
+
+    Args:
+        metriques (models.Snapshot | dict): instantané retourné par
+            collecter_instantane(), ou dictionnaire de collecter_tout()
+        repertoire (str): répertoire du stockage
+    """
+    with EcrivainBinaire(repertoire) as ecrivain:
+        ecrivain.ajouter(metriques)
+
+
+def csv_vers_binaire(fichier_csv: str, repertoire: str) -> int:
+    """
+    Ajoute le contenu d'un CSV d'historique au stockage en colonnes.
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV.
+        repertoire (str): répertoire du stockage.
+
+    Retourne:
+        int: nombre de lignes converties.
+    """
+    nombre = 0
+    with open(fichier_csv, mode="r", encoding="utf-8", newline="") as f:
+        with EcrivainBinaire(repertoire, lignes_max=10000) as ecrivain:
+            for row in csv.DictReader(f):
+                ecrivain.ajouter_ligne(row)
+                nombre += 1
+    return nombre
+
+
+def binaire_vers_csv(repertoire: str, fichier_csv: str) -> int:
+    """
+    Écrit le contenu du stockage en colonnes dans un CSV d'historique.
+
+    Args:
+        repertoire (str): répertoire du stockage.
+        fichier_csv (str): chemin du fichier CSV (écrasé).
+
+    Retourne:
+        int: nombre de lignes écrites.
+    """
+    with ouvrir_colonnes(repertoire) as store:
+        c = store.colonnes
+        with open(fichier_csv, mode="w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=historique.CHAMPS_CSV)
+            writer.writeheader()
+            for i in range(store.nombre):
+                epoch = c["timestamp"][i]
+                disque = c["disk_root_percent"][i]
+                writer.writerow(
+                    {
+                        "timestamp": ""
+                        if math.isnan(epoch)
+                        else historique.epoch_vers_horodatage(epoch),
+                        "hostname": store.hotes[c["hostname"][i]],
+                        "cpu_percent": c["cpu_percent"][i],
+                        "mem_total_gb": c["mem_total_gb"][i],
+                        "mem_dispo_gb": c["mem_dispo_gb"][i],
+                        "mem_percent": c["mem_percent"][i],
+                        "disk_root_percent": "" if math.isnan(disque) else disque,
+                        **{
+                            nom: "" if math.isnan(c[nom][i]) else c[nom][i]
+                            for nom in models.CHAMPS_IO
+                        },
+                    }
+                )
+        return store.nombre
@@ -6,16 +6,42 @@ SysWatch v3.0 - Export, collecte continue et statistiques.
 """
 
 import argparse
+import asyncio
+import contextlib
 import csv
-import json
-import os
+import math
+import sys
 import time
 
+import agregats
+import analyse_vectorielle
 import collector
+import demon
+import episodes
+import exporteurs
+import historique
+import models
+import ordonnanceur
+import processus
+import serveur
+import tableau_bord
 import traitement
 
 HISTORIQUE_CSV = "syswatch_history.csv"
+HISTORIQUE_BINAIRE = "syswatch_history.col"
+
+# Rotation par défaut du CSV actif
+ROTATION_TAILLE_MO = 16
+ROTATION_COMPRESSION = "gzip"
 DERNIER_JSON = "syswatch_last.json"
+HISTORIQUE_LIGNE = "syswatch_history.lp"
+DERNIER_EMPLACEMENT = "syswatch_last.slot"
+JOURNAL_PROCESSUS = "syswatch_processus.jsonl"
+
+# Épisodes de surcharge : entrée au-dessus de SEUIL_ENTREE, sortie sous
+# SEUIL_SORTIE (CPU et mémoire, en %)
+SEUIL_ENTREE = 80.0
+SEUIL_SORTIE = 70.0
 
 
 def octets_vers_go(octets):
@@ -28,8 +54,20 @@ def octets_vers_go(octets):
     Retourne:
         str: taille formatée, ex: "16.00 GB"
     """
-    go = octets / (1024 ** 3)
-    return f"{go:.2f} GB"
+    return f"{octets / models.OCTETS_PAR_GO:.2f} GB"
+
+
+def octets_vers_debit(octets):
+    """
+    Convertit un débit en octets par seconde en mégaoctets formatés.
+
+    Args:
+        octets (float): débit en octets par seconde
+
+    Retourne:
+        str: débit formaté, ex: "12.50 MB/s"
+    """
+    return f"{octets / 1024 ** 2:.2f} MB/s"
 
 
 def afficher_infos_systeme(data_systeme):
@@ -47,53 +85,105 @@ def afficher_infos_systeme(data_systeme):
     print()
 
 
-def afficher_cpu(data_cpu):
+def afficher_cpu(cpu):
     """
     Affiche les informations CPU.
 
     Args:
-        data_cpu (dict): dictionnaire retourné par collecter_cpu()
+        cpu (models.CpuSample): mesure retournée par echantillon_cpu()
     """
     print("=== CPU ===")
-    print(f"Coeurs physiques: {data_cpu.get('coeurs_physiques')}")
-    print(f"Coeurs logiques: {data_cpu.get('coeurs_logiques')}")
-    print(f"Utilisation: {data_cpu.get('utilisation'):.2f}%")
+    print(f"Coeurs physiques: {cpu.coeurs_physiques}")
+    print(f"Coeurs logiques: {cpu.coeurs_logiques}")
+    print(f"Utilisation: {cpu.utilisation:.2f}%")
+    par_coeur = cpu.par_coeur
+    if par_coeur:
+        valeurs = " ".join(f"{v:.0f}" for v in par_coeur)
+        print(f"Par coeur (%): {valeurs}")
     print()
 
 
-def afficher_memoire(data_memoire):
+def afficher_memoire(memoire):
     """
     Affiche les informations mémoire.
 
     Args:
-        data_memoire (dict): dictionnaire retourné par collecter_memoire()
+        memoire (models.MemSample): mesure retournée par echantillon_memoire()
     """
     print("=== Mémoire ===")
-    total = data_memoire.get("total", 0)
-    disponible = data_memoire.get("disponible", 0)
-    pourcentage = data_memoire.get("pourcentage", 0.0)
-
-    print(f"Total: {octets_vers_go(total)}")
-    print(f"Disponible: {octets_vers_go(disponible)}")
-    print(f"Utilisation: {pourcentage:.2f}%")
+    print(f"Total: {memoire.total_go:.2f} GB")
+    print(f"Disponible: {memoire.disponible_go:.2f} GB")
+    print(f"Utilisation: {memoire.pourcentage:.2f}%")
     print()
 
 
-def afficher_disques(data_disques):
+def afficher_disques(disques):
     """
     Affiche les informations sur les disques.
 
     Args:
-        data_disques (list[dict]): liste retournée par collecter_disques()
+        disques (list[models.DiskSample]): liste retournée par
+            echantillons_disques()
     """
     print("=== Disques ===")
-    if not data_disques:
+    if not disques:
         print("Aucune partition accessible.")
     else:
-        for disque in data_disques:
-            point = disque.get("point_montage")
-            pourcentage = disque.get("pourcentage", 0.0)
-            print(f"{point} : {pourcentage:.2f}% utilisé")
+        for disque in disques:
+            if disque.expire:
+                print(f"{disque.point_montage} : pas de réponse (délai dépassé)")
+                continue
+            print(f"{disque.point_montage} : {disque.pourcentage:.2f}% utilisé")
+    print()
+
+
+def afficher_processus(liste):
+    """
+    Affiche le classement des processus.
+
+    Args:
+        liste (list[models.ProcessSample]): classement retourné par
+            CollecteurProcessus.collecter()
+    """
+    print("=== Processus ===")
+    print(f"{'PID':>7} {'CPU':>7} {'RSS':>10}  Nom")
+    for p in liste:
+        cpu = "-" if p.cpu_percent is None else f"{p.cpu_percent:.1f}%"
+        print(f"{p.pid:>7} {cpu:>7} {p.rss_mo:>7.1f} Mo  {p.nom}")
+    print()
+
+
+def afficher_entrees_sorties(io_disques, io_reseau):
+    """
+    Affiche les débits des disques et des interfaces réseau actifs (hors
+    partitions et bouclage).
+
+    Args:
+        io_disques (list[models.DiskIOSample]): débits par périphérique
+        io_reseau (list[models.NetIOSample]): débits par interface
+    """
+    print("=== Entrées/sorties ===")
+    actifs = 0
+    for d in io_disques:
+        if d.partition or not (d.octets_lus or d.octets_ecrits):
+            continue
+        actifs += 1
+        print(
+            f"{d.peripherique} : lecture {octets_vers_debit(d.octets_lus)}, "
+            f"écriture {octets_vers_debit(d.octets_ecrits)}, "
+            f"{d.lectures + d.ecritures:.0f} IOPS"
+        )
+    for i in io_reseau:
+        if i.boucle or not (i.octets_recus or i.octets_envoyes):
+            continue
+        actifs += 1
+        print(
+            f"{i.interface} : reçu {octets_vers_debit(i.octets_recus)}, "
+            f"envoyé {octets_vers_debit(i.octets_envoyes)}, "
+            f"{i.paquets_recus + i.paquets_envoyes:.0f} paquets/s"
+        )
+    if not actifs:
+        print("Aucune activité.")
     print()
 
 
@@ -109,141 +199,728 @@ def afficher_entete(timestamp):
     print()
 
 
-def exporter_csv(metriques, fichier):
+def afficher_metriques(instantane):
+    """
+    Affiche toutes les métriques d'une collecte.
+
+    Args:
+        instantane (models.Snapshot): instantané retourné par
+            collecter_instantane()
+    """
+    afficher_entete(instantane.timestamp)
+    afficher_infos_systeme(instantane.systeme)
+    afficher_cpu(instantane.cpu)
+    afficher_memoire(instantane.memoire)
+    afficher_disques(instantane.disques)
+    if instantane.io_disques or instantane.io_reseau:
+        afficher_entrees_sorties(instantane.io_disques, instantane.io_reseau)
+    if instantane.processus:
+        afficher_processus(instantane.processus)
+
+
+def chemin_historique(stockage: str) -> str:
+    """
+    Retourne le chemin de l'historique pour un format de stockage.
+
+    Args:
+        stockage (str): "csv" ou "binaire".
     """
-    Exporte les métriques dans un fichier CSV (ajout si le fichier existe).
+    return HISTORIQUE_BINAIRE if stockage == "binaire" else HISTORIQUE_CSV
+
+
+def ouvrir_pipeline(
+    noms,
+    stockage: str = "csv",
+    rotation=None,
+    politique: str = "ancien",
+    capacite: int = exporteurs.CAPACITE_DEFAUT,
+    indente_json: bool = False,
+    adresse_serveur: str = serveur.ADRESSE_DEFAUT,
+    format_serveur: str = "json",
+    retention=None,
+):
+    """
+    Crée les exportateurs demandés et le pipeline qui les alimente.
 
     Args:
-        metriques (dict): dictionnaire retourné par collecter_tout()
-        fichier (str): chemin du fichier CSV
-    """
-    # Préparation de la ligne à écrire
-    systeme = metriques.get("systeme", {})
-    cpu = metriques.get("cpu", {})
-    mem = metriques.get("memoire", {})
-    disques = metriques.get("disques", [])
-
-    # On cherche la partition root "/"
-    disk_root_percent = ""
-    for d in disques:
-        if d.get("point_montage") == "/":
-            disk_root_percent = d.get("pourcentage", "")
-            break
-
-    row = {
-        "timestamp": metriques.get("timestamp", ""),
-        "hostname": systeme.get("hostname", ""),
-        "cpu_percent": cpu.get("utilisation", 0.0),
-        "mem_total_gb": mem.get("total", 0) / (1024 ** 3),
-        "mem_dispo_gb": mem.get("disponible", 0) / (1024 ** 3),
-        "mem_percent": mem.get("pourcentage", 0.0),
-        "disk_root_percent": disk_root_percent,
+        noms (Iterable[str]): clés de exporteurs.EXPORTATEURS.
+        stockage (str): format de l'historique, "csv" ou "binaire".
+        rotation (dict | None): options de rotation du CSV.
+        politique (str): politique de file pleine (exporteurs.POLITIQUES).
+        capacite (int): taille maximale de la file de chaque exportateur.
+        indente_json (bool): DERNIER_JSON indenté au lieu de compact.
+        adresse_serveur (str): adresse du serveur d'agrégation.
+        format_serveur (str): encodage des lots envoyés au serveur
+            (serveur.FORMATS).
+        retention (dict | None): rétention des agrégats par niveau
+            (None = agregats.RETENTION_DEFAUT).
+
+    Retourne:
+        exporteurs.Pipeline
+    """
+    options = {
+        "csv": {"fichier": HISTORIQUE_CSV, **(rotation or {})},
+        "binaire": {"repertoire": HISTORIQUE_BINAIRE},
+        "agregats": {"fichier": chemin_historique(stockage), "retention": retention},
+        "json": {"fichier": DERNIER_JSON, "indente": indente_json},
+        "emplacement": {"chemin": DERNIER_EMPLACEMENT},
+        "ligne": {"fichier": HISTORIQUE_LIGNE},
+        "processus": {"fichier": JOURNAL_PROCESSUS},
+        "serveur": {"adresse": adresse_serveur, "format_lots": format_serveur},
     }
+    choisis = {}
+    for nom in dict.fromkeys(noms):
+        choisis[nom] = exporteurs.creer(nom, **options.get(nom, {}))
+    return exporteurs.Pipeline(choisis, capacite, politique)
 
-    file_exists = os.path.exists(fichier)
-    write_header = not file_exists or os.path.getsize(fichier) == 0
-
-    with open(fichier, mode="a", encoding="utf-8", newline="") as f:
-        fieldnames = [
-            "timestamp",
-            "hostname",
-            "cpu_percent",
-            "mem_total_gb",
-            "mem_dispo_gb",
-            "mem_percent",
-            "disk_root_percent",
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
 
-        if write_header:
-            writer.writeheader()
+def afficher_exportateurs(stats):
+    """
+    Affiche les métriques des exportateurs.
 
-        writer.writerow(row)
+    Args:
+        stats (list[dict]): liste retournée par Pipeline.statistiques()
+    """
+    print("=== Exportateurs ===")
+    for s in stats:
+        latence = s["latence_ms"]
+        ligne = f"{s['nom']}: {s['exportes']} exportés en {s['lots']} lots"
+        if latence["moyenne"] is not None:
+            ligne += (
+                f", latence moy {latence['moyenne']:.2f} ms"
+                f" / p99 {latence['p99']:.2f} ms"
+                f" / max {latence['max']:.2f} ms"
+            )
+        print(ligne)
+        if s["abandonnes"] or s["debordes"] or s["en_attente"]:
+            print(
+                f"  abandonnés: {s['abandonnes']}, débordés: {s['debordes']}, "
+                f"en attente: {s['en_attente']}"
+            )
+        if s["erreurs"]:
+            print(f"  erreurs: {s['erreurs']} (dernière: {s['derniere_erreur']})")
+    print()
 
 
-def exporter_json(metriques, fichier):
+def collecter_en_continu(
+    intervalle: float,
+    nombre: int,
+    stockage: str = "csv",
+    rotation=None,
+    pipeline=None,
+    collecteur_processus=None,
+    live=False,
+):
     """
-    Exporte les métriques complètes dans un fichier JSON lisible.
+    Collecte les métriques en continu, à fréquence fixe.
+
+    L'export se fait en arrière-plan (voir exporteurs) : la boucle ne fait
+    que collecter, afficher et publier.
 
     Args:
-        metriques (dict): dictionnaire retourné par collecter_tout()
-        fichier (str): chemin du fichier JSON
+        intervalle (float): secondes entre chaque collecte (peut être < 1).
+        nombre (int): nombre de collectes (0 = infini).
+        stockage (str): format de l'historique, "csv" ou "binaire".
+        rotation (dict | None): options de rotation du CSV (taille_max,
+            duree_max, compression), voir EcrivainHistorique.
+        pipeline (exporteurs.Pipeline | None): exportateurs à alimenter
+            (défaut: historique et agrégats).
+        collecteur_processus (processus.CollecteurProcessus | None):
+            classement des processus ajouté aux échantillons.
+        live (bool): tableau de bord en plein écran, mis à jour sur place
+            (voir tableau_bord), au lieu d'un bloc affiché par collecte.
     """
-    with open(fichier, mode="w", encoding="utf-8") as f:
-        json.dump(metriques, f, indent=2, ensure_ascii=False)
+    ordo = ordonnanceur.Ordonnanceur(intervalle, nombre)
+    collector.installer_invalidation_sighup()
+    collector.amorcer_io()
+    if pipeline is None:
+        pipeline = ouvrir_pipeline([stockage, "agregats"], stockage, rotation)
+    tableau = tableau_bord.TableauBord() if live else None
+    try:
+        with tableau or contextlib.nullcontext():
+            for _ in ordo:
+                metriques = collector.collecter_instantane()
+                if collecteur_processus is not None:
+                    collecteur_processus.collecter(metriques)
+
+                # Affichage
+                if tableau is None:
+                    afficher_metriques(metriques)
+                else:
+                    tableau.afficher(metriques)
 
+                # Export en arrière-plan
+                pipeline.publier(metriques)
 
-def collecter_en_continu(intervalle: int, nombre: int):
+    except KeyboardInterrupt:
+        print("\nArrêt de la collecte continue (Ctrl+C détecté).")
+    finally:
+        pipeline.fermer()
+
+    afficher_cadencement(ordo.statistiques())
+    if tableau is not None:
+        afficher_cout_tableau(tableau.statistiques())
+    if collecteur_processus is not None:
+        afficher_cout_processus(collecteur_processus.statistiques())
+    afficher_exportateurs(pipeline.statistiques())
+
+
+def afficher_cout_tableau(stats):
     """
-    Collecte les métriques en continu.
+    Affiche le coût du tableau de bord (--live).
 
     Args:
-        intervalle (int): secondes entre chaque collecte.
+        stats (dict): dictionnaire retourné par TableauBord.statistiques()
+    """
+    print("=== Tableau de bord ===")
+    print(f"Images: {stats['images']}")
+    if stats["images"]:
+        print(f"Octets écrits par image: {stats['octets'] / stats['images']:.0f}")
+        print(f"Durée moyenne: {stats['duree_moyenne_ms']:.3f} ms")
+        print(f"Durée max: {stats['duree_max_ms']:.3f} ms")
+    print()
+
+
+def afficher_cout_processus(stats):
+    """
+    Affiche le coût de la collecte par processus.
+
+    Args:
+        stats (dict): dictionnaire retourné par CollecteurProcessus.statistiques()
+    """
+    print("=== Collecte des processus ===")
+    print(f"Échantillons avec processus: {stats['ticks_actifs']}/{stats['ticks']}")
+    print(f"Processus suivis: {stats['processus_suivis']}")
+    print(f"Parcours complets: {stats['tours']}")
+    if stats["duree_moyenne_ms"] is not None:
+        print(f"Durée moyenne: {stats['duree_moyenne_ms']:.2f} ms")
+        print(f"Durée max: {stats['duree_max_ms']:.2f} ms")
+    print()
+
+
+def executer_demon(
+    intervalle: float,
+    nombre: int,
+    stockage: str = "csv",
+    pipeline=None,
+    collecteur_processus=None,
+    retention=None,
+):
+    """
+    Lance la collecte permanente avec son socket de requêtes (voir demon).
+
+    Args:
+        intervalle (float): secondes entre chaque collecte (peut être < 1).
         nombre (int): nombre de collectes (0 = infini).
+        stockage (str): format de l'historique, "csv" ou "binaire".
+        pipeline (exporteurs.Pipeline | None): exportateurs à alimenter
+            (défaut: historique et agrégats).
+        collecteur_processus (processus.CollecteurProcessus | None):
+            classement des processus ajouté aux échantillons.
+        retention (dict | None): rétention des agrégats par niveau, celle
+            du pipeline (None = agregats.RETENTION_DEFAUT).
     """
-    compteur = 0
+    fichier = chemin_historique(stockage)
+    if pipeline is None:
+        pipeline = ouvrir_pipeline(
+            [stockage, "agregats"], stockage, retention=retention
+        )
+    processus_demon = demon.Demon(
+        pipeline,
+        fichier,
+        intervalle,
+        nombre,
+        episodes=detection_episodes(),
+        collecteur_processus=collecteur_processus,
+        retention=retention,
+    )
+    print(f"Démon SysWatch : requêtes sur {processus_demon.chemin_socket}")
+    print("(Ctrl+C pour arrêter)")
     try:
-        while True:
-            if nombre > 0 and compteur >= nombre:
-                break
+        processus_demon.executer()
+    except RuntimeError as e:
+        print(f"Erreur : {e}")
+        return
+    afficher_cadencement(processus_demon.ordo.statistiques())
+    if collecteur_processus is not None:
+        afficher_cout_processus(collecteur_processus.statistiques())
+    afficher_exportateurs(pipeline.statistiques())
 
-            metriques = collector.collecter_tout()
 
-            # Affichage
-            afficher_entete(metriques.get("timestamp"))
-            afficher_infos_systeme(metriques.get("systeme", {}))
-            afficher_cpu(metriques.get("cpu", {}))
-            afficher_memoire(metriques.get("memoire", {}))
-            afficher_disques(metriques.get("disques", []))
+def executer_serveur(adresse: str):
+    """
+    Lance le serveur d'agrégation de la flotte (voir serveur).
 
-            # Export CSV
-            exporter_csv(metriques, HISTORIQUE_CSV)
+    Args:
+        adresse (str): adresse d'écoute, "hôte:port" ou chemin de socket.
+    """
+    agregation = serveur.ServeurAgregation(adresse)
+    print(f"Serveur d'agrégation SysWatch sur {adresse}")
+    print("(Ctrl+C pour arrêter)")
+    try:
+        agregation.executer()
+    except OSError as e:
+        print(f"Erreur : {e}")
+
+
+def simuler_agents(
+    adresse: str,
+    nombre: int,
+    intervalle: float,
+    echantillons: int,
+    format_lots: str = "json",
+):
+    """
+    Envoie au serveur les échantillons synthétiques de `nombre` agents,
+    puis affiche la charge du serveur.
 
-            compteur += 1
+    Args:
+        adresse (str): adresse du serveur.
+        nombre (int): nombre d'agents simulés.
+        intervalle (float): secondes entre deux échantillons d'un agent.
+        echantillons (int): échantillons par agent.
+        format_lots (str): encodage des lots (serveur.FORMATS).
+    """
+    print(
+        f"{nombre} agents simulés -> {adresse} "
+        f"({echantillons} échantillons à {intervalle:g} s, {format_lots})"
+    )
+    debut = time.perf_counter()
+    try:
+        octets = asyncio.run(
+            serveur.simuler_agents(
+                adresse, nombre, echantillons, intervalle, format_lots=format_lots
+            )
+        )
+        etat = serveur.interroger(adresse, {"requete": "serveur"})
+    except (OSError, serveur.ServeurIndisponible) as e:
+        print(f"Serveur {adresse} injoignable : {e}")
+        return
+    print(
+        f"Terminé en {time.perf_counter() - debut:.1f} s, "
+        f"{octets / (nombre * echantillons):.0f} octets par échantillon"
+    )
+    print(
+        f"Serveur : {etat['hotes']} hôtes, {etat['echantillons']} échantillons, "
+        f"{etat['erreurs']} erreurs, {etat['cpu_s']:.2f} s CPU depuis le démarrage"
+    )
 
-            if nombre == 0 or compteur < nombre:
-                time.sleep(intervalle)
 
-    except KeyboardInterrupt:
-        print("\nArrêt de la collecte continue (Ctrl+C détecté).")
+def afficher_instantane(stockage: str = "csv"):
+    """
+    Affiche le dernier instantané du démon, ou collecte directement si aucun
+    démon ne tourne (sans rien écrire).
 
+    Args:
+        stockage (str): format de l'historique servi par le démon.
+    """
+    try:
+        metriques = demon.interroger(
+            chemin_historique(stockage), {"requete": "snapshot"}
+        )
+    except demon.DemonIndisponible:
+        metriques = None
+    if metriques is None:
+        instantane = collector.collecter_instantane()
+    else:
+        instantane = models.Snapshot.depuis_dict(metriques)
 
-def afficher_stats(fichier_csv: str):
+    afficher_metriques(instantane)
+
+
+def afficher_echantillons(fichier: str, depuis=None, jusqua=None, hote=None):
     """
-    Affiche les statistiques de base à partir du fichier CSV.
+    Écrit sur la sortie standard, au format CSV, les échantillons d'une
+    période (via le démon s'il tourne, sinon depuis le disque).
+
+    Args:
+        fichier (str): chemin de l'historique (CSV ou binaire).
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+    """
+    try:
+        lignes = demon.interroger(
+            fichier,
+            {"requete": "range", "depuis": depuis, "jusqua": jusqua, "hote": hote},
+        )["lignes"]
+    except demon.DemonIndisponible:
+        lignes = demon.lire_periode(fichier, depuis, jusqua, hote)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(historique.CHAMPS_CSV)
+    for ligne in lignes:
+        writer.writerow(["" if v is None else v for v in ligne])
+
+
+def afficher_cadencement(stats):
+    """
+    Affiche les statistiques de cadencement de la collecte continue.
+
+    Args:
+        stats (dict): dictionnaire retourné par Ordonnanceur.statistiques()
+    """
+    print("=== Cadencement ===")
+    print(f"Collectes: {stats['ticks']}")
+    print(f"Ticks manqués: {stats['ticks_manques']}")
+    print(f"Dépassements: {stats['depassements']}")
+    print(f"Gigue moyenne: {stats['gigue_moyenne_ms']:.2f} ms")
+    print(f"Gigue max: {stats['gigue_max_ms']:.2f} ms")
+    print()
+
+
+def detection_episodes(duree_min=episodes.DUREE_MIN_DEFAUT):
+    """
+    Paramètres des détecteurs d'épisodes de surcharge CPU et mémoire.
 
     Args:
-        fichier_csv (str): chemin du fichier CSV d'historique.
+        duree_min (float): durée minimale (secondes) d'un épisode.
+
+    Retourne:
+        list[dict]: voir traitement.AgregateurHistorique.
+    """
+    return [
+        {
+            "metrique": metrique,
+            "seuil_entree": SEUIL_ENTREE,
+            "seuil_sortie": SEUIL_SORTIE,
+            "duree_min": duree_min,
+        }
+        for metrique in ("cpu", "memoire")
+    ]
+
+
+def afficher_resume(resume) -> bool:
+    """
+    Affiche les statistiques CPU, mémoire, entrées/sorties et les
+    percentiles approchés d'un résumé.
+
+    Args:
+        resume (dict): résultat de AgregateurHistorique.resume().
+
+    Retourne:
+        bool: False s'il n'y a aucune donnée.
     """
-    stats = traitement.calculer_moyennes(fichier_csv)
+    stats = resume["statistiques"]
 
     if stats["cpu"]["moyenne"] is None:
         print("Aucune donnée disponible pour les statistiques.")
-        return
+        return False
+
+    print(f"Échantillons: {stats['cpu']['nombre']}")
+    if resume["niveau"] is not None:
+        print(f"Source: agrégats {resume['niveau']}")
+    print()
 
     print("=== Statistiques CPU ===")
     print(f"Moyenne: {stats['cpu']['moyenne']:.2f}%")
     print(f"Min: {stats['cpu']['min']:.2f}%")
     print(f"Max: {stats['cpu']['max']:.2f}%")
+    print(f"Écart-type: {stats['cpu']['ecart_type']:.2f}")
     print()
 
     print("=== Statistiques Mémoire ===")
     print(f"Moyenne: {stats['memoire']['moyenne']:.2f}%")
     print(f"Min: {stats['memoire']['min']:.2f}%")
     print(f"Max: {stats['memoire']['max']:.2f}%")
+    print(f"Écart-type: {stats['memoire']['ecart_type']:.2f}")
     print()
 
-    # On peut aussi afficher les pics (seuils choisis arbitrairement)
-    pics = traitement.detecter_pics(fichier_csv, seuil_cpu=80.0, seuil_mem=80.0)
-    if pics:
-        print("=== Pics détectés (CPU > 80% ou RAM > 80%) ===")
-        for p in pics:
+    # Absentes des agrégats et des historiques antérieurs aux débits
+    io = stats.get("io", {})
+    if any(io.get(nom, {}).get("nombre") for nom in models.CHAMPS_IO):
+        print("=== Statistiques Entrées/sorties (moyenne / max) ===")
+        for titre, nom, unite in (
+            ("Disques, lecture", "disk_read_bps", None),
+            ("Disques, écriture", "disk_write_bps", None),
+            ("Disques, IOPS", "disk_iops", "IOPS"),
+            ("Réseau, reçu", "net_recv_bps", None),
+            ("Réseau, envoyé", "net_sent_bps", None),
+            ("Réseau, paquets", "net_pps", "paquets/s"),
+        ):
+            debit = io[nom]
+            if not debit["nombre"]:
+                continue
+            if unite is None:
+                texte = (
+                    f"{octets_vers_debit(debit['moyenne'])} / "
+                    f"{octets_vers_debit(debit['max'])}"
+                )
+            else:
+                texte = f"{debit['moyenne']:.0f} / {debit['max']:.0f} {unite}"
+            print(f"{titre}: {texte}")
+        print()
+
+    quantiles = resume["quantiles"]
+    print("=== Percentiles (approchés) ===")
+    for titre, nom in (("CPU", "cpu"), ("Mémoire", "memoire")):
+        if None in quantiles[nom].values():
+            # Agrégats antérieurs aux esquisses : --reconstruire-agregats
+            print(f"{titre}: indisponible")
+            continue
+        texte = ", ".join(f"p{rang}: {v:.2f}%" for rang, v in quantiles[nom].items())
+        print(f"{titre}: {texte}")
+    print()
+    return True
+
+
+def afficher_stats(
+    fichier_csv: str,
+    depuis=None,
+    jusqua=None,
+    hote=None,
+    avec_percentiles=False,
+    duree_min=episodes.DUREE_MIN_DEFAUT,
+    retention=None,
+):
+    """
+    Affiche les statistiques de base à partir du fichier CSV.
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV d'historique
+            (ou du répertoire du stockage binaire).
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+        avec_percentiles (bool): affiche aussi les percentiles exacts.
+        duree_min (float): durée minimale (secondes) d'un épisode affiché.
+        retention (dict | None): rétention des agrégats par niveau, pour le
+            choix du niveau lu (None = agregats.RETENTION_DEFAUT).
+    """
+    detection = detection_episodes(duree_min)
+    try:
+        # Réponse immédiate d'un démon en cours d'exécution (--demon)
+        resume = demon.interroger(
+            fichier_csv,
+            {
+                "requete": "stats",
+                "depuis": depuis,
+                "jusqua": jusqua,
+                "hote": hote,
+                "episodes": detection,
+            },
+        )
+    except demon.DemonIndisponible:
+        # Une seule lecture du fichier pour les statistiques et les épisodes
+        # de surcharge, en reprenant là où le dernier --stats s'était arrêté
+        resume = traitement.analyser_historique(
+            fichier_csv,
+            depuis=depuis,
+            jusqua=jusqua,
+            hote=hote,
+            reprise=True,
+            episodes=detection,
+            retention=retention,
+        ).resume()
+    if not afficher_resume(resume):
+        return
+
+    if avec_percentiles:
+        afficher_percentiles(fichier_csv, depuis, jusqua, hote)
+
+    liste = resume["episodes"]
+    if liste:
+        print(
+            f"=== Épisodes de surcharge (> {SEUIL_ENTREE:g}% "
+            f"jusqu'au retour sous {SEUIL_SORTIE:g}%) ==="
+        )
+        bornes = [
+            (
+                historique.horodatage_vers_epoch(e["debut"]),
+                historique.horodatage_vers_epoch(e["fin"]),
+            )
+            for e in liste
+        ]
+        # Classements de processus relevés pendant les épisodes (--processus)
+        journal = list(
+            processus.lire_journal(
+                JOURNAL_PROCESSUS,
+                min(debut for debut, _ in bornes),
+                max(fin for _, fin in bornes),
+            )
+        )
+        for e, (debut, fin_epoch) in zip(liste, bornes):
+            fin = "en cours" if e.get("en_cours") else e["fin"]
+            nom = "CPU" if e["metrique"] == "cpu" else "RAM"
             print(
-                f"{p['timestamp']} - {p['hostname']} "
-                f"(CPU: {p['cpu_percent']:.2f}%, RAM: {p['mem_percent']:.2f}%)"
+                f"{e['debut']} -> {fin} - {e['hostname']} {nom} "
+                f"({e['duree']:.0f} s, max: {e['max']:.2f}%, "
+                f"moyenne: {e['moyenne']:.2f}%)"
+            )
+            principaux = processus.principaux(
+                journal, e["hostname"], debut, fin_epoch
             )
+            if principaux:
+                texte = ", ".join(
+                    f"{p['nom']} ({p['pid']}, {p['cpu_max']:.0f}%)"
+                    for p in principaux
+                )
+                print(f"    processus: {texte}")
     else:
-        print("Aucun pic détecté au-dessus des seuils 80% CPU / 80% RAM.")
+        print(
+            f"Aucun épisode de surcharge au-dessus de {SEUIL_ENTREE:g}% "
+            f"pendant au moins {duree_min:g} s."
+        )
+
+
+def afficher_flotte(adresse: str, depuis=None, jusqua=None, hote=None):
+    """
+    Affiche les statistiques de la flotte et les hôtes les plus chargés,
+    d'après le serveur d'agrégation.
+
+    Args:
+        adresse (str): adresse du serveur.
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = toute la flotte.
+    """
+    periode = {"depuis": depuis, "jusqua": jusqua, "hote": hote}
+    try:
+        resume = serveur.interroger(adresse, {"requete": "stats", **periode})
+        pics = {
+            metrique: serveur.interroger(
+                adresse, {"requete": "pics", "metrique": metrique, **periode}
+            )
+            for metrique in ("cpu_percent", "mem_percent")
+        }
+    except serveur.ServeurIndisponible as e:
+        print(f"Serveur {adresse} injoignable : {e}")
+        return
+
+    print(f"Hôtes: {resume['hotes']}")
+    if not afficher_resume(resume):
+        return
+    if "1m" in resume["sources"]:
+        print("(au-delà des échantillons récents : agrégats par minute)")
+        print()
+
+    for titre, metrique in (("CPU", "cpu_percent"), ("Mémoire", "mem_percent")):
+        print(f"=== Hôtes les plus chargés, {titre} (max / moyenne) ===")
+        for p in pics[metrique]:
+            print(
+                f"{p['hostname']}: {p['max']:.2f}% à "
+                f"{historique.epoch_vers_horodatage(p['epoch'])} / "
+                f"{p['moyenne']:.2f}%"
+            )
+        print()
+
+
+def afficher_percentiles(fichier_csv: str, depuis=None, jusqua=None, hote=None):
+    """
+    Affiche les percentiles exacts du CPU et de la mémoire (échantillons bruts).
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV d'historique
+            (ou du répertoire du stockage binaire).
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+    """
+    colonnes = analyse_vectorielle.charger_colonnes(
+        fichier_csv, ("cpu_percent", "mem_percent"), depuis, jusqua, hote
+    )
+    print("=== Percentiles exacts ===")
+    for titre, nom in (("CPU", "cpu_percent"), ("Mémoire", "mem_percent")):
+        valeurs = analyse_vectorielle.percentiles(colonnes[nom])
+        if None in valeurs.values():
+            print(f"{titre}: aucune donnée")
+            continue
+        texte = ", ".join(f"p{rang}: {v:.2f}%" for rang, v in valeurs.items())
+        print(f"{titre}: {texte}")
+    print()
+
+
+UNITES_DUREE = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def duree(texte: str) -> float:
+    """
+    Interprète une durée de la ligne de commande.
+
+    Args:
+        texte (str): ex: "90s", "30m", "1h", "7d" (secondes si sans unité).
+
+    Retourne:
+        float: durée en secondes.
+    """
+    try:
+        if texte and texte[-1] in UNITES_DUREE:
+            return float(texte[:-1]) * UNITES_DUREE[texte[-1]]
+        return float(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"durée invalide : {texte!r} (ex: 90s, 30m, 1h, 7d)"
+        )
+
+
+def retention_niveaux(texte: str):
+    """
+    Interprète la rétention des agrégats de la ligne de commande.
+
+    Args:
+        texte (str): ex: "1m=7d,1h=90d" ; les niveaux absents gardent leur
+            rétention par défaut, 0 = conservation illimitée.
+
+    Retourne:
+        dict: niveau -> rétention en secondes (None = illimitée).
+    """
+    niveaux = dict(agregats.NIVEAUX)
+    retention = {}
+    for element in texte.split(","):
+        niveau, egal, valeur = element.strip().partition("=")
+        if not egal or niveau not in niveaux:
+            raise argparse.ArgumentTypeError(
+                f"rétention invalide : {element!r} (ex: 1m=7d,1h=90d, "
+                f"niveaux: {', '.join(niveaux)})"
+            )
+        secondes = duree(valeur)
+        if secondes < 0:
+            raise argparse.ArgumentTypeError(f"rétention négative : {element!r}")
+        retention[niveau] = secondes or None
+    return retention
+
+
+def reel_positif(texte: str) -> float:
+    """
+    Interprète un nombre strictement positif de la ligne de commande (ex:
+    l'intervalle de collecte).
+
+    Retourne:
+        float: la valeur.
+    """
+    try:
+        valeur = float(texte)
+    except ValueError:
+        valeur = math.nan
+    if not (0 < valeur < math.inf):
+        raise argparse.ArgumentTypeError(
+            f"valeur invalide : {texte!r} (nombre strictement positif, ex: 0.25)"
+        )
+    return valeur
+
+
+def instant(texte: str) -> float:
+    """
+    Interprète une borne de temps de la ligne de commande.
+
+    Args:
+        texte (str): durée relative à maintenant ("90s", "30m", "1h", "7d")
+            ou date ISO ("2025-11-19T15:00").
+
+    Retourne:
+        float: secondes depuis l'epoch.
+    """
+    if texte and texte[-1] in UNITES_DUREE:
+        try:
+            return time.time() - duree(texte)
+        except argparse.ArgumentTypeError:
+            pass
+    try:
+        return historique.horodatage_vers_epoch(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"borne de temps invalide : {texte!r} (ex: 1h, 30m, 2025-11-19T15:00)"
+        )
 
 
 def parse_arguments():
@@ -259,11 +936,22 @@ def parse_arguments():
         action="store_true",
         help="Active la collecte continue.",
     )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help=(
+            "Collecte continue avec un tableau de bord plein écran mis à jour "
+            "sur place (courbes des derniers échantillons)."
+        ),
+    )
     parser.add_argument(
         "--intervalle",
-        type=int,
+        type=reel_positif,
         default=10,
-        help="Intervalle en secondes entre les collectes en mode continu (défaut: 10).",
+        help=(
+            "Intervalle en secondes entre les collectes en mode continu, "
+            "décimales acceptées, ex: 0.25 (défaut: 10)."
+        ),
     )
     parser.add_argument(
         "--nombre",
@@ -276,6 +964,218 @@ def parse_arguments():
         action="store_true",
         help="Affiche les statistiques à partir du fichier CSV d'historique.",
     )
+    parser.add_argument(
+        "--depuis",
+        type=instant,
+        help="Avec --stats : début de la période (ex: 1h, 2025-11-19T15:00).",
+    )
+    parser.add_argument(
+        "--jusqua",
+        type=instant,
+        help="Avec --stats : fin de la période (même format que --depuis).",
+    )
+    parser.add_argument(
+        "--hote",
+        help="Avec --stats : limite les statistiques à un nom d'hôte.",
+    )
+    parser.add_argument(
+        "--percentiles",
+        action="store_true",
+        help=(
+            "Avec --stats : affiche les percentiles exacts p50/p95/p99 "
+            "(NumPy si disponible)."
+        ),
+    )
+    parser.add_argument(
+        "--duree-min",
+        type=duree,
+        default=episodes.DUREE_MIN_DEFAUT,
+        help=(
+            "Avec --stats : durée minimale d'un épisode de surcharge "
+            f"(ex: 30s, 5m, défaut: {episodes.DUREE_MIN_DEFAUT:g}s)."
+        ),
+    )
+    parser.add_argument(
+        "--demon",
+        action="store_true",
+        help=(
+            "Collecte permanente (à --intervalle) avec un socket de requêtes "
+            "pour --stats, --instantane et --echantillons ; exportateurs "
+            "comme --continu (--exporter, --processus, --serveur...)."
+        ),
+    )
+    parser.add_argument(
+        "--instantane",
+        action="store_true",
+        help="Affiche le dernier échantillon du démon (ou en collecte un).",
+    )
+    parser.add_argument(
+        "--echantillons",
+        action="store_true",
+        help="Écrit en CSV les échantillons de la période --depuis/--jusqua/--hote.",
+    )
+    parser.add_argument(
+        "--reconstruire-agregats",
+        action="store_true",
+        help="Recalcule les agrégats 1m/1h/1d à partir de tout l'historique.",
+    )
+    parser.add_argument(
+        "--retention",
+        type=retention_niveaux,
+        help=(
+            "Rétention des agrégats par niveau, 0 = illimitée "
+            "(ex: 1m=7d,1h=90d, défaut: "
+            + ",".join(
+                f"{niveau}=" + ("0" if limite is None else f"{limite / 86400:g}d")
+                for niveau, limite in agregats.RETENTION_DEFAUT.items()
+            )
+            + ")."
+        ),
+    )
+    parser.add_argument(
+        "--rotation-taille",
+        type=float,
+        default=ROTATION_TAILLE_MO,
+        help=(
+            "Taille (Mo) du CSV actif déclenchant sa rotation en segment "
+            f"fermé, 0 = jamais (défaut: {ROTATION_TAILLE_MO:g})."
+        ),
+    )
+    parser.add_argument(
+        "--rotation-duree",
+        type=duree,
+        help="Âge du CSV actif déclenchant sa rotation (ex: 1d, 12h).",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=sorted(historique.COMPRESSIONS) + ["aucune"],
+        default=ROTATION_COMPRESSION,
+        help=f"Compression des segments fermés (défaut: {ROTATION_COMPRESSION}).",
+    )
+    parser.add_argument(
+        "--processus",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Avec --continu : ajoute les N processus les plus gourmands en "
+            f"CPU et en mémoire aux échantillons et à {JOURNAL_PROCESSUS} "
+            "(0 = désactivé)."
+        ),
+    )
+    parser.add_argument(
+        "--processus-tous-les",
+        type=int,
+        default=1,
+        metavar="K",
+        help="Classement des processus un échantillon sur K (défaut: 1).",
+    )
+    parser.add_argument(
+        "--processus-pics",
+        action="store_true",
+        help=(
+            "Classement des processus seulement pendant une surcharge "
+            f"(au-dessus de {SEUIL_ENTREE:g}%% jusqu'au retour sous "
+            f"{SEUIL_SORTIE:g}%%)."
+        ),
+    )
+    parser.add_argument(
+        "--processus-budget",
+        type=float,
+        default=processus.BUDGET_MS_DEFAUT,
+        metavar="MS",
+        help=(
+            "Temps maximal du classement par échantillon, 0 = sans limite "
+            f"(défaut: {processus.BUDGET_MS_DEFAUT:g} ms)."
+        ),
+    )
+    parser.add_argument(
+        "--exporter",
+        action="append",
+        choices=sorted(exporteurs.EXPORTATEURS),
+        default=[],
+        help=(
+            "Exportateur supplémentaire, répétable (l'historique choisi par "
+            f"--stockage et les agrégats sont toujours exportés ; ligne : "
+            f"protocole ligne InfluxDB dans {HISTORIQUE_LIGNE} ; emplacement : "
+            f"dernier instantané projeté en mémoire dans {DERNIER_EMPLACEMENT})."
+        ),
+    )
+    parser.add_argument(
+        "--json-indente",
+        action="store_true",
+        help=f"Écrit {DERNIER_JSON} indenté (lisible) au lieu de compact.",
+    )
+    parser.add_argument(
+        "--politique",
+        choices=exporteurs.POLITIQUES,
+        default="ancien",
+        help=(
+            "File d'export pleine : abandonner le plus ancien, bloquer la "
+            "collecte, ou déborder sur disque (défaut: ancien)."
+        ),
+    )
+    parser.add_argument(
+        "--file-max",
+        type=int,
+        default=exporteurs.CAPACITE_DEFAUT,
+        help=(
+            "Échantillons en attente par exportateur "
+            f"(défaut: {exporteurs.CAPACITE_DEFAUT})."
+        ),
+    )
+    parser.add_argument(
+        "--serveur",
+        metavar="ADRESSE",
+        help=(
+            "Serveur d'agrégation de la flotte (hôte:port ou chemin de "
+            "socket) : avec --continu, y envoie les échantillons ; avec "
+            "--stats, affiche les statistiques de la flotte."
+        ),
+    )
+    parser.add_argument(
+        "--serveur-format",
+        choices=serveur.FORMATS,
+        default="json",
+        help=(
+            "Encodage des échantillons envoyés à --serveur : colonnes de "
+            "l'historique en JSON, ou échantillons complets en trames "
+            "binaires (défaut: json)."
+        ),
+    )
+    parser.add_argument(
+        "--serveur-ecoute",
+        metavar="ADRESSE",
+        help="Lance le serveur d'agrégation de la flotte sur cette adresse.",
+    )
+    parser.add_argument(
+        "--simuler-agents",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Envoie à --serveur les échantillons synthétiques de N agents "
+            "(un par --intervalle, --nombre par agent, défaut: 60)."
+        ),
+    )
+    parser.add_argument(
+        "--backend",
+        choices=collector.BACKENDS,
+        default="psutil",
+        help=(
+            "Source des mesures : psutil (portable) ou linux (lecture directe "
+            "de /proc, pour les collectes à haute fréquence ; défaut: psutil)."
+        ),
+    )
+    parser.add_argument(
+        "--stockage",
+        choices=["csv", "binaire"],
+        default="csv",
+        help=(
+            "Format de l'historique : CSV texte ou colonnes binaires "
+            f"dans {HISTORIQUE_BINAIRE} (défaut: csv)."
+        ),
+    )
 
     return parser.parse_args()
 
@@ -286,28 +1186,130 @@ def main():
     """
     args = parse_arguments()
 
+    try:
+        collector.choisir_backend(args.backend)
+    except OSError as e:
+        print(f"Backend {args.backend} indisponible : {e}")
+        return
+
+    historique_choisi = chemin_historique(args.stockage)
+
+    if args.reconstruire_agregats:
+        nombre = agregats.reconstruire_agregats(historique_choisi, args.retention)
+        print(f"Agrégats reconstruits à partir de {nombre} échantillons.")
+        return
+
+    if args.instantane:
+        afficher_instantane(args.stockage)
+        return
+
+    if args.echantillons:
+        afficher_echantillons(historique_choisi, args.depuis, args.jusqua, args.hote)
+        return
+
+    if args.serveur_ecoute:
+        executer_serveur(args.serveur_ecoute)
+        return
+
+    if args.simuler_agents:
+        if not args.serveur:
+            print("--simuler-agents demande --serveur ADRESSE.")
+            return
+        simuler_agents(
+            args.serveur,
+            args.simuler_agents,
+            args.intervalle,
+            args.nombre or 60,
+            args.serveur_format,
+        )
+        return
+
     # Mode statistiques
+    if args.stats and args.serveur:
+        afficher_flotte(args.serveur, args.depuis, args.jusqua, args.hote)
+        return
     if args.stats:
-        afficher_stats(HISTORIQUE_CSV)
+        afficher_stats(
+            historique_choisi,
+            args.depuis,
+            args.jusqua,
+            args.hote,
+            avec_percentiles=args.percentiles,
+            duree_min=args.duree_min,
+            retention=args.retention,
+        )
+        return
+
+    rotation = {
+        "taille_max": int(args.rotation_taille * 1024 * 1024) or None,
+        "duree_max": args.rotation_duree,
+        "compression": None if args.compression == "aucune" else args.compression,
+    }
+
+    if args.live and not sys.stdout.isatty():
+        print("--live demande un terminal.")
         return
 
-    # Mode collecte continue
-    if args.continu:
-        collecter_en_continu(args.intervalle, args.nombre)
+    # Mode démon ou collecte continue
+    if args.demon or args.continu or args.live:
+        collecteur_processus = None
+        if args.processus > 0:
+            collecteur_processus = processus.CollecteurProcessus(
+                args.processus,
+                args.processus_tous_les,
+                SEUIL_ENTREE if args.processus_pics else None,
+                SEUIL_SORTIE if args.processus_pics else None,
+                args.processus_budget or None,
+            )
+            args.exporter.append("processus")
+        if args.serveur:
+            args.exporter.append("serveur")
+        pipeline = ouvrir_pipeline(
+            [args.stockage, "agregats"] + args.exporter,
+            args.stockage,
+            rotation,
+            args.politique,
+            args.file_max,
+            args.json_indente,
+            args.serveur or serveur.ADRESSE_DEFAUT,
+            args.serveur_format,
+            args.retention,
+        )
+        if args.demon:
+            executer_demon(
+                args.intervalle,
+                args.nombre,
+                args.stockage,
+                pipeline,
+                collecteur_processus,
+                args.retention,
+            )
+            return
+        collecter_en_continu(
+            args.intervalle,
+            args.nombre,
+            args.stockage,
+            rotation,
+            pipeline,
+            collecteur_processus,
+            args.live,
+        )
         return
 
     # Mode collecte unique (par défaut)
-    metriques = collector.collecter_tout()
+    metriques = collector.collecter_instantane()
 
-    afficher_entete(metriques.get("timestamp"))
-    afficher_infos_systeme(metriques.get("systeme", {}))
-    afficher_cpu(metriques.get("cpu", {}))
-    afficher_memoire(metriques.get("memoire", {}))
-    afficher_disques(metriques.get("disques", []))
+    afficher_metriques(metriques)
 
     # Export des données
-    exporter_csv(metriques, HISTORIQUE_CSV)
-    exporter_json(metriques, DERNIER_JSON)
+    with ouvrir_pipeline(
+        [args.stockage, "agregats", "json"] + args.exporter,
+        args.stockage,
+        rotation,
+        indente_json=args.json_indente,
+        retention=args.retention,
+    ) as pipeline:
+        pipeline.publier(metriques)
 
 
 if __name__ == "__main__":
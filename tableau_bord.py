@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module tableau_bord - tableau de bord en direct dans le terminal.
+
+Le TableauBord occupe l'écran alternatif du terminal (séquences ANSI) avec
+une disposition fixe : faits de l'hôte, CPU, mémoire, débits, partitions
+et processus, avec pour chaque métrique une courbe (sparkline) des
+derniers échantillons, lus dans un TamponCirculaire.
+
+Chaque image est composée en lignes de largeur fixe puis comparée à la
+précédente : seule la plage modifiée de chaque ligne changée est écrite,
+en une seule écriture sur le terminal. Les lignes qui ne changent pas
+(faits de l'hôte, titres) ne sont jamais réécrites. Une courbe est
+décalée d'un caractère par image ; elle n'est recalculée en entier que
+si son échelle change. Le coût d'une image (ajout au tampon, composition,
+différence, écriture) est mesuré et affiché en bas de l'écran.
+"""
+
+import shutil
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import historique
+import models
+import statistiques
+import tampon_circulaire
+
+# Échantillons gardés pour les courbes
+CAPACITE_COURBES = 256
+
+# Largeur maximale d'une courbe (caractères)
+LARGEUR_COURBE_MAX = 60
+
+NIVEAUX = " ▁▂▃▄▅▆▇█"
+
+ECRAN_ALTERNATIF = "\x1b[?1049h"
+ECRAN_PRINCIPAL = "\x1b[?1049l"
+CACHER_CURSEUR = "\x1b[?25l"
+MONTRER_CURSEUR = "\x1b[?25h"
+EFFACER_ECRAN = "\x1b[2J"
+EFFACER_LIGNE = "\x1b[2K"
+
+
+def courbe(valeurs, largeur: int, maximum: Optional[float] = None) -> str:
+    """
+    Sparkline des dernières valeurs.
+
+    Args:
+        valeurs (Sequence[float]): valeurs dans l'ordre chronologique (NaN =
+            absence, dessinée comme un blanc).
+        largeur (int): nombre de caractères ; les valeurs les plus
+            anciennes sont ignorées, la courbe est calée à droite.
+        maximum (float | None): valeur du niveau le plus haut, None = le
+            maximum des valeurs affichées.
+
+    Retourne:
+        str: exactement `largeur` caractères.
+    """
+    valeurs = valeurs[-largeur:] if largeur > 0 else []
+    if maximum is None:
+        maximum = max((v for v in valeurs if v == v), default=0.0)
+    if maximum <= 0:
+        echelle = 0.0
+    else:
+        echelle = (len(NIVEAUX) - 2) / maximum
+    dernier = len(NIVEAUX) - 1
+    caracteres = [
+        # v != v : NaN ; le premier niveau reste visible pour zéro
+        " " if v != v else NIVEAUX[min(dernier, 1 + int(max(0.0, v) * echelle))]
+        for v in valeurs
+    ]
+    return " " * (largeur - len(caracteres)) + "".join(caracteres)
+
+
+def _plage_modifiee(ligne: str, ancienne: str) -> Tuple[int, int]:
+    """
+    Plage [debut, fin) entre le premier et le dernier caractère différents
+    de deux lignes distinctes de même longueur (recherche dichotomique par
+    comparaisons de tranches).
+    """
+    bas, haut = 0, len(ligne)
+    while bas < haut:
+        milieu = (bas + haut + 1) // 2
+        if ligne[:milieu] == ancienne[:milieu]:
+            bas = milieu
+        else:
+            haut = milieu - 1
+    debut = bas
+    bas, haut = debut, len(ligne)
+    while bas < haut:
+        milieu = (bas + haut) // 2
+        if ligne[milieu:] == ancienne[milieu:]:
+            haut = milieu
+        else:
+            bas = milieu + 1
+    return debut, bas
+
+
+def _debit(octets: float) -> str:
+    return f"{octets / 1024 ** 2:.2f} MB/s"
+
+
+class TableauBord:
+    """
+    Affichage en direct des instantanés, une image par appel à afficher().
+
+    Utilisation:
+        with TableauBord() as tableau:
+            for _ in ordo:
+                tableau.afficher(collector.collecter_instantane())
+    """
+
+    def __init__(self, sortie=None, capacite: int = CAPACITE_COURBES):
+        """
+        Args:
+            sortie: flux du terminal (défaut: sys.stdout).
+            capacite (int): échantillons gardés pour les courbes.
+        """
+        self.sortie = sortie or sys.stdout
+        self.fenetre = tampon_circulaire.TamponCirculaire(capacite)
+        self.duree = statistiques.StatistiqueFlux()
+        self.images = 0
+        self.octets = 0
+        self._lignes = []
+        self._taille = None
+        self._derniere_duree = 0.0
+        # colonne -> (largeur, maximum, numéro d'image, courbe)
+        self._courbes = {}
+
+    # --- Terminal -------------------------------------------------------------
+
+    def ouvrir(self):
+        """
+        Passe sur l'écran alternatif (l'écran du shell est rendu à la
+        fermeture).
+        """
+        self.sortie.write(ECRAN_ALTERNATIF + CACHER_CURSEUR + EFFACER_ECRAN)
+        self.sortie.flush()
+        self._lignes = []
+
+    def fermer(self):
+        self.sortie.write(MONTRER_CURSEUR + ECRAN_PRINCIPAL)
+        self.sortie.flush()
+
+    def __enter__(self):
+        self.ouvrir()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+
+    # --- Image ----------------------------------------------------------------
+
+    def afficher(self, instantane: models.Snapshot):
+        """
+        Ajoute l'instantané aux courbes et met l'écran à jour.
+        """
+        debut = time.perf_counter()
+        # Ligne calculée une fois, pour le tampon et pour les débits affichés
+        ligne = instantane.vers_ligne()
+        valeurs = dict(ligne)
+        try:
+            valeurs["timestamp"] = historique.horodatage_vers_epoch(ligne["timestamp"])
+        except ValueError:
+            valeurs["timestamp"] = None
+        self.fenetre.ajouter_valeurs(valeurs)
+
+        taille = shutil.get_terminal_size()
+        if taille != self._taille:
+            # Terminal redimensionné : tout est redessiné
+            self._taille = taille
+            self._lignes = []
+            prefixe = EFFACER_ECRAN
+        else:
+            prefixe = ""
+        largeur, hauteur = taille.columns, taille.lines
+
+        lignes = self.composer(instantane, ligne, largeur)[: hauteur - 1]
+        lignes.append(
+            f"images: {self.images + 1}  rendu: {self._derniere_duree:.3f} ms"
+            f"  écrit: {self.octets} octets  (Ctrl+C pour quitter)"
+        )
+        lignes = [ligne[: largeur - 1].ljust(largeur - 1) for ligne in lignes]
+        if len(lignes) < hauteur:
+            # La barre d'état reste sur la dernière ligne
+            lignes[-1:-1] = [" " * (largeur - 1)] * (hauteur - len(lignes))
+
+        texte = prefixe + self._differences(lignes)
+        if texte:
+            self.sortie.write(texte)
+            self.sortie.flush()
+        self._lignes = lignes
+        self.images += 1
+        self.octets += len(texte)
+
+        self._derniere_duree = (time.perf_counter() - debut) * 1000
+        self.duree.ajouter(self._derniere_duree)
+
+    def _differences(self, lignes: List[str]) -> str:
+        """
+        Séquences qui transforment l'image précédente en `lignes` : pour
+        chaque ligne changée, un déplacement du curseur puis la plage
+        comprise entre le premier et le dernier caractère modifiés.
+        """
+        morceaux = []
+        precedentes = self._lignes
+        for numero, ligne in enumerate(lignes):
+            if numero >= len(precedentes):
+                morceaux.append(f"\x1b[{numero + 1};1H{ligne}")
+                continue
+            ancienne = precedentes[numero]
+            if ligne == ancienne:
+                continue
+            debut, fin = _plage_modifiee(ligne, ancienne)
+            morceaux.append(f"\x1b[{numero + 1};{debut + 1}H{ligne[debut:fin]}")
+        for numero in range(len(lignes), len(precedentes)):
+            morceaux.append(f"\x1b[{numero + 1};1H{EFFACER_LIGNE}")
+        return "".join(morceaux)
+
+    def _ligne_courbe(
+        self,
+        titre: str,
+        texte: str,
+        nom: str,
+        largeur: int,
+        maximum: Optional[float] = None,
+    ) -> str:
+        """
+        Libellé, valeur courante et courbe d'une colonne du tampon.
+        """
+        n = len(self.fenetre)
+        serie = self.fenetre.colonne(nom, max(0, n - largeur), n)
+        if maximum is None:
+            maximum = max((v for v in serie if v == v), default=0.0)
+        cache = self._courbes.get(nom)
+        if (
+            cache is not None
+            and cache[:3] == (largeur, maximum, self.images - 1)
+            and largeur
+        ):
+            # Même échelle qu'à l'image précédente : décalage d'un caractère
+            texte_courbe = cache[3][1:] + courbe(serie[-1:], 1, maximum)
+        else:
+            texte_courbe = courbe(serie, largeur, maximum)
+        self._courbes[nom] = (largeur, maximum, self.images, texte_courbe)
+        return f"{titre:<16}{texte:>14} {texte_courbe}"
+
+    def composer(
+        self, instantane: models.Snapshot, ligne: Dict[str, Any], largeur: int
+    ) -> List[str]:
+        """
+        Lignes de l'image (sans la barre d'état), non tronquées.
+
+        Args:
+            instantane (models.Snapshot): instantané affiché.
+            ligne (dict): instantane.vers_ligne().
+            largeur (int): largeur du terminal.
+        """
+        systeme = instantane.systeme
+        cpu = instantane.cpu
+        memoire = instantane.memoire
+        # Libellé (16) + valeur (14) + espaces
+        largeur_courbe = max(0, min(LARGEUR_COURBE_MAX, largeur - 34))
+
+        lignes = [
+            f"SysWatch v3.0 - {systeme.get('hostname')} "
+            f"({systeme.get('os')} {systeme.get('version')}, "
+            f"{systeme.get('architecture')}, {cpu.coeurs_physiques} coeurs "
+            f"physiques / {cpu.coeurs_logiques} logiques)",
+            f"Timestamp: {instantane.timestamp}",
+            "",
+            self._ligne_courbe(
+                "CPU", f"{cpu.utilisation:.1f}%", "cpu_percent", largeur_courbe, 100
+            ),
+        ]
+        if cpu.par_coeur:
+            lignes.append(
+                f"{'  par coeur':<16} " + " ".join(f"{v:3.0f}" for v in cpu.par_coeur)
+            )
+        lignes.append(
+            self._ligne_courbe(
+                "Mémoire",
+                f"{memoire.pourcentage:.1f}%",
+                "mem_percent",
+                largeur_courbe,
+                100,
+            )
+        )
+        lignes.append(
+            f"{'  disponible':<16}{memoire.disponible_go:>11.2f} GB"
+            f" sur {memoire.total_go:.2f} GB"
+        )
+
+        if instantane.io_disques or instantane.io_reseau:
+            lignes.append("")
+            for titre, nom in (
+                ("Disques lecture", "disk_read_bps"),
+                ("Disques écrit.", "disk_write_bps"),
+                ("Réseau reçu", "net_recv_bps"),
+                ("Réseau envoyé", "net_sent_bps"),
+            ):
+                valeur = ligne[nom]
+                texte = "-" if valeur == "" else _debit(valeur)
+                lignes.append(self._ligne_courbe(titre, texte, nom, largeur_courbe))
+
+        lignes.append("")
+        lignes.append("Partitions")
+        if not instantane.disques:
+            lignes.append("  aucune partition accessible")
+        for disque in instantane.disques:
+            if disque.expire:
+                lignes.append(f"  {disque.point_montage} : pas de réponse")
+                continue
+            remplies = int(round(disque.pourcentage / 5))
+            lignes.append(
+                f"  {disque.pourcentage:5.1f}% [{'#' * remplies:<20}] "
+                f"{disque.point_montage}"
+            )
+
+        if instantane.processus:
+            lignes.append("")
+            lignes.append(f"  {'PID':>7} {'CPU':>7} {'RSS':>10}  Nom")
+            for p in instantane.processus:
+                cpu_p = "-" if p.cpu_percent is None else f"{p.cpu_percent:.1f}%"
+                lignes.append(f"  {p.pid:>7} {cpu_p:>7} {p.rss_mo:>7.1f} Mo  {p.nom}")
+        return lignes
+
+    def statistiques(self) -> dict:
+        """
+        Coût de l'affichage.
+
+        Retourne:
+            dict: {'images', 'octets', 'duree_moyenne_ms', 'duree_max_ms'}
+        """
+        return {
+            "images": self.images,
+            "octets": self.octets,
+            "duree_moyenne_ms": self.duree.moyenne,
+            "duree_max_ms": self.duree.max,
+        }
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module tampon_circulaire - échantillons récents en mémoire, en colonnes.
+
+Un TamponCirculaire garde les N derniers échantillons dans des tableaux
+typés de taille fixe (array, 8 octets par valeur), une colonne par
+métrique et une par point de montage, au lieu des dictionnaires imbriqués
+de collecter_tout() (plusieurs centaines d'octets par échantillon). L'ajout
+écrase le plus ancien échantillon en O(1) ; les extractions et agrégations
+sur une fenêtre de temps travaillent directement sur les colonnes.
+
+24 h à une seconde d'intervalle (86 400 échantillons) occupent environ
+8 Mo, plus 0,7 Mo par point de montage suivi.
+"""
+
+import math
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import historique
+import models
+import statistiques
+
+# Colonnes numériques, dans l'ordre de CHAMPS_CSV (hors hostname et
+# disk_root_percent, lu dans la colonne du point de montage "/")
+COLONNES = (
+    "timestamp",
+    "cpu_percent",
+    "mem_total_gb",
+    "mem_dispo_gb",
+    "mem_percent",
+) + tuple(models.CHAMPS_IO)
+
+# 24 h à une seconde d'intervalle
+CAPACITE_DEFAUT = 86400
+
+
+def _vers_float(valeur) -> float:
+    try:
+        return float(valeur)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class TamponCirculaire:
+    """
+    Tampon circulaire de capacité fixe, en colonnes typées.
+
+    Les positions « logiques » vont de 0 (plus ancien échantillon) à
+    len(tampon) (exclu) ; les échantillons sont supposés ajoutés dans
+    l'ordre chronologique.
+
+    Utilisation:
+        tampon = TamponCirculaire(3600)
+        tampon.ajouter(collecter_instantane())
+        debut, fin = tampon.fenetre(depuis=time.time() - 600)
+        cpu = tampon.colonne("cpu_percent", debut, fin)
+        stats = tampon.statistiques("cpu_percent", depuis=time.time() - 600)
+    """
+
+    def __init__(self, capacite: int = CAPACITE_DEFAUT):
+        """
+        Args:
+            capacite (int): nombre maximal d'échantillons conservés.
+        """
+        if capacite < 1:
+            raise ValueError("La capacité doit être strictement positive.")
+        self.capacite = capacite
+        self._debut = 0
+        self._nombre = 0
+        self._colonnes = {nom: self._nouvelle_colonne() for nom in COLONNES}
+        self._hotes = array("I", bytes(4 * capacite))
+        self.hotes = []
+        self._index_hotes = {}
+        # point de montage -> pourcentage d'utilisation (NaN si absent)
+        self._disques = {}
+
+    def _nouvelle_colonne(self) -> array:
+        return array("d", [math.nan]) * self.capacite
+
+    def __len__(self) -> int:
+        return self._nombre
+
+    def points_montage(self) -> List[str]:
+        """
+        Points de montage ayant une colonne dans le tampon.
+        """
+        return list(self._disques)
+
+    # --- Ajout ----------------------------------------------------------------
+
+    def ajouter(self, metriques):
+        """
+        Ajoute un échantillon.
+
+        Args:
+            metriques (models.Snapshot | dict): instantané retourné par
+                collecter_instantane(), ou dictionnaire de collecter_tout()
+        """
+        ligne = historique.metriques_vers_ligne(metriques)
+        try:
+            epoch = historique.horodatage_vers_epoch(ligne["timestamp"])
+        except ValueError:
+            epoch = math.nan
+        if isinstance(metriques, models.Snapshot):
+            disques = {
+                d.point_montage: d.pourcentage
+                for d in metriques.disques
+                if d.pourcentage is not None
+            }
+        else:
+            disques = {
+                d["point_montage"]: d["pourcentage"]
+                for d in metriques.get("disques", [])
+                if "pourcentage" in d
+            }
+        ligne["timestamp"] = epoch
+        self.ajouter_valeurs(ligne, disques)
+
+    def ajouter_valeurs(
+        self, valeurs: Dict[str, Any], disques: Optional[Dict[str, float]] = None
+    ):
+        """
+        Ajoute un échantillon déjà décodé, en O(1) (hors premier passage
+        d'un nouveau point de montage).
+
+        Args:
+            valeurs (dict): 'timestamp' (secondes depuis l'epoch), 'hostname'
+                et les colonnes de COLONNES ; une valeur absente vaut NaN.
+            disques (dict | None): point de montage -> pourcentage utilisé.
+        """
+        if self._nombre < self.capacite:
+            position = (self._debut + self._nombre) % self.capacite
+            self._nombre += 1
+        else:
+            # Plein : le plus ancien échantillon est écrasé
+            position = self._debut
+            self._debut = (self._debut + 1) % self.capacite
+
+        for nom, colonne in self._colonnes.items():
+            colonne[position] = _vers_float(valeurs.get(nom))
+        self._hotes[position] = self._index_hote(valeurs.get("hostname") or "")
+
+        disques = disques or {}
+        for point, colonne in self._disques.items():
+            colonne[position] = _vers_float(disques.get(point))
+        for point in disques.keys() - self._disques.keys():
+            colonne = self._nouvelle_colonne()
+            colonne[position] = _vers_float(disques[point])
+            self._disques[point] = colonne
+
+    def _index_hote(self, hostname: str) -> int:
+        index = self._index_hotes.get(hostname)
+        if index is None:
+            index = len(self.hotes)
+            self.hotes.append(hostname)
+            self._index_hotes[hostname] = index
+        return index
+
+    # --- Lecture --------------------------------------------------------------
+
+    def _tranches(self, debut: int, fin: int) -> List[Tuple[int, int]]:
+        """
+        Positions physiques (au plus deux tranches) d'un intervalle logique.
+        """
+        debut = max(0, min(debut, self._nombre))
+        fin = max(debut, min(fin, self._nombre))
+        a = (self._debut + debut) % self.capacite
+        longueur = fin - debut
+        if a + longueur <= self.capacite:
+            return [(a, a + longueur)]
+        return [(a, self.capacite), (0, a + longueur - self.capacite)]
+
+    def _extraire(self, colonne: array, debut: int, fin: Optional[int]) -> array:
+        resultat = array(colonne.typecode)
+        for a, b in self._tranches(debut, self._nombre if fin is None else fin):
+            resultat.extend(colonne[a:b])
+        return resultat
+
+    def colonne(self, nom: str, debut: int = 0, fin: Optional[int] = None) -> array:
+        """
+        Copie d'une colonne dans l'ordre chronologique.
+
+        Args:
+            nom (str): colonne de COLONNES, ou "hostname" (indices dans
+                self.hotes).
+            debut (int): position logique de début.
+            fin (int | None): position logique de fin (exclue), None = fin.
+
+        Retourne:
+            array: valeurs ('d', ou 'I' pour hostname).
+        """
+        if nom == "hostname":
+            return self._extraire(self._hotes, debut, fin)
+        return self._extraire(self._colonnes[nom], debut, fin)
+
+    def colonne_disque(
+        self, point_montage: str, debut: int = 0, fin: Optional[int] = None
+    ) -> array:
+        """
+        Copie de la colonne d'un point de montage (NaN si inconnu).
+        """
+        colonne = self._disques.get(point_montage)
+        if colonne is None:
+            tranches = self._tranches(debut, self._nombre if fin is None else fin)
+            return array("d", [math.nan]) * sum(b - a for a, b in tranches)
+        return self._extraire(colonne, debut, fin)
+
+    def _timestamp(self, position: int) -> float:
+        return self._colonnes["timestamp"][(self._debut + position) % self.capacite]
+
+    def _chercher(self, epoch: float, strict: bool) -> int:
+        """
+        Première position logique dont le timestamp est >= epoch (> si
+        strict), par dichotomie. Un timestamp NaN est traité comme ancien.
+        """
+        bas, haut = 0, self._nombre
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            t = self._timestamp(milieu)
+            if math.isnan(t) or t < epoch or (strict and t == epoch):
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return bas
+
+    def fenetre(
+        self, depuis: Optional[float] = None, jusqua: Optional[float] = None
+    ) -> Tuple[int, int]:
+        """
+        Positions logiques [debut, fin) des échantillons d'une période.
+
+        Args:
+            depuis (float | None): borne basse (secondes depuis l'epoch).
+            jusqua (float | None): borne haute incluse.
+
+        Retourne:
+            tuple: (debut, fin)
+        """
+        debut = 0 if depuis is None else self._chercher(depuis, strict=False)
+        fin = self._nombre if jusqua is None else self._chercher(jusqua, strict=True)
+        return debut, max(debut, fin)
+
+    def extraire(
+        self, depuis: Optional[float] = None, jusqua: Optional[float] = None
+    ) -> "TamponCirculaire":
+        """
+        Copie indépendante des échantillons d'une période (copie des
+        tableaux, sans objet par échantillon). Permet de traiter une fenêtre
+        sans bloquer les ajouts.
+
+        Args:
+            depuis (float | None): borne basse (secondes depuis l'epoch).
+            jusqua (float | None): borne haute incluse.
+
+        Retourne:
+            TamponCirculaire: tampon plein, de capacité égale au nombre
+                d'échantillons copiés.
+        """
+        debut, fin = self.fenetre(depuis, jusqua)
+        if fin == debut:
+            copie = TamponCirculaire(1)
+            copie.hotes = list(self.hotes)
+            copie._index_hotes = dict(self._index_hotes)
+            return copie
+
+        copie = TamponCirculaire.__new__(TamponCirculaire)
+        copie.capacite = fin - debut
+        copie._debut = 0
+        copie._nombre = fin - debut
+        copie._colonnes = {
+            nom: self._extraire(colonne, debut, fin)
+            for nom, colonne in self._colonnes.items()
+        }
+        copie._hotes = self._extraire(self._hotes, debut, fin)
+        copie.hotes = list(self.hotes)
+        copie._index_hotes = dict(self._index_hotes)
+        copie._disques = {
+            point: self._extraire(colonne, debut, fin)
+            for point, colonne in self._disques.items()
+        }
+        return copie
+
+    def plus_ancien(self) -> Optional[float]:
+        """
+        Timestamp du plus ancien échantillon (None si vide).
+        """
+        return self._timestamp(0) if self._nombre else None
+
+    def statistiques(
+        self,
+        nom: str,
+        depuis: Optional[float] = None,
+        jusqua: Optional[float] = None,
+        hote: Optional[str] = None,
+    ) -> statistiques.StatistiqueFlux:
+        """
+        Statistiques d'une colonne sur une période (NaN ignorés).
+
+        Args:
+            nom (str): colonne de COLONNES.
+            depuis (float | None): borne basse (secondes depuis l'epoch).
+            jusqua (float | None): borne haute incluse.
+            hote (str | None): nom d'hôte, None = tous.
+
+        Retourne:
+            StatistiqueFlux: moyenne, min, max, variance...
+        """
+        stats = statistiques.StatistiqueFlux()
+        if hote is not None and hote not in self._index_hotes:
+            return stats
+        index_hote = self._index_hotes.get(hote)
+        debut, fin = self.fenetre(depuis, jusqua)
+        colonne = self._colonnes[nom]
+        for a, b in self._tranches(debut, fin):
+            if index_hote is None:
+                valeurs = colonne[a:b]
+            else:
+                valeurs = [
+                    v for v, h in zip(colonne[a:b], self._hotes[a:b]) if h == index_hote
+                ]
+            for v in valeurs:
+                if not math.isnan(v):
+                    stats.ajouter(v)
+        return stats
+
+    def lignes(
+        self, debut: int = 0, fin: Optional[int] = None, hote: Optional[str] = None
+    ) -> Iterator[list]:
+        """
+        Échantillons d'un intervalle logique au format des lignes
+        d'historique (listes dans l'ordre de CHAMPS_CSV, timestamp ISO,
+        None pour une valeur absente).
+
+        Args:
+            debut (int): position logique de début.
+            fin (int | None): position logique de fin (exclue), None = fin.
+            hote (str | None): nom d'hôte, None = tous.
+        """
+        fin = self._nombre if fin is None else fin
+        racine = self._disques.get("/")
+        colonnes = [self._colonnes[nom] for nom in COLONNES]
+        for a, b in self._tranches(debut, fin):
+            for position in range(a, b):
+                nom_hote = self.hotes[self._hotes[position]]
+                if hote is not None and nom_hote != hote:
+                    continue
+                epoch, cpu, total, dispo, mem, *debits = (
+                    c[position] for c in colonnes
+                )
+                disque = racine[position] if racine is not None else math.nan
+                yield [
+                    ""
+                    if math.isnan(epoch)
+                    else historique.epoch_vers_horodatage(epoch),
+                    nom_hote,
+                ] + [
+                    None if math.isnan(v) else v
+                    for v in (cpu, total, dispo, mem, disque, *debits)
+                ]
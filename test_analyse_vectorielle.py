@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests des analyses par colonnes : mêmes résultats avec NumPy et en Python
+pur, chargement des fichiers vides et des stockages plus anciens.
+
+Lancement : python -m pytest -q
+"""
+
+import csv
+import math
+import os
+
+import pytest
+
+import analyse_vectorielle
+import historique
+import models
+import stockage_binaire
+
+numpy = pytest.importorskip("numpy")
+
+NAN = math.nan
+VALEURS = [12.5, NAN, 99.9, 0.0, 47.3, 47.3, NAN, 63.1, 5.5, 88.0, 21.4, 70.2]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def mode(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(analyse_vectorielle, "np", None)
+    return request.param
+
+
+def deux_modes(monkeypatch, fonction):
+    """
+    Résultat de fonction() avec NumPy puis en Python pur.
+    """
+    avec = fonction()
+    with monkeypatch.context() as m:
+        m.setattr(analyse_vectorielle, "np", None)
+        sans = fonction()
+    return avec, sans
+
+
+def en_liste(valeurs):
+    return [float(v) for v in valeurs]
+
+
+def test_percentiles_identiques(monkeypatch):
+    rangs = (0, 25, 50, 95, 99, 100)
+    avec, sans = deux_modes(
+        monkeypatch, lambda: analyse_vectorielle.percentiles(VALEURS, rangs)
+    )
+    assert sans == pytest.approx(avec)
+    assert avec[0] == 0.0 and avec[100] == 99.9
+
+
+def test_statistiques_identiques(monkeypatch):
+    avec, sans = deux_modes(
+        monkeypatch, lambda: analyse_vectorielle.statistiques(VALEURS)
+    )
+    assert sans == pytest.approx(avec)
+    assert avec["nombre"] == len(VALEURS) - 2
+
+
+def test_moyenne_mobile_identique(monkeypatch):
+    avec, sans = deux_modes(
+        monkeypatch, lambda: analyse_vectorielle.moyenne_mobile(VALEURS, 3)
+    )
+    assert en_liste(sans) == pytest.approx(en_liste(avec), nan_ok=True)
+    assert len(avec) == len(VALEURS) - 2
+    # Seules les fenêtres qui contiennent un NaN valent NaN
+    assert [math.isnan(v) for v in avec] == [
+        True, True, False, False, True, True, True, False, False, False
+    ]
+    assert avec[2] == pytest.approx((99.9 + 0.0 + 47.3) / 3)
+
+
+def test_masque_seuil_identique(monkeypatch):
+    avec, sans = deux_modes(
+        monkeypatch, lambda: analyse_vectorielle.masque_seuil(VALEURS, 47.3)
+    )
+    assert [bool(v) for v in avec] == sans
+    # NaN jamais au-dessus du seuil
+    assert sans == [v > 47.3 for v in VALEURS]
+
+
+def test_colonne_vide(mode):
+    assert analyse_vectorielle.statistiques([])["nombre"] == 0
+    assert analyse_vectorielle.percentiles([NAN], (50,)) == {50: None}
+    assert len(analyse_vectorielle.moyenne_mobile([1.0], 2)) == 0
+
+
+def test_csv_en_tete_seul(tmp_path, mode):
+    fichier = tmp_path / "syswatch_history.csv"
+    with open(fichier, mode="w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerow(historique.CHAMPS_CSV)
+
+    for hote in (None, "srv1"):
+        colonnes = analyse_vectorielle.charger_colonnes(str(fichier), hote=hote)
+        assert {nom: len(v) for nom, v in colonnes.items()} == {
+            "cpu_percent": 0,
+            "mem_percent": 0,
+        }
+
+
+def stockage_ancien(tmp_path):
+    """
+    Stockage binaire sans la dernière colonne de débits (version
+    antérieure à son ajout).
+    """
+    source = tmp_path / "source.csv"
+    repertoire = tmp_path / "binaire"
+    with open(source, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=historique.CHAMPS_CSV, restval="")
+        writer.writeheader()
+        for seconde, (hote, cpu) in enumerate(
+            (("srv1", 10.0), ("srv2", 20.0), ("srv1", 30.0))
+        ):
+            writer.writerow(
+                {
+                    "timestamp": f"2026-01-01T10:00:0{seconde}",
+                    "hostname": hote,
+                    "cpu_percent": cpu,
+                    "mem_percent": 50.0,
+                }
+            )
+    stockage_binaire.csv_vers_binaire(str(source), str(repertoire))
+    os.remove(repertoire / f"{models.CHAMPS_IO[-1]}.f64")
+    return str(repertoire)
+
+
+@pytest.mark.parametrize("hote", [None, "srv1"])
+def test_stockage_binaire_ancien(tmp_path, mode, hote):
+    repertoire = stockage_ancien(tmp_path)
+    absente = models.CHAMPS_IO[-1]
+    colonnes = analyse_vectorielle.charger_colonnes(
+        repertoire, ("cpu_percent", "hostname", absente), hote=hote
+    )
+
+    attendu = [10.0, 20.0, 30.0] if hote is None else [10.0, 30.0]
+    assert en_liste(colonnes["cpu_percent"]) == attendu
+    assert all(math.isnan(v) for v in colonnes[absente])
+    assert len(colonnes[absente]) == len(attendu)
+    # Numéros d'hôtes lus comme des entiers, pas comme des float64
+    hotes = [0, 1, 0] if hote is None else [0, 0]
+    assert [int(v) for v in colonnes["hostname"]] == hotes
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests des débits calculés à partir de compteurs cumulés.
+
+Lancement : python -m pytest -q
+"""
+
+import importlib
+import sys
+
+import psutil
+
+import compteurs
+from compteurs import LIMITE_32_BITS
+
+
+def test_delta_progression():
+    assert compteurs._delta(100, 100) == 0
+    assert compteurs._delta(100, 350) == 250
+    # Compteur 64 bits au-delà de la limite 32 bits
+    assert compteurs._delta(2 ** 40, 2 ** 40 + 5) == 5
+
+
+def test_delta_debordement_32_bits():
+    # Proche de la limite : le compteur est repassé par zéro
+    assert compteurs._delta(LIMITE_32_BITS - 100, 50) == 150
+    assert compteurs._delta(LIMITE_32_BITS - 1, 0, maximum=1) == 1
+
+
+def test_delta_remise_a_zero():
+    # Recul loin de la limite (interface recréée après ~3 Go) : remise à
+    # zéro, pas un débordement de ~1,3 Gio
+    assert compteurs._delta(3_000_000_000, 1000, maximum=2 ** 30) is None
+    # Compteur 64 bits qui recule : jamais un débordement 32 bits
+    assert compteurs._delta(2 ** 40, 10) is None
+    # Progression au-delà du maximum plausible sur l'intervalle
+    assert compteurs._delta(LIMITE_32_BITS - 100, 50, maximum=149) is None
+
+
+def test_moteur_debits_et_debordement():
+    moteur = compteurs.MoteurCompteurs()
+    assert moteur.debits({"eth0": (LIMITE_32_BITS - 1000, 10)}, instant=0.0) == {}
+    debits = moteur.debits({"eth0": (1000, 30)}, instant=2.0)
+    assert debits == {"eth0": (1000.0, 10.0)}
+    assert moteur.debordements == 1
+    assert moteur.remises_a_zero == 0
+
+
+def test_moteur_remise_a_zero():
+    moteur = compteurs.MoteurCompteurs()
+    moteur.debits({"eth0": (3_000_000_000, 5)}, instant=0.0)
+    # Pas de débit pour l'appel de la remise à zéro, puis nouvelle référence
+    assert moteur.debits({"eth0": (1000, 1)}, instant=1.0) == {}
+    assert moteur.remises_a_zero == 1
+    assert moteur.debits({"eth0": (3000, 2)}, instant=2.0) == {
+        "eth0": (2000.0, 1.0)
+    }
+
+
+def test_import_du_collecteur_sans_lecture(monkeypatch):
+    def interdit(*args, **kwargs):
+        raise AssertionError("compteurs lus à l'import")
+
+    monkeypatch.setattr(psutil, "disk_io_counters", interdit)
+    monkeypatch.setattr(psutil, "net_io_counters", interdit)
+    # Nouvel import du module (l'original est remis en place après le test)
+    monkeypatch.delitem(sys.modules, "collector", raising=False)
+    importlib.import_module("collector")
+
+
+def test_moteur_peripheriques_apparus_et_disparus():
+    moteur = compteurs.MoteurCompteurs()
+    moteur.debits({"sda": (0, 0)}, instant=0.0)
+    # sdb apparaît : pas de débit avant l'appel suivant ; sda disparaît
+    assert moteur.debits({"sdb": (100, 0)}, instant=1.0) == {}
+    assert moteur.debits({"sda": (50, 0), "sdb": (300, 0)}, instant=2.0) == {
+        "sdb": (200.0, 0.0)
+    }
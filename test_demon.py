@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests du démon de collecte et de ses requêtes par socket Unix.
+
+Lancement : python -m pytest -q
+"""
+
+import csv
+import threading
+import time
+
+import demon
+import exporteurs
+import historique
+import syswatch_v3
+
+
+def interroger_pendant(fichier, requetes, delai=10.0):
+    """
+    Envoie les requêtes dans un thread dès que le démon répond.
+
+    Retourne:
+        dict: résultats (ou exception) par requête, rempli par le thread.
+    """
+    resultats = {}
+
+    def client():
+        fin = time.monotonic() + delai
+        for nom, requete in requetes.items():
+            while True:
+                try:
+                    resultats[nom] = demon.interroger(fichier, requete)
+                    break
+                except demon.DemonIndisponible as e:
+                    if time.monotonic() > fin:
+                        resultats[nom] = e
+                        break
+                    time.sleep(0.05)
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    return resultats, thread
+
+
+def test_stats_avec_les_episodes_du_client(tmp_path):
+    fichier = str(tmp_path / "syswatch_history.csv")
+    detection = syswatch_v3.detection_episodes()
+    processus_demon = demon.Demon(
+        exporteurs.Pipeline({"csv": exporteurs.creer("csv", fichier=fichier)}),
+        fichier,
+        intervalle=0.05,
+        nombre=40,
+        episodes=detection,
+    )
+
+    resultats, client = interroger_pendant(
+        fichier,
+        {
+            # Requête envoyée par --stats quand un démon tourne
+            "stats": {"requete": "stats", "episodes": detection},
+        },
+    )
+    processus_demon.executer()
+    client.join()
+
+    resume = resultats["stats"]
+    assert not isinstance(resume, Exception), resume
+    assert resume["statistiques"]["cpu"]["nombre"] >= 0
+    assert resume["episodes"] == []
+
+
+def test_range_disque_puis_memoire(tmp_path):
+    # Historique antérieur au démon, sur disque seulement
+    fichier = str(tmp_path / "syswatch_history.csv")
+    with open(fichier, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=historique.CHAMPS_CSV, restval="")
+        writer.writeheader()
+        for seconde in range(3):
+            writer.writerow(
+                {
+                    "timestamp": f"2020-01-01T00:00:0{seconde}",
+                    "hostname": "ancien",
+                    "cpu_percent": 10.0,
+                    "mem_percent": 20.0,
+                }
+            )
+    processus_demon = demon.Demon(
+        exporteurs.Pipeline({"csv": exporteurs.creer("csv", fichier=fichier)}),
+        fichier,
+        intervalle=0.05,
+        nombre=40,
+    )
+
+    resultats = {}
+
+    def client():
+        fin = time.monotonic() + 10
+        while time.monotonic() < fin:
+            try:
+                # Au moins un échantillon en mémoire
+                if demon.interroger(fichier, {"requete": "snapshot"}) is not None:
+                    resultats["range"] = demon.interroger(
+                        fichier, {"requete": "range", "depuis": 0}
+                    )
+                    return
+            except demon.DemonIndisponible:
+                pass
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    processus_demon.executer()
+    thread.join()
+
+    lignes = resultats["range"]["lignes"]
+    hotes = [ligne[1] for ligne in lignes]
+    timestamps = [ligne[0] for ligne in lignes]
+    assert hotes[:3] == ["ancien"] * 3
+    assert len(lignes) > 3
+    # Aucun échantillon compté deux fois (disque et mémoire)
+    assert len(set(timestamps)) == len(timestamps)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests du serveur d'agrégation de flotte avec des agents simulés.
+
+Lancement : python -m pytest -q
+"""
+
+import asyncio
+
+import pytest
+
+import serveur
+
+AGENTS = 3
+ECHANTILLONS = 20
+
+
+async def servir_agents(adresse, format_lots):
+    """
+    Démarre un serveur, y fait envoyer les agents simulés et attend que
+    tous leurs échantillons soient intégrés.
+    """
+    instance = serveur.ServeurAgregation(adresse)
+    await instance.demarrer()
+    try:
+        await serveur.simuler_agents(
+            adresse,
+            AGENTS,
+            ECHANTILLONS,
+            intervalle=0.01,
+            taille_lot=5,
+            format_lots=format_lots,
+        )
+        for _ in range(200):
+            if instance.echantillons >= AGENTS * ECHANTILLONS:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await instance.fermer()
+    return instance
+
+
+@pytest.mark.parametrize("format_lots", serveur.FORMATS)
+def test_agents_simules(tmp_path, format_lots):
+    adresse = str(tmp_path / "serveur.sock")
+    instance = asyncio.run(servir_agents(adresse, format_lots))
+
+    etat = instance.traiter({"requete": "serveur"})["resultat"]
+    assert etat["erreurs"] == 0
+    assert etat["echantillons"] == AGENTS * ECHANTILLONS
+
+    hotes = instance.traiter({"requete": "hotes"})["resultat"]
+    assert [h["hostname"] for h in hotes] == [
+        f"agent-{i:03d}" for i in range(AGENTS)
+    ]
+    assert all(h["echantillons"] == ECHANTILLONS for h in hotes)
+
+    stats = instance.traiter({"requete": "stats"})["resultat"]
+    assert stats["hotes"] == AGENTS
+    assert stats["sources"] == {"cumul": AGENTS}
+    assert stats["statistiques"]["cpu"]["nombre"] == AGENTS * ECHANTILLONS
+
+    pics = instance.traiter({"requete": "pics", "nombre": 2})["resultat"]
+    assert len(pics) == 2
+    assert pics[0]["max"] >= pics[1]["max"]
+    assert pics[0]["max"] == max(
+        h.cumul.cpu.max for h in instance.hotes.values()
+    )
+
+
+def test_requete_inconnue():
+    reponse = serveur.ServeurAgregation().traiter({"requete": "inconnue"})
+    assert reponse["ok"] is False
+
+
+def valeurs(epoch, cpu):
+    return {
+        "timestamp": epoch,
+        "hostname": "srv1",
+        "cpu_percent": cpu,
+        "mem_percent": 50.0,
+    }
+
+
+def test_minutes_echantillons_en_retard():
+    hote = serveur.EtatHote("srv1")
+    # Deux agents sous le même nom : horodatages entrelacés d'une minute
+    # sur l'autre
+    for epoch, cpu in ((60, 10.0), (125, 20.0), (70, 30.0), (130, 40.0)):
+        hote.ajouter(valeurs(epoch, cpu))
+    # Minute absente, antérieure à toutes les tranches
+    hote.ajouter(valeurs(5, 50.0))
+    # Nouvelle minute puis retard sur la minute fermée juste avant
+    hote.ajouter(valeurs(190, 60.0))
+    hote.ajouter(valeurs(179, 70.0))
+
+    tranches = [
+        (debut, cpu.nombre, cpu.moyenne)
+        for debut, cpu, _ in hote.tranches(None, None)
+    ]
+    assert tranches == [
+        (0, 1, 50.0),
+        (60, 2, 20.0),
+        (120, 3, (20.0 + 40.0 + 70.0) / 3),
+        (180, 1, 60.0),
+    ]
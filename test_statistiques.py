@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests des esquisses de quantiles (KLL) : erreur de rang après fusion.
+
+Lancement : python -m pytest -q
+"""
+
+import random
+
+import statistiques
+
+# Erreur de rang tolérée (l'erreur attendue avec k=200 est d'environ 1 %)
+ERREUR_MAX = 0.02
+
+RANGS = range(1, 100)
+
+
+def erreur_de_rang(esquisse, nombre):
+    """
+    Plus grand écart entre le rang visé et le rang de la valeur retournée,
+    pour des valeurs 0..nombre-1 (une valeur = son rang).
+    """
+    quantiles = esquisse.quantiles(RANGS)
+    return max(abs(quantiles[rang] / nombre - rang / 100) for rang in RANGS)
+
+
+def esquisses(valeurs, nombre_esquisses, repartition):
+    parties = [statistiques.EsquisseQuantiles() for _ in range(nombre_esquisses)]
+    for i, valeur in enumerate(valeurs):
+        parties[repartition(i, valeur)].ajouter(valeur)
+    return parties
+
+
+def test_erreur_de_rang_sans_fusion():
+    valeurs = list(range(100_000))
+    random.Random(1).shuffle(valeurs)
+    esquisse = statistiques.EsquisseQuantiles()
+    for valeur in valeurs:
+        esquisse.ajouter(valeur)
+    assert esquisse.nombre == 100_000
+    assert erreur_de_rang(esquisse, 100_000) <= ERREUR_MAX
+
+
+def test_erreur_de_rang_apres_fusion_entrelacee():
+    valeurs = list(range(100_000))
+    random.Random(2).shuffle(valeurs)
+    parties = esquisses(valeurs, 8, lambda i, _: i % 8)
+
+    fusion = parties[0]
+    for partie in parties[1:]:
+        fusion.fusionner(partie)
+    assert fusion.nombre == 100_000
+    assert erreur_de_rang(fusion, 100_000) <= ERREUR_MAX
+
+
+def test_erreur_de_rang_apres_fusion_de_plages_disjointes():
+    # Un hôte par plage de valeurs : chaque esquisse ne voit qu'une partie
+    # de la distribution
+    valeurs = list(range(100_000))
+    random.Random(3).shuffle(valeurs)
+    parties = esquisses(valeurs, 4, lambda _, valeur: valeur // 25_000)
+
+    # Fusion en arbre, comme les agrégats d'un niveau à l'autre
+    gauche, droite = parties[0], parties[2]
+    gauche.fusionner(parties[1])
+    droite.fusionner(parties[3])
+    droite.fusionner(gauche)
+    assert droite.nombre == 100_000
+    assert erreur_de_rang(droite, 100_000) <= ERREUR_MAX
+
+
+def test_taille_bornee():
+    esquisse = statistiques.EsquisseQuantiles()
+    for valeur in range(1_000_000):
+        esquisse.ajouter(valeur)
+    assert sum(len(niveau) for niveau in esquisse.niveaux) < 20 * esquisse.k
+
+
+def test_etat_et_fusion_apres_reprise():
+    valeurs = list(range(50_000))
+    random.Random(4).shuffle(valeurs)
+    premiere, seconde = esquisses(valeurs, 2, lambda i, _: i % 2)
+
+    reprise = statistiques.EsquisseQuantiles.depuis_etat(premiere.etat())
+    assert reprise.quantiles(RANGS) == premiere.quantiles(RANGS)
+    reprise.fusionner(seconde)
+    assert reprise.nombre == 50_000
+    assert erreur_de_rang(reprise, 50_000) <= ERREUR_MAX
+
+
+def test_esquisse_vide():
+    esquisse = statistiques.EsquisseQuantiles()
+    assert esquisse.quantiles([50, 99]) == {50: None, 99: None}
+    esquisse.fusionner(statistiques.EsquisseQuantiles())
+    assert esquisse.nombre == 0
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests du stockage en colonnes (aller-retour avec le CSV d'historique).
+
+Lancement : python -m pytest -q
+"""
+
+import csv
+import math
+import os
+
+import historique
+import models
+import stockage_binaire
+
+
+def ligne(timestamp: str, hostname: str, cpu: float, **autres):
+    row = {nom: "" for nom in historique.CHAMPS_CSV}
+    row.update(
+        timestamp=timestamp,
+        hostname=hostname,
+        cpu_percent=cpu,
+        mem_total_gb=15.5,
+        mem_dispo_gb=7.25,
+        mem_percent=53.2,
+        disk_root_percent=41.0,
+    )
+    row.update(autres)
+    return row
+
+
+LIGNES = [
+    ligne("2026-01-01T10:00:00", "srv1", 12.5, disk_read_bps=4096.0, net_pps=3.0),
+    ligne("2026-01-01T10:00:01.500000", "srv2", 99.9),
+    # Partition "/" absente et débits inconnus : valeurs vides
+    ligne("2026-01-01T10:00:02", "srv1", 0.0, disk_root_percent=""),
+]
+
+
+def ecrire_csv(chemin, lignes):
+    with open(chemin, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=historique.CHAMPS_CSV)
+        writer.writeheader()
+        writer.writerows(lignes)
+
+
+def lire_csv(chemin):
+    with open(chemin, mode="r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def normaliser(row):
+    """
+    Ligne comparable : timestamp en epoch, valeurs numériques en float.
+    """
+    resultat = {
+        "timestamp": historique.horodatage_vers_epoch(row["timestamp"]),
+        "hostname": row["hostname"],
+    }
+    for nom in historique.CHAMPS_CSV[2:]:
+        resultat[nom] = None if row[nom] == "" else float(row[nom])
+    return resultat
+
+
+def test_aller_retour_csv_binaire(tmp_path):
+    source = tmp_path / "source.csv"
+    repertoire = tmp_path / "binaire"
+    retour = tmp_path / "retour.csv"
+    ecrire_csv(source, LIGNES)
+
+    assert stockage_binaire.csv_vers_binaire(str(source), str(repertoire)) == 3
+    assert stockage_binaire.binaire_vers_csv(str(repertoire), str(retour)) == 3
+
+    assert [normaliser(r) for r in lire_csv(retour)] == [
+        normaliser({k: str(v) for k, v in r.items()}) for r in LIGNES
+    ]
+
+
+def test_colonnes_et_hotes(tmp_path):
+    source = tmp_path / "source.csv"
+    repertoire = tmp_path / "binaire"
+    ecrire_csv(source, LIGNES)
+    stockage_binaire.csv_vers_binaire(str(source), str(repertoire))
+
+    with stockage_binaire.ouvrir_colonnes(str(repertoire)) as store:
+        assert store.nombre == 3
+        assert store.hotes == ["srv1", "srv2"]
+        c = store.colonnes
+        assert list(c["hostname"]) == [0, 1, 0]
+        assert list(c["cpu_percent"]) == [12.5, 99.9, 0.0]
+        assert math.isnan(c["disk_root_percent"][2])
+        assert math.isnan(c["disk_read_bps"][1])
+
+
+def test_vidage_interrompu_et_colonne_absente(tmp_path):
+    source = tmp_path / "source.csv"
+    repertoire = tmp_path / "binaire"
+    ecrire_csv(source, LIGNES)
+    stockage_binaire.csv_vers_binaire(str(source), str(repertoire))
+
+    # Vidage interrompu : une colonne a une ligne de moins (et un octet de
+    # trop), une colonne d'une version plus récente n'existe pas encore
+    chemin_cpu = repertoire / "cpu_percent.f64"
+    with open(chemin_cpu, mode="ab") as f:
+        f.truncate(2 * 8 + 1)
+    os.remove(repertoire / f"{models.CHAMPS_IO[-1]}.f64")
+
+    with stockage_binaire.ouvrir_colonnes(str(repertoire)) as store:
+        assert store.nombre == 2
+        assert all(math.isnan(v) for v in store.colonnes[models.CHAMPS_IO[-1]])
+
+    # L'écrivain répare le stockage avant d'ajouter
+    with stockage_binaire.EcrivainBinaire(str(repertoire)) as ecrivain:
+        ecrivain.ajouter_ligne(ligne("2026-01-01T10:00:03", "srv3", 1.5))
+    with stockage_binaire.ouvrir_colonnes(str(repertoire)) as store:
+        assert store.nombre == 3
+        assert list(store.colonnes["cpu_percent"]) == [12.5, 99.9, 1.5]
+        assert store.hotes[store.colonnes["hostname"][2]] == "srv3"
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests du format binaire des échantillons (trames).
+
+Lancement : python -m pytest -q
+"""
+
+import json
+
+import pytest
+
+import models
+import trames
+
+
+def echantillon(timestamp: str, **modifications):
+    """
+    Dictionnaire de collecter_tout() avec des valeurs représentables
+    exactement (dixièmes de %, débits entiers en float32).
+    """
+    data = {
+        "timestamp": timestamp,
+        "systeme": {
+            "hostname": "srv1",
+            "os": "Linux",
+            "version": "6.1",
+            "architecture": "x86_64",
+        },
+        "cpu": {
+            "coeurs_physiques": 4,
+            "coeurs_logiques": 8,
+            "utilisation": 12.5,
+            "par_coeur": [10.0, 20.5, 0.0, 99.9],
+        },
+        "memoire": {
+            "total": 16 * 1024 ** 3,
+            "disponible": 5 * 1024 ** 3 + 123,
+            "pourcentage": 68.7,
+        },
+        "disques": [
+            {
+                "point_montage": "/",
+                "total": 500 * 1024 ** 3,
+                "utilise": 200 * 1024 ** 3,
+                "pourcentage": 40.0,
+            },
+            {"point_montage": "/mnt/nfs", "expire": True},
+            {
+                "point_montage": "/boot",
+                "total": None,
+                "utilise": None,
+                "pourcentage": None,
+            },
+        ],
+        "processus": [
+            {"pid": 1, "nom": "init", "cpu_percent": 0.5, "rss": 12 * 1024 ** 2},
+            {"pid": 4242, "nom": "python", "cpu_percent": None, "rss": 4096},
+        ],
+        "io_disques": [
+            {
+                "peripherique": "sda",
+                "octets_lus": 4096.0,
+                "octets_ecrits": 8192.0,
+                "lectures": 1.0,
+                "ecritures": 2.0,
+                "partition": False,
+            },
+            {
+                "peripherique": "sda1",
+                "octets_lus": 0.0,
+                "octets_ecrits": 0.0,
+                "lectures": 0.0,
+                "ecritures": 0.0,
+                "partition": True,
+            },
+        ],
+        "io_reseau": [
+            {
+                "interface": "eth0",
+                "octets_recus": 1500.0,
+                "octets_envoyes": 300.0,
+                "paquets_recus": 3.0,
+                "paquets_envoyes": 1.0,
+                "boucle": False,
+            },
+        ],
+    }
+    data.update(modifications)
+    return data
+
+
+def test_aller_retour_exact():
+    lot = [
+        echantillon("2026-01-01T10:00:00"),
+        echantillon("2026-01-01T10:00:01.250000"),
+        echantillon("2026-01-01T10:00:02.500000"),
+    ]
+    assert trames.decoder(trames.encoder(lot)) == lot
+
+
+def test_sentinelles():
+    cpu = {
+        "coeurs_physiques": None,
+        "coeurs_logiques": None,
+        "utilisation": 0.0,
+        "par_coeur": [],
+    }
+    (decode,) = trames.decoder(
+        trames.encoder([echantillon("2026-01-01T10:00:00", cpu=cpu)])
+    )
+
+    disques = {d["point_montage"]: d for d in decode["disques"]}
+    # Disque expiré : aucune taille
+    assert disques["/mnt/nfs"] == {"point_montage": "/mnt/nfs", "expire": True}
+    # Valeurs absentes (None) conservées
+    assert disques["/boot"]["total"] is None
+    assert disques["/boot"]["utilise"] is None
+    assert disques["/boot"]["pourcentage"] is None
+    assert decode["cpu"]["coeurs_physiques"] is None
+    assert decode["cpu"]["coeurs_logiques"] is None
+    # cpu_percent inconnu : transporté en NaN, décodé en None
+    assert decode["processus"][1]["cpu_percent"] is None
+    # Périphérique inactif : débits omis, décodés à zéro
+    assert decode["io_disques"][1]["octets_lus"] == 0.0
+    assert decode["io_disques"][1]["partition"] is True
+
+
+def test_ecart_important_coupe_la_trame():
+    # Plus de 35 minutes entre deux échantillons : l'écart ne tient pas sur
+    # 32 bits (µs), une deuxième trame commence
+    lot = [
+        echantillon("2026-01-01T10:00:00"),
+        echantillon("2026-01-01T11:00:00"),
+        echantillon("2026-01-01T11:00:01"),
+    ]
+    donnees = trames.encoder(lot)
+    premiere = trames.Decodeur.longueur(donnees[: trames.ENTETE.size])
+    assert premiere < len(donnees)
+    assert trames.decoder(donnees[:premiere]) == lot[:1]
+    assert trames.decoder(donnees) == lot
+
+
+def test_dictionnaire_partage_entre_trames():
+    encodeur, decodeur = trames.Encodeur(), trames.Decodeur()
+    premiere = encodeur.encoder([echantillon("2026-01-01T10:00:00")])
+    seconde = encodeur.encoder([echantillon("2026-01-01T10:00:01")])
+    # Les chaînes ne sont envoyées qu'une fois
+    assert len(seconde) < len(premiere)
+    assert decodeur.decoder(premiere) + decodeur.decoder(seconde) == [
+        echantillon("2026-01-01T10:00:00"),
+        echantillon("2026-01-01T10:00:01"),
+    ]
+    # La seconde trame seule suppose un dictionnaire non reçu
+    with pytest.raises(trames.TrameInvalide):
+        trames.decoder(seconde)
+
+
+def test_trame_tronquee():
+    donnees = trames.encoder([echantillon("2026-01-01T10:00:00")])
+    with pytest.raises(trames.TrameInvalide):
+        trames.decoder(donnees[:-1])
+    with pytest.raises(trames.TrameInvalide):
+        trames.decoder(b"XX" + donnees[2:])
+
+
+def test_dictionnaires_encodes_sans_conversion(monkeypatch):
+    lot = [echantillon(f"2026-01-01T10:00:{s:02d}") for s in range(3)]
+    instantanes = [models.Snapshot.depuis_dict(e) for e in lot]
+
+    def interdit(data):
+        raise AssertionError("conversion en Snapshot")
+
+    monkeypatch.setattr(models.Snapshot, "depuis_dict", interdit)
+    # Mêmes octets pour un dictionnaire et pour l'instantané équivalent
+    assert trames.encoder(lot) == trames.encoder(instantanes)
+
+
+def test_plus_compact_que_json():
+    lot = [echantillon(f"2026-01-01T10:00:{s:02d}") for s in range(10)]
+    # Un document JSON par échantillon, comme un envoi échantillon par
+    # échantillon
+    taille_json = sum(len(json.dumps(e)) for e in lot)
+    assert len(trames.encoder(lot)) * 10 < taille_json
+
+    # Flux : une trame par échantillon, dictionnaire et compression
+    # partagés
+    encodeur = trames.Encodeur()
+    assert sum(len(encodeur.encoder([e])) for e in lot) * 10 < taille_json
@@ -6,60 +6,679 @@ Module traitement - fonctions de statistiques pour SysWatch.
 """
 
 import csv
-from typing import Dict, Any, List
+import hashlib
+import io
+import json
+import math
+import os
+from typing import Dict, Any, List, Optional
 
+import agregats
+import episodes as episodes_
+import historique
+import index_historique
+import models
+import statistiques
+import stockage_binaire
 
-def calculer_moyennes(fichier_csv: str) -> Dict[str, Dict[str, float]]:
+# Percentiles rapportés par défaut (esquisses de quantiles)
+RANGS_QUANTILES = (50, 90, 99)
+
+
+class AgregateurHistorique:
     """
-    Calcule les statistiques (moyenne, min, max) pour le CPU et la mémoire
-    à partir d'un fichier CSV d'historique.
+    Agrégateur en flux des lignes de l'historique : statistiques CPU et
+    mémoire, percentiles approchés, pics au-dessus des seuils et épisodes de
+    surcharge, calculés en une seule lecture et en mémoire bornée, ainsi que
+    les statistiques des débits d'entrées/sorties (models.CHAMPS_IO) quand
+    les lignes en contiennent.
+    """
+
+    def __init__(
+        self,
+        seuil_cpu: Optional[float] = None,
+        seuil_mem: Optional[float] = None,
+        episodes: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Args:
+            seuil_cpu (float | None): seuil de pic CPU (%), None = pas de pics.
+            seuil_mem (float | None): seuil de pic mémoire (%), None = pas de pics.
+            episodes (list[dict] | None): paramètres des détecteurs d'épisodes
+                (arguments de episodes.DetecteurEpisodes, métrique "cpu" ou
+                "memoire").
+        """
+        self.seuil_cpu = seuil_cpu
+        self.seuil_mem = seuil_mem
+        self.detecteurs = [
+            episodes_.DetecteurEpisodes(**parametres) for parametres in episodes or []
+        ]
+        for detecteur in self.detecteurs:
+            if detecteur.metrique not in ("cpu", "memoire"):
+                raise ValueError(f"Métrique inconnue: {detecteur.metrique}")
+        self.cpu = statistiques.StatistiqueFlux()
+        self.memoire = statistiques.StatistiqueFlux()
+        self.quantiles_cpu = statistiques.EsquisseQuantiles()
+        self.quantiles_memoire = statistiques.EsquisseQuantiles()
+        self.debits = {
+            nom: statistiques.StatistiqueFlux() for nom in models.CHAMPS_IO
+        }
+        self.lignes_invalides = 0
+        self.pics = []
+        # Niveau d'agrégation utilisé pour répondre (None = données brutes)
+        self.niveau = None
+
+    def ajouter_ligne(self, row: Dict[str, str]):
+        """
+        Intègre une ligne lue par csv.DictReader.
+
+        Args:
+            row (dict): ligne du CSV d'historique.
+        """
+        try:
+            cpu = float((row.get("cpu_percent") or "").strip() or 0.0)
+            mem = float((row.get("mem_percent") or "").strip() or 0.0)
+        except ValueError:
+            # Ligne invalide, on l'ignore
+            self.lignes_invalides += 1
+            return
+
+        # Débits absents des lignes écrites avant leur introduction
+        debits = {}
+        for nom in models.CHAMPS_IO:
+            valeur = (row.get(nom) or "").strip()
+            if valeur:
+                try:
+                    debits[nom] = float(valeur)
+                except ValueError:
+                    pass
+
+        self.ajouter_valeurs(
+            cpu, mem, row.get("timestamp", ""), row.get("hostname", ""), debits
+        )
+
+    def ajouter_valeurs(
+        self,
+        cpu: float,
+        mem: float,
+        timestamp,
+        hostname: str,
+        debits: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Intègre un échantillon déjà décodé.
+
+        Args:
+            cpu (float): utilisation CPU (%).
+            mem (float): utilisation mémoire (%).
+            timestamp (str | float): timestamp ISO, ou secondes depuis l'epoch.
+            hostname (str): nom d'hôte.
+            debits (dict | None): colonnes de models.CHAMPS_IO connues (les
+                valeurs NaN sont ignorées).
+        """
+        if math.isnan(cpu) or math.isnan(mem):
+            self.lignes_invalides += 1
+            return
+
+        if debits:
+            for nom, valeur in debits.items():
+                if not math.isnan(valeur):
+                    self.debits[nom].ajouter(valeur)
+
+        self.cpu.ajouter(cpu)
+        self.memoire.ajouter(mem)
+        self.quantiles_cpu.ajouter(cpu)
+        self.quantiles_memoire.ajouter(mem)
+
+        for detecteur in self.detecteurs:
+            detecteur.ajouter(
+                timestamp, hostname, cpu if detecteur.metrique == "cpu" else mem
+            )
+
+        if self._est_pic(cpu, mem):
+            if isinstance(timestamp, float):
+                # Conversion faite seulement pour les pics, pas par ligne
+                timestamp = historique.epoch_vers_horodatage(timestamp)
+            self.pics.append(
+                {
+                    "timestamp": timestamp,
+                    "hostname": hostname,
+                    "cpu_percent": cpu,
+                    "mem_percent": mem,
+                }
+            )
+
+    def ajouter_agregat(self, row: Dict[str, str]):
+        """
+        Intègre une ligne d'un niveau d'agrégation (voir agregats).
+
+        Les percentiles ne sont pas dans la ligne : voir fusionner_quantiles.
+        Un pic est signalé pour chaque tranche dont le maximum dépasse un
+        seuil, avec le début de la tranche comme timestamp. Les détecteurs
+        d'épisodes suivent la moyenne de chaque tranche.
+
+        Args:
+            row (dict): ligne au format agregats.CHAMPS_AGREGATS.
+        """
+        try:
+            cpu, mem = agregats.stats_ligne(row)
+        except (KeyError, TypeError, ValueError):
+            self.lignes_invalides += 1
+            return
+
+        self.cpu.fusionner(cpu)
+        self.memoire.fusionner(mem)
+
+        if cpu.nombre:
+            debut = float(row["debut"])
+            duree = dict(agregats.NIVEAUX).get(self.niveau, 0)
+            for detecteur in self.detecteurs:
+                stats = cpu if detecteur.metrique == "cpu" else mem
+                detecteur.ajouter(
+                    debut,
+                    row.get("hostname", ""),
+                    stats.moyenne,
+                    maximum=stats.max,
+                    duree=duree,
+                )
+
+        if cpu.nombre and self._est_pic(cpu.max, mem.max):
+            self.pics.append(
+                {
+                    "timestamp": historique.epoch_vers_horodatage(int(row["debut"])),
+                    "hostname": row.get("hostname", ""),
+                    "cpu_percent": cpu.max,
+                    "mem_percent": mem.max,
+                }
+            )
+
+    def _est_pic(self, cpu: float, mem: float) -> bool:
+        if self.seuil_cpu is not None and cpu > self.seuil_cpu:
+            return True
+        return self.seuil_mem is not None and mem > self.seuil_mem
+
+    def etat(self) -> Dict[str, Any]:
+        """
+        Retourne l'état complet de l'agrégateur, sérialisable en JSON.
+        """
+        return {
+            "seuil_cpu": self.seuil_cpu,
+            "seuil_mem": self.seuil_mem,
+            "cpu": self.cpu.etat(),
+            "memoire": self.memoire.etat(),
+            "quantiles_cpu": self.quantiles_cpu.etat(),
+            "quantiles_memoire": self.quantiles_memoire.etat(),
+            "debits": {nom: stats.etat() for nom, stats in self.debits.items()},
+            "lignes_invalides": self.lignes_invalides,
+            "pics": self.pics,
+            "episodes": [detecteur.etat() for detecteur in self.detecteurs],
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat: Dict[str, Any]) -> "AgregateurHistorique":
+        """
+        Reconstruit un agrégateur à partir de etat().
+        """
+        agregateur = cls(etat["seuil_cpu"], etat["seuil_mem"])
+        agregateur.cpu = statistiques.StatistiqueFlux.depuis_resume(*etat["cpu"])
+        agregateur.memoire = statistiques.StatistiqueFlux.depuis_resume(
+            *etat["memoire"]
+        )
+        agregateur.quantiles_cpu = statistiques.EsquisseQuantiles.depuis_etat(
+            etat["quantiles_cpu"]
+        )
+        agregateur.quantiles_memoire = statistiques.EsquisseQuantiles.depuis_etat(
+            etat["quantiles_memoire"]
+        )
+        for nom, resume in etat["debits"].items():
+            agregateur.debits[nom] = statistiques.StatistiqueFlux.depuis_resume(
+                *resume
+            )
+        agregateur.lignes_invalides = etat["lignes_invalides"]
+        agregateur.pics = etat["pics"]
+        agregateur.detecteurs = [
+            episodes_.DetecteurEpisodes.depuis_etat(e)
+            for e in etat.get("episodes", [])
+        ]
+        return agregateur
+
+    def parametres_episodes(self) -> List[Dict[str, Any]]:
+        """
+        Paramètres des détecteurs d'épisodes (argument episodes du constructeur).
+        """
+        return [detecteur.parametres() for detecteur in self.detecteurs]
+
+    def episodes(self) -> List[Dict[str, Any]]:
+        """
+        Retourne:
+            list[dict]: épisodes de tous les détecteurs, triés par début
+                (voir episodes.DetecteurEpisodes.resultats).
+        """
+        resultats = []
+        for detecteur in self.detecteurs:
+            resultats.extend(detecteur.resultats())
+        return sorted(resultats, key=lambda e: e["debut"])
+
+    def fusionner_quantiles(
+        self,
+        cpu: statistiques.EsquisseQuantiles,
+        mem: statistiques.EsquisseQuantiles,
+    ):
+        """
+        Intègre des esquisses de quantiles calculées ailleurs (agrégats,
+        autre segment ou autre hôte).
+        """
+        self.quantiles_cpu.fusionner(cpu)
+        self.quantiles_memoire.fusionner(mem)
+
+    def quantiles(
+        self, rangs=RANGS_QUANTILES
+    ) -> Dict[str, Dict[float, Optional[float]]]:
+        """
+        Percentiles approchés (erreur de rang ~1%, voir EsquisseQuantiles).
+
+        Args:
+            rangs (Iterable[float]): percentiles voulus, entre 0 et 100.
+
+        Retourne:
+            dict: {'cpu': {rang: valeur}, 'memoire': {rang: valeur}}
+        """
+        return {
+            "cpu": self.quantiles_cpu.quantiles(rangs),
+            "memoire": self.quantiles_memoire.quantiles(rangs),
+        }
+
+    def resume(self, rangs=RANGS_QUANTILES) -> Dict[str, Any]:
+        """
+        Résultats de l'agrégateur, sérialisables en JSON.
+
+        Retourne:
+            dict: {
+                'niveau': str | None,
+                'statistiques': voir statistiques(),
+                'quantiles': voir quantiles(),
+                'episodes': voir episodes(),
+                'pics': list[dict],
+                'lignes_invalides': int
+            }
+        """
+        return {
+            "niveau": self.niveau,
+            "statistiques": self.statistiques(),
+            "quantiles": self.quantiles(rangs),
+            "episodes": self.episodes(),
+            "pics": self.pics,
+            "lignes_invalides": self.lignes_invalides,
+        }
+
+    def statistiques(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retourne:
+            dict: {
+                'cpu': {'moyenne', 'min', 'max', 'variance', 'ecart_type', 'nombre'},
+                'memoire': {...},
+                'io': {colonne de models.CHAMPS_IO: {...}}
+            }
+        """
+        return {
+            "cpu": self.cpu.resultat(),
+            "memoire": self.memoire.resultat(),
+            "io": {nom: stats.resultat() for nom, stats in self.debits.items()},
+        }
+
+
+def analyser_historique(
+    fichier_csv: str,
+    seuil_cpu: Optional[float] = None,
+    seuil_mem: Optional[float] = None,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+    utiliser_agregats: bool = True,
+    reprise: bool = False,
+    episodes: Optional[List[Dict[str, Any]]] = None,
+    retention: Optional[Dict[str, Any]] = None,
+) -> AgregateurHistorique:
+    """
+    Lit le fichier CSV d'historique une seule fois et retourne l'agrégateur
+    rempli (statistiques, pics et épisodes).
+
+    Pour une longue période, la réponse vient du niveau d'agrégation le plus
+    grossier qui reste assez précis (voir agregats.choisir_niveau) ; les pics
+    sont alors signalés par tranche plutôt que par échantillon.
+
+    Les segments fermés par rotation (voir historique.faire_tourner) sont lus
+    avant le fichier actif, y compris compressés.
+
+    Si le chemin est un répertoire, il est lu comme un stockage en colonnes
+    binaires (voir stockage_binaire), sans copie ni analyse de texte.
+
+    Avec un filtre de temps ou d'hôte, un CSV est lu via son index temporel
+    (voir index_historique) : seuls les blocs concernés sont lus.
 
     Args:
-        fichier_csv (str): chemin du fichier CSV.
+        fichier_csv (str): chemin du fichier CSV (ou du stockage binaire).
+        seuil_cpu (float | None): seuil de pic CPU (%).
+        seuil_mem (float | None): seuil de pic mémoire (%).
+        depuis (float | None): borne basse (secondes depuis l'epoch).
+        jusqua (float | None): borne haute (secondes depuis l'epoch).
+        hote (str | None): nom d'hôte, None = tous.
+        utiliser_agregats (bool): autorise la réponse depuis les agrégats.
+        reprise (bool): sans filtre, reprend depuis le point de reprise
+            persisté et ne lit que les lignes ajoutées depuis (voir
+            analyser_incremental).
+        episodes (list[dict] | None): paramètres des détecteurs d'épisodes
+            (voir AgregateurHistorique).
+        retention (dict | None): rétention des agrégats par niveau, pour le
+            choix du niveau (None = agregats.RETENTION_DEFAUT).
 
     Retourne:
-        dict: {
-            'cpu': {'moyenne': float, 'min': float, 'max': float},
-            'memoire': {'moyenne': float, 'min': float, 'max': float}
-        }
+        AgregateurHistorique: agrégateur (vide si le fichier est introuvable).
+    """
+    agregateur = AgregateurHistorique(seuil_cpu, seuil_mem, episodes)
 
-    Si le fichier est vide ou introuvable, retourne des valeurs None.
+    niveau = None
+    if utiliser_agregats:
+        niveau = agregats.choisir_niveau(fichier_csv, depuis, jusqua, retention)
+    if niveau is not None:
+        agregateur.niveau = niveau
+        for row in agregats.lire_niveau(fichier_csv, niveau, depuis, jusqua, hote):
+            agregateur.ajouter_agregat(row)
+        agregateur.fusionner_quantiles(
+            *agregats.lire_esquisses(fichier_csv, niveau, depuis, jusqua, hote)
+        )
+        return agregateur
+
+    if os.path.isdir(fichier_csv):
+        _analyser_binaire(fichier_csv, agregateur, depuis, jusqua, hote)
+        return agregateur
+
+    if depuis is not None or jusqua is not None or hote is not None:
+        # Segments fermés choisis d'après leurs bornes, fichier actif via
+        # son index
+        for row in historique.iterer_segments(fichier_csv, depuis, jusqua):
+            if index_historique.ligne_retenue(row, depuis, jusqua, hote):
+                agregateur.ajouter_ligne(row)
+        for row in index_historique.lire_lignes(fichier_csv, depuis, jusqua, hote):
+            agregateur.ajouter_ligne(row)
+        return agregateur
+
+    if reprise:
+        return analyser_incremental(fichier_csv, seuil_cpu, seuil_mem, episodes)
+
+    # Segments fermés (compressés ou non) puis fichier actif ; un fichier
+    # inexistant donne un agrégateur vide
+    for row in historique.iterer_lignes(fichier_csv):
+        agregateur.ajouter_ligne(row)
+
+    return agregateur
+
+
+def _analyser_binaire(
+    repertoire: str,
+    agregateur: AgregateurHistorique,
+    depuis: Optional[float] = None,
+    jusqua: Optional[float] = None,
+    hote: Optional[str] = None,
+):
+    """
+    Alimente l'agrégateur depuis un stockage en colonnes projeté en mémoire.
     """
-    stats = {
-        "cpu": {"moyenne": None, "min": None, "max": None},
-        "memoire": {"moyenne": None, "min": None, "max": None},
-    }
+    with stockage_binaire.ouvrir_colonnes(repertoire) as store:
+        c = store.colonnes
+        hotes = store.hotes
+        ajouter = agregateur.ajouter_valeurs
+
+        if hote is not None and hote not in hotes:
+            return
+        index_hote = hotes.index(hote) if hote is not None else None
+        filtrer_temps = depuis is not None or jusqua is not None
+        bas = depuis if depuis is not None else -math.inf
+        haut = jusqua if jusqua is not None else math.inf
+
+        for ts, cpu, mem, h, *debits in zip(
+            c["timestamp"],
+            c["cpu_percent"],
+            c["mem_percent"],
+            c["hostname"],
+            *(c[nom] for nom in models.CHAMPS_IO),
+        ):
+            if index_hote is not None and h != index_hote:
+                continue
+            if filtrer_temps and not bas <= ts <= haut:
+                continue
+            ajouter(cpu, mem, ts, hotes[h], dict(zip(models.CHAMPS_IO, debits)))
+
+
+# --- Point de reprise --------------------------------------------------------
+
+# Un point de reprise d'une autre version est recalculé :
+#   2 : esquisses de quantiles CPU et mémoire
+#   3 : statistiques des débits d'entrées/sorties
+VERSION_REPRISE = 3
+
+# Octets lus par bloc lors de la reprise
+TAILLE_BLOC_LECTURE = 4 * 1024 * 1024
+
+# Octets du début du fichier actif servant à le reconnaître (même fichier,
+# ou segment issu de sa rotation).
+TAILLE_SIGNATURE = 4096
+
+
+def chemin_reprise(fichier_csv: str) -> str:
+    """
+    Retourne le chemin du point de reprise associé à un CSV d'historique.
+    """
+    return fichier_csv + ".ckpt"
+
+
+def _signature(f, octets: int) -> str:
+    f.seek(0)
+    return hashlib.sha1(f.read(octets)).hexdigest()
+
+
+def _consommer(f, position: int, agregateur: AgregateurHistorique) -> int:
+    """
+    Intègre les lignes complètes d'un fichier binaire à partir d'une
+    position, par blocs, et retourne la position après la dernière ligne.
+    """
+    f.seek(0)
+    entete = f.readline()
+    champs = next(csv.reader([entete.decode("utf-8")]), [])
+    if not champs:
+        return 0
+    position = max(position, len(entete))
+    f.seek(position)
+
+    reste = b""
+    while True:
+        bloc = f.read(TAILLE_BLOC_LECTURE)
+        if not bloc:
+            break
+        donnees = reste + bloc
+        coupure = donnees.rfind(b"\n") + 1
+        reste = donnees[coupure:]
+        if coupure:
+            texte = donnees[:coupure].decode("utf-8")
+            for row in csv.DictReader(io.StringIO(texte), fieldnames=champs):
+                agregateur.ajouter_ligne(row)
+            position += coupure
+    return position
+
+
+def analyser_incremental(
+    fichier_csv: str,
+    seuil_cpu: Optional[float] = None,
+    seuil_mem: Optional[float] = None,
+    episodes: Optional[List[Dict[str, Any]]] = None,
+) -> AgregateurHistorique:
+    """
+    Statistiques de tout l'historique CSV en ne lisant que les lignes
+    ajoutées depuis l'appel précédent.
+
+    L'état de l'agrégateur est persisté avec la position lue dans le fichier
+    actif et la liste des segments déjà intégrés. Un segment issu de la
+    rotation du fichier actif est reconnu à sa signature et repris à la même
+    position. Si un fichier déjà lu a été tronqué, remplacé ou supprimé,
+    tout est recalculé.
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV actif.
+        seuil_cpu (float | None): seuil de pic CPU (%).
+        seuil_mem (float | None): seuil de pic mémoire (%).
+        episodes (list[dict] | None): paramètres des détecteurs d'épisodes
+            (voir AgregateurHistorique).
+
+    Retourne:
+        AgregateurHistorique: agrégateur à jour.
+    """
+    agregateur = AgregateurHistorique(seuil_cpu, seuil_mem, episodes)
+    etat = _charger_reprise(fichier_csv, agregateur)
+    if etat is None:
+        etat = {"segments": [], "actif": None, "agregateur": None}
+    else:
+        agregateur = etat["agregateur"]
+
+    segments = historique.lister_segments(fichier_csv)
+    noms = [_nom_segment(chemin) for chemin, _, _ in segments]
+    deja_lus = set(etat["segments"])
+    actif = etat["actif"]
+
+    if not deja_lus.issubset(noms):
+        # Un segment déjà intégré a disparu : les statistiques seraient fausses
+        return _recalculer(fichier_csv, seuil_cpu, seuil_mem, episodes)
+
+    for (chemin, _, _), nom in zip(segments, noms):
+        if nom in deja_lus:
+            continue
+        with historique.ouvrir_segment(chemin, binaire=True) as f:
+            position = 0
+            if (
+                actif is not None
+                and _signature(f, actif["octets"]) == actif["signature"]
+            ):
+                # Ancien fichier actif tourné : on reprend où on en était
+                position = actif["position"]
+                actif = None
+            _consommer(f, position, agregateur)
+        deja_lus.add(nom)
 
     try:
-        with open(fichier_csv, mode="r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-            cpu_vals = []
-            mem_vals = []
+        with open(fichier_csv, mode="rb") as f:
+            taille = os.fstat(f.fileno()).st_size
+            position = 0
+            if actif is not None:
+                if (
+                    taille < actif["position"]
+                    or _signature(f, actif["octets"]) != actif["signature"]
+                ):
+                    # Fichier actif tronqué ou remplacé sans rotation
+                    return _recalculer(fichier_csv, seuil_cpu, seuil_mem, episodes)
+                position = actif["position"]
+            position = _consommer(f, position, agregateur)
+            octets = min(position, TAILLE_SIGNATURE)
+            actif = {
+                "position": position,
+                "octets": octets,
+                "signature": _signature(f, octets),
+            }
+    except FileNotFoundError:
+        actif = None
 
-            for row in reader:
-                try:
-                    cpu = float(row.get("cpu_percent", "").strip() or 0.0)
-                    mem = float(row.get("mem_percent", "").strip() or 0.0)
-                    cpu_vals.append(cpu)
-                    mem_vals.append(mem)
-                except ValueError:
-                    # Ligne invalide, on l'ignore
-                    continue
+    _sauver_reprise(
+        fichier_csv,
+        {
+            "version": VERSION_REPRISE,
+            "segments": sorted(deja_lus),
+            "actif": actif,
+            "agregateur": agregateur.etat(),
+        },
+    )
+    return agregateur
 
-        if cpu_vals and mem_vals:
-            stats["cpu"]["moyenne"] = sum(cpu_vals) / len(cpu_vals)
-            stats["cpu"]["min"] = min(cpu_vals)
-            stats["cpu"]["max"] = max(cpu_vals)
 
-            stats["memoire"]["moyenne"] = sum(mem_vals) / len(mem_vals)
-            stats["memoire"]["min"] = min(mem_vals)
-            stats["memoire"]["max"] = max(mem_vals)
+def _nom_segment(chemin: str) -> str:
+    """
+    Nom d'un segment sans extension de compression (stable à la compression).
+    """
+    nom = os.path.basename(chemin)
+    for extension, _ in historique.COMPRESSIONS.values():
+        if nom.endswith(extension):
+            return nom[: -len(extension)]
+    return nom
+
 
+def _recalculer(
+    fichier_csv: str,
+    seuil_cpu: Optional[float],
+    seuil_mem: Optional[float],
+    episodes: Optional[List[Dict[str, Any]]],
+) -> AgregateurHistorique:
+    try:
+        os.remove(chemin_reprise(fichier_csv))
     except FileNotFoundError:
-        # Fichier inexistant : on laisse les valeurs à None
         pass
+    return analyser_incremental(fichier_csv, seuil_cpu, seuil_mem, episodes)
+
+
+def _charger_reprise(
+    fichier_csv: str, agregateur: AgregateurHistorique
+) -> Optional[Dict[str, Any]]:
+    """
+    Point de reprise utilisable avec les paramètres de `agregateur`, avec
+    sa clé 'agregateur' déjà reconstruite ; None s'il faut tout recalculer.
+    """
+    try:
+        with open(chemin_reprise(fichier_csv), mode="r", encoding="utf-8") as f:
+            etat = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if etat.get("version") != VERSION_REPRISE:
+        return None
+    sauve = etat.get("agregateur") or {}
+    try:
+        etat["agregateur"] = AgregateurHistorique.depuis_etat(sauve)
+    except (KeyError, TypeError, ValueError):
+        # Clé manquante : point de reprise incomplet, recalculé
+        return None
+    if (
+        sauve.get("seuil_cpu") != agregateur.seuil_cpu
+        or sauve.get("seuil_mem") != agregateur.seuil_mem
+        or [e["parametres"] for e in sauve.get("episodes", [])]
+        != agregateur.parametres_episodes()
+    ):
+        # Seuils ou détecteurs différents : les pics et épisodes déjà relevés
+        # ne sont plus valables
+        return None
+    return etat
+
+
+def _sauver_reprise(fichier_csv: str, etat: Dict[str, Any]):
+    chemin = chemin_reprise(fichier_csv)
+    temporaire = chemin + ".tmp"
+    with open(temporaire, mode="w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False)
+    os.replace(temporaire, chemin)
+
+
+def calculer_moyennes(fichier_csv: str) -> Dict[str, Dict[str, float]]:
+    """
+    Calcule les statistiques (moyenne, min, max) pour le CPU et la mémoire
+    à partir d'un fichier CSV d'historique.
+
+    Args:
+        fichier_csv (str): chemin du fichier CSV (ou du stockage binaire).
+
+    Retourne:
+        dict: {
+            'cpu': {'moyenne': float, 'min': float, 'max': float, ...},
+            'memoire': {'moyenne': float, 'min': float, 'max': float, ...}
+        }
+        (avec en plus 'variance', 'ecart_type' et 'nombre' par métrique)
 
-    return stats
+    Si le fichier est vide ou introuvable, retourne des valeurs None.
+    """
+    return analyser_historique(fichier_csv).statistiques()
 
 
 def detecter_pics(
@@ -82,30 +701,4 @@ def detecter_pics(
                 'mem_percent': float
             }
     """
-    pics = []
-
-    try:
-        with open(fichier_csv, mode="r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                try:
-                    cpu = float(row.get("cpu_percent", "").strip() or 0.0)
-                    mem = float(row.get("mem_percent", "").strip() or 0.0)
-                except ValueError:
-                    continue
-
-                if cpu > seuil_cpu or mem > seuil_mem:
-                    pics.append(
-                        {
-                            "timestamp": row.get("timestamp", ""),
-                            "hostname": row.get("hostname", ""),
-                            "cpu_percent": cpu,
-                            "mem_percent": mem,
-                        }
-                    )
-    except FileNotFoundError:
-        # Pas de fichier = pas de pics
-        return []
-
-    return pics
+    return analyser_historique(fichier_csv, seuil_cpu, seuil_mem).pics
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module trames - format binaire compact des échantillons, pour leur envoi.
+
+Un échantillon en JSON répète à chaque fois ses noms de clés, son nom
+d'hôte et ses points de montage. Une trame regroupe un lot d'échantillons
+dans des structures binaires de taille fixe (module struct) :
+    - les chaînes (points de montage, périphériques, noms de processus, et
+      le dictionnaire 'systeme' qui porte le nom d'hôte) sont remplacées
+      par leur numéro dans un dictionnaire ; une trame ne transporte que
+      les chaînes apparues depuis la trame précédente du même Encodeur ;
+    - le timestamp est un écart en microsecondes avec l'échantillon
+      précédent ;
+    - les pourcentages sont des entiers en dixièmes (la précision de psutil
+      et du collecteur Linux), les débits des flottants 32 bits, omis pour
+      un périphérique inactif ;
+    - le corps des trames d'un Encodeur forme un seul flux deflate (zlib),
+      vidé à chaque trame : les valeurs répétées d'un échantillon à l'autre
+      (tailles, noms, nombres de coeurs) ne coûtent presque plus rien.
+
+Format (petit-boutiste) :
+
+    trame      = ENTETE, deflate(chaînes nouvelles, échantillons)
+    chaîne     = longueur (uint16), UTF-8
+    échantillon = ECHANTILLON, par_coeur (uint16 * n), DISQUE * n,
+                  PROCESSUS * n, (PERIPHERIQUE [+ DEBITS]) * n pour les
+                  disques puis pour les interfaces
+
+Une trame dont l'indicateur NOUVEAU_DICTIONNAIRE est levé repart d'un
+dictionnaire vide et un nouveau flux deflate : c'est le cas de la première
+trame d'un Encodeur, qui peut donc être décodée seule.
+
+Utilisation:
+    donnees = encoder([collector.collecter_tout(), ...])
+    decoder(donnees)     # liste de dictionnaires de collecter_tout()
+
+    # Flux (connexion persistante) : dictionnaire partagé entre les trames
+    encodeur, decodeur = Encodeur(), Decodeur()
+    decodeur.decoder(encodeur.encoder(lot))
+"""
+
+import json
+import math
+import struct
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+import models
+
+SIGNATURE = b"SW"
+VERSION = 2
+
+# Indicateurs de trame
+NOUVEAU_DICTIONNAIRE = 0x01
+
+# Signature, version, indicateurs, nombre d'échantillons, nombre de chaînes
+# nouvelles, longueur totale de la trame, timestamp de référence (µs)
+ENTETE = struct.Struct("<2sBBHHIq")
+
+# Écart de timestamp (µs), systeme, cpu (dixièmes de %), coeurs physiques,
+# coeurs logiques, mémoire (dixièmes de %), mémoire totale, disponible,
+# nombres de coeurs (par_coeur), disques, processus, io_disques, io_reseau
+ECHANTILLON = struct.Struct("<iHHHHHQQHHHHH")
+
+# Point de montage, pourcentage (dixièmes), total, utilisé
+DISQUE = struct.Struct("<HHQQ")
+
+# pid, nom, cpu_percent (NaN = inconnu), rss
+PROCESSUS = struct.Struct("<IHfQ")
+
+# Nom, indicateurs (ACTIF, PARTITION_OU_BOUCLE)
+PERIPHERIQUE = struct.Struct("<HB")
+DEBITS = struct.Struct("<4f")
+ACTIF = 0x01
+PARTITION_OU_BOUCLE = 0x02
+
+# Valeur absente (None) d'un entier non signé
+ABSENT_16 = 0xFFFF
+ABSENT_64 = 0xFFFFFFFFFFFFFFFF
+# Disque qui n'a pas répondu à temps (expire) : pourcentage
+EXPIRE_16 = 0xFFFE
+
+ECART_MAX = 2 ** 31 - 1
+TAILLE_MAX_DICTIONNAIRE = 0xFFFF
+
+# Compression rapide (niveau 1) : l'essentiel du gain vient des répétitions
+NIVEAU_COMPRESSION = 1
+# Corps décompressé maximal d'une trame (protection du décodeur)
+TAILLE_MAX_CORPS = 64 * 1024 * 1024
+
+
+class TrameInvalide(ValueError):
+    """
+    Données qui ne sont pas une trame SysWatch lisible.
+    """
+
+
+def _dixiemes(pourcentage) -> int:
+    if pourcentage is None:
+        return ABSENT_16
+    return int(round(pourcentage * 10))
+
+
+def _depuis_dixiemes(valeur: int):
+    return None if valeur == ABSENT_16 else valeur / 10
+
+
+def _entier(valeur, absent: int) -> int:
+    return absent if valeur is None else valeur
+
+
+def _depuis_entier(valeur: int, absent: int):
+    return None if valeur == absent else valeur
+
+
+def horodatage_vers_us(timestamp: str) -> int:
+    """
+    Timestamp ISO (heure locale) en microsecondes depuis l'epoch.
+
+    Lève:
+        ValueError: timestamp invalide.
+    """
+    return round(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+
+
+def us_vers_horodatage(us: int) -> str:
+    """
+    Microsecondes depuis l'epoch en timestamp ISO (heure locale).
+    """
+    return datetime.fromtimestamp(us / 1_000_000).isoformat()
+
+
+def _timestamp(echantillon) -> str:
+    if isinstance(echantillon, models.Snapshot):
+        return echantillon.timestamp
+    return echantillon.get("timestamp", "")
+
+
+def _compresseur():
+    # Flux deflate brut : l'ENTETE porte déjà longueur et version
+    return zlib.compressobj(NIVEAU_COMPRESSION, zlib.DEFLATED, -15)
+
+
+class Encodeur:
+    """
+    Encodage des lots d'échantillons en trames, avec un dictionnaire de
+    chaînes conservé d'une trame à l'autre (un Encodeur par connexion).
+    """
+
+    def __init__(self):
+        self._chaines = {}
+        # Chaînes ajoutées depuis la dernière trame
+        self._nouvelles = []
+        # Cache dict systeme -> numéro (le même objet à chaque collecte)
+        self._systemes = {}
+        self._compresseur = _compresseur()
+
+    def reinitialiser(self):
+        """
+        Oublie le dictionnaire : la trame suivante est décodable seule
+        (ex: après une reconnexion).
+        """
+        self._chaines = {}
+        self._nouvelles = []
+        self._systemes = {}
+        self._compresseur = _compresseur()
+
+    def _numero(self, chaine: str) -> int:
+        numero = self._chaines.get(chaine)
+        if numero is None:
+            numero = len(self._chaines)
+            self._chaines[chaine] = numero
+            self._nouvelles.append(chaine)
+        return numero
+
+    def _numero_systeme(self, systeme: Dict[str, Any]) -> int:
+        cle = id(systeme)
+        entree = self._systemes.get(cle)
+        # L'objet mis en cache est gardé avec son numéro : son id ne peut
+        # pas être réutilisé par un autre dictionnaire
+        if entree is None or entree[0] != systeme:
+            texte = json.dumps(systeme, separators=(",", ":"), ensure_ascii=False)
+            entree = (dict(systeme), self._numero(texte), systeme)
+            self._systemes[cle] = entree
+        return entree[1]
+
+    def encoder(self, echantillons: Iterable) -> bytes:
+        """
+        Encode un lot d'échantillons.
+
+        Args:
+            echantillons (Iterable[models.Snapshot | dict]): instantanés de
+                collecter_instantane(), ou dictionnaires de collecter_tout(),
+                dans l'ordre chronologique.
+
+        Retourne:
+            bytes: une trame, ou plusieurs si le lot est trop long ou si
+            deux timestamps sont trop éloignés (plus de 35 minutes).
+
+        Lève:
+            ValueError: timestamp invalide.
+            KeyError: dictionnaire incomplet.
+        """
+        # Dictionnaires encodés tels quels : pas de conversion en Snapshot
+        instantanes = list(echantillons)
+        trames = []
+        debut = 0
+        try:
+            while debut < len(instantanes):
+                trame, debut = self._encoder_trame(instantanes, debut)
+                trames.append(trame)
+        except BaseException:
+            # Des chaînes ont pu entrer dans le dictionnaire sans être
+            # envoyées : la trame suivante repart d'un dictionnaire vide
+            self.reinitialiser()
+            raise
+        return b"".join(trames)
+
+    def _encoder_trame(self, instantanes: list, debut: int) -> Tuple[bytes, int]:
+        if len(self._chaines) > TAILLE_MAX_DICTIONNAIRE - 1024:
+            # Dictionnaire presque plein (noms de processus éphémères)
+            self.reinitialiser()
+        nouveau = not self._chaines
+        reference = horodatage_vers_us(_timestamp(instantanes[debut]))
+        precedent = reference
+        morceaux = []
+        fin = debut
+        while fin < len(instantanes) and fin - debut < 0xFFFF:
+            instantane = instantanes[fin]
+            us = horodatage_vers_us(_timestamp(instantane))
+            if not -ECART_MAX <= us - precedent <= ECART_MAX:
+                break
+            if len(self._chaines) > TAILLE_MAX_DICTIONNAIRE - 1024:
+                break
+            if isinstance(instantane, models.Snapshot):
+                self._encoder_echantillon(instantane, us - precedent, morceaux)
+            else:
+                self._encoder_donnees(instantane, us - precedent, morceaux)
+            precedent = us
+            fin += 1
+
+        chaines = []
+        for chaine in self._nouvelles:
+            brut = chaine.encode("utf-8")
+            chaines.append(struct.pack("<H", len(brut)))
+            chaines.append(brut)
+        chaines.extend(morceaux)
+        compresseur = self._compresseur
+        corps = compresseur.compress(b"".join(chaines)) + compresseur.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        entete = ENTETE.pack(
+            SIGNATURE,
+            VERSION,
+            NOUVEAU_DICTIONNAIRE if nouveau else 0,
+            fin - debut,
+            len(self._nouvelles),
+            ENTETE.size + len(corps),
+            reference,
+        )
+        self._nouvelles = []
+        return entete + corps, fin
+
+    def _encoder_echantillon(self, i: models.Snapshot, ecart: int, morceaux: list):
+        cpu = i.cpu
+        memoire = i.memoire
+        morceaux.append(
+            ECHANTILLON.pack(
+                ecart,
+                self._numero_systeme(i.systeme),
+                _dixiemes(cpu.utilisation),
+                _entier(cpu.coeurs_physiques, ABSENT_16),
+                _entier(cpu.coeurs_logiques, ABSENT_16),
+                _dixiemes(memoire.pourcentage),
+                memoire.total,
+                memoire.disponible,
+                len(cpu.par_coeur),
+                len(i.disques),
+                len(i.processus),
+                len(i.io_disques),
+                len(i.io_reseau),
+            )
+        )
+        if cpu.par_coeur:
+            morceaux.append(
+                struct.pack(
+                    f"<{len(cpu.par_coeur)}H",
+                    *[int(round(v * 10)) for v in cpu.par_coeur],
+                )
+            )
+        numero = self._numero
+        for d in i.disques:
+            morceaux.append(
+                DISQUE.pack(
+                    numero(d.point_montage),
+                    EXPIRE_16 if d.expire else _dixiemes(d.pourcentage),
+                    _entier(d.total, ABSENT_64),
+                    _entier(d.utilise, ABSENT_64),
+                )
+            )
+        for p in i.processus:
+            morceaux.append(
+                PROCESSUS.pack(
+                    p.pid,
+                    numero(p.nom),
+                    math.nan if p.cpu_percent is None else p.cpu_percent,
+                    p.rss,
+                )
+            )
+        for d in i.io_disques:
+            valeurs = (d.octets_lus, d.octets_ecrits, d.lectures, d.ecritures)
+            self._encoder_debits(
+                numero(d.peripherique), d.partition, valeurs, morceaux
+            )
+        for r in i.io_reseau:
+            valeurs = (
+                r.octets_recus,
+                r.octets_envoyes,
+                r.paquets_recus,
+                r.paquets_envoyes,
+            )
+            self._encoder_debits(numero(r.interface), r.boucle, valeurs, morceaux)
+
+    def _encoder_donnees(self, data: Dict[str, Any], ecart: int, morceaux: list):
+        """
+        Comme _encoder_echantillon(), pour un dictionnaire de collecter_tout()
+        (processus et débits facultatifs).
+        """
+        cpu = data["cpu"]
+        memoire = data["memoire"]
+        par_coeur = cpu["par_coeur"]
+        disques = data["disques"]
+        processus = data.get("processus") or []
+        io_disques = data.get("io_disques") or []
+        io_reseau = data.get("io_reseau") or []
+        morceaux.append(
+            ECHANTILLON.pack(
+                ecart,
+                self._numero_systeme(data["systeme"]),
+                _dixiemes(cpu["utilisation"]),
+                _entier(cpu["coeurs_physiques"], ABSENT_16),
+                _entier(cpu["coeurs_logiques"], ABSENT_16),
+                _dixiemes(memoire["pourcentage"]),
+                memoire["total"],
+                memoire["disponible"],
+                len(par_coeur),
+                len(disques),
+                len(processus),
+                len(io_disques),
+                len(io_reseau),
+            )
+        )
+        if par_coeur:
+            morceaux.append(
+                struct.pack(
+                    f"<{len(par_coeur)}H", *[int(round(v * 10)) for v in par_coeur]
+                )
+            )
+        numero = self._numero
+        for d in disques:
+            if d.get("expire"):
+                point = numero(d["point_montage"])
+                morceaux.append(DISQUE.pack(point, EXPIRE_16, ABSENT_64, ABSENT_64))
+                continue
+            morceaux.append(
+                DISQUE.pack(
+                    numero(d["point_montage"]),
+                    _dixiemes(d["pourcentage"]),
+                    _entier(d["total"], ABSENT_64),
+                    _entier(d["utilise"], ABSENT_64),
+                )
+            )
+        for p in processus:
+            cpu_percent = p["cpu_percent"]
+            morceaux.append(
+                PROCESSUS.pack(
+                    p["pid"],
+                    numero(p["nom"]),
+                    math.nan if cpu_percent is None else cpu_percent,
+                    p["rss"],
+                )
+            )
+        for d in io_disques:
+            valeurs = (
+                d["octets_lus"],
+                d["octets_ecrits"],
+                d["lectures"],
+                d["ecritures"],
+            )
+            self._encoder_debits(
+                numero(d["peripherique"]), d["partition"], valeurs, morceaux
+            )
+        for r in io_reseau:
+            valeurs = (
+                r["octets_recus"],
+                r["octets_envoyes"],
+                r["paquets_recus"],
+                r["paquets_envoyes"],
+            )
+            self._encoder_debits(numero(r["interface"]), r["boucle"], valeurs, morceaux)
+
+    @staticmethod
+    def _encoder_debits(numero: int, marque: bool, valeurs: tuple, morceaux: list):
+        indicateurs = PARTITION_OU_BOUCLE if marque else 0
+        if any(valeurs):
+            morceaux.append(PERIPHERIQUE.pack(numero, indicateurs | ACTIF))
+            morceaux.append(DEBITS.pack(*valeurs))
+        else:
+            # Périphérique inactif : pas de débits
+            morceaux.append(PERIPHERIQUE.pack(numero, indicateurs))
+
+
+class Decodeur:
+    """
+    Décodage des trames d'un Encodeur, dans l'ordre où elles ont été
+    produites (un Decodeur par connexion).
+    """
+
+    def __init__(self):
+        self._chaines = []
+        # numéro -> dict systeme décodé
+        self._systemes = {}
+        # Flux deflate des trames, ouvert par la première trame
+        self._decompresseur = None
+
+    @staticmethod
+    def longueur(entete: bytes) -> int:
+        """
+        Longueur totale d'une trame d'après ses ENTETE.size premiers octets
+        (lecture d'un flux).
+
+        Lève:
+            TrameInvalide: pas une trame SysWatch de cette version.
+        """
+        signature, version, _, _, _, longueur, _ = ENTETE.unpack_from(entete)
+        if signature != SIGNATURE or version != VERSION:
+            raise TrameInvalide("Signature ou version de trame inconnue.")
+        if longueur < ENTETE.size:
+            raise TrameInvalide("Longueur de trame invalide.")
+        return longueur
+
+    def decoder(self, donnees: bytes) -> List[Dict[str, Any]]:
+        """
+        Décode une ou plusieurs trames consécutives.
+
+        Retourne:
+            list[dict]: échantillons sous la forme de collecter_tout().
+
+        Lève:
+            TrameInvalide: données tronquées, ou trame qui suppose un
+                dictionnaire que ce Decodeur n'a pas reçu.
+        """
+        return list(self.iterer(donnees))
+
+    def iterer(self, donnees: bytes) -> Iterator[Dict[str, Any]]:
+        """
+        Comme decoder(), échantillon par échantillon.
+        """
+        vue = memoryview(donnees)
+        position = 0
+        while position < len(vue):
+            if len(vue) - position < ENTETE.size:
+                raise TrameInvalide("Trame tronquée.")
+            longueur = self.longueur(vue[position : position + ENTETE.size])
+            if len(vue) - position < longueur:
+                raise TrameInvalide("Trame tronquée.")
+            try:
+                yield from self._decoder_trame(vue[position : position + longueur])
+            except (struct.error, IndexError, UnicodeDecodeError, zlib.error) as e:
+                raise TrameInvalide(f"Trame invalide : {e}") from e
+            position += longueur
+
+    def _chaine(self, numero: int) -> str:
+        return self._chaines[numero]
+
+    def _systeme(self, numero: int) -> Dict[str, Any]:
+        systeme = self._systemes.get(numero)
+        if systeme is None:
+            systeme = json.loads(self._chaines[numero])
+            self._systemes[numero] = systeme
+        return dict(systeme)
+
+    def _decoder_trame(self, trame: memoryview) -> Iterator[Dict[str, Any]]:
+        _, _, indicateurs, nombre, nouvelles, _, us = ENTETE.unpack_from(trame)
+        if indicateurs & NOUVEAU_DICTIONNAIRE:
+            self._chaines = []
+            self._systemes = {}
+            self._decompresseur = zlib.decompressobj(-15)
+        elif self._decompresseur is None:
+            raise TrameInvalide("Trame décodée sans les trames précédentes.")
+        corps = memoryview(
+            self._decompresseur.decompress(trame[ENTETE.size :], TAILLE_MAX_CORPS)
+        )
+        if self._decompresseur.unconsumed_tail:
+            raise TrameInvalide("Trame décompressée trop longue.")
+        position = 0
+        for _ in range(nouvelles):
+            (taille,) = struct.unpack_from("<H", corps, position)
+            position += 2
+            self._chaines.append(str(corps[position : position + taille], "utf-8"))
+            position += taille
+
+        chaine = self._chaine
+        for _ in range(nombre):
+            (
+                ecart,
+                systeme,
+                cpu,
+                physiques,
+                logiques,
+                memoire,
+                total,
+                disponible,
+                n_coeurs,
+                n_disques,
+                n_processus,
+                n_io_disques,
+                n_io_reseau,
+            ) = ECHANTILLON.unpack_from(corps, position)
+            position += ECHANTILLON.size
+            us += ecart
+
+            par_coeur = struct.unpack_from(f"<{n_coeurs}H", corps, position)
+            position += 2 * n_coeurs
+
+            disques = []
+            for _ in range(n_disques):
+                point, pourcentage, d_total, utilise = DISQUE.unpack_from(
+                    corps, position
+                )
+                position += DISQUE.size
+                if pourcentage == EXPIRE_16:
+                    disques.append({"point_montage": chaine(point), "expire": True})
+                    continue
+                disques.append(
+                    {
+                        "point_montage": chaine(point),
+                        "total": _depuis_entier(d_total, ABSENT_64),
+                        "utilise": _depuis_entier(utilise, ABSENT_64),
+                        "pourcentage": _depuis_dixiemes(pourcentage),
+                    }
+                )
+
+            data = {
+                "timestamp": us_vers_horodatage(us),
+                "systeme": self._systeme(systeme),
+                "cpu": {
+                    "coeurs_physiques": _depuis_entier(physiques, ABSENT_16),
+                    "coeurs_logiques": _depuis_entier(logiques, ABSENT_16),
+                    "utilisation": _depuis_dixiemes(cpu),
+                    "par_coeur": [v / 10 for v in par_coeur],
+                },
+                "memoire": {
+                    "total": total,
+                    "disponible": disponible,
+                    "pourcentage": _depuis_dixiemes(memoire),
+                },
+                "disques": disques,
+            }
+
+            if n_processus:
+                processus = []
+                for _ in range(n_processus):
+                    pid, nom, p_cpu, rss = PROCESSUS.unpack_from(corps, position)
+                    position += PROCESSUS.size
+                    processus.append(
+                        {
+                            "pid": pid,
+                            "nom": chaine(nom),
+                            "cpu_percent": None if math.isnan(p_cpu) else p_cpu,
+                            "rss": rss,
+                        }
+                    )
+                data["processus"] = processus
+
+            if n_io_disques:
+                io_disques = []
+                for _ in range(n_io_disques):
+                    nom, marque, valeurs, position = self._decoder_debits(
+                        corps, position
+                    )
+                    lus, ecrits, lectures, ecritures = valeurs
+                    io_disques.append(
+                        {
+                            "peripherique": nom,
+                            "octets_lus": lus,
+                            "octets_ecrits": ecrits,
+                            "lectures": lectures,
+                            "ecritures": ecritures,
+                            "partition": marque,
+                        }
+                    )
+                data["io_disques"] = io_disques
+
+            if n_io_reseau:
+                io_reseau = []
+                for _ in range(n_io_reseau):
+                    nom, marque, valeurs, position = self._decoder_debits(
+                        corps, position
+                    )
+                    recus, envoyes, p_recus, p_envoyes = valeurs
+                    io_reseau.append(
+                        {
+                            "interface": nom,
+                            "octets_recus": recus,
+                            "octets_envoyes": envoyes,
+                            "paquets_recus": p_recus,
+                            "paquets_envoyes": p_envoyes,
+                            "boucle": marque,
+                        }
+                    )
+                data["io_reseau"] = io_reseau
+
+            yield data
+
+    def _decoder_debits(self, corps: memoryview, position: int):
+        numero, indicateurs = PERIPHERIQUE.unpack_from(corps, position)
+        position += PERIPHERIQUE.size
+        if indicateurs & ACTIF:
+            valeurs = DEBITS.unpack_from(corps, position)
+            position += DEBITS.size
+        else:
+            valeurs = (0.0, 0.0, 0.0, 0.0)
+        marque = bool(indicateurs & PARTITION_OU_BOUCLE)
+        return self._chaines[numero], marque, valeurs, position
+
+
+def encoder(echantillons: Iterable) -> bytes:
+    """
+    Encode un lot d'échantillons en trames décodables seules.
+
+    Args:
+        echantillons (Iterable[models.Snapshot | dict]): instantanés ou
+            dictionnaires de collecter_tout(), dans l'ordre chronologique.
+
+    Lève:
+        ValueError: timestamp invalide.
+        KeyError: dictionnaire incomplet.
+    """
+    return Encodeur().encoder(echantillons)
+
+
+def decoder(donnees: bytes) -> List[Dict[str, Any]]:
+    """
+    Décode des trames produites par encoder().
+
+    Retourne:
+        list[dict]: échantillons sous la forme de collecter_tout() ; les
+        débits sont des flottants 32 bits (précision relative ~1e-7).
+
+    Lève:
+        TrameInvalide: données invalides ou tronquées.
+    """
+    return Decodeur().decoder(donnees)